@@ -0,0 +1,122 @@
+"""
+Semantic answer cache
+Serves stored answers for questions whose embedding is close enough to one
+already answered, scoped by prompt-config version and vector-store version
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Any
+
+import numpy as np
+
+
+@dataclass
+class CachedAnswer:
+    """Answer stored in the semantic cache"""
+    answer: str
+    sources: List[str]
+    tokens: List[str] = field(default_factory=list)
+    generation_seconds: float = 0.0
+    created_at: float = field(default_factory=time.time)
+
+
+class SemanticAnswerCache:
+    """Cosine-similarity answer cache with LRU eviction and TTL"""
+
+    def __init__(self, max_size: int = 512, similarity_threshold: float = 0.97, ttl_seconds: float = 3600):
+        self.max_size = max_size
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (namespace, slot, CachedAnswer), in LRU order
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._vectors = None  # (max_size, dim) unit vectors, one row per slot
+        self._free_slots = list(range(max_size))
+        self._next_key = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.latency_saved_seconds = 0.0
+
+    @staticmethod
+    def _unit(vector) -> np.ndarray:
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def _is_expired(self, entry: CachedAnswer) -> bool:
+        return self.ttl_seconds > 0 and time.time() - entry.created_at > self.ttl_seconds
+
+    def _remove(self, key: int):
+        _, slot, _ = self._entries.pop(key)
+        self._free_slots.append(slot)
+
+    def lookup(self, query_embedding, namespace: tuple) -> Optional[CachedAnswer]:
+        """Return the most similar cached answer above the threshold, or None"""
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            best_key, best_score = None, -1.0
+            if self._entries:
+                query = self._unit(query_embedding)
+                keys = [k for k, (ns, _, _) in self._entries.items() if ns == namespace]
+                if keys:
+                    slots = [self._entries[k][1] for k in keys]
+                    scores = self._vectors[slots] @ query
+                    index = int(np.argmax(scores))
+                    best_key, best_score = keys[index], float(scores[index])
+
+            if best_key is None or best_score < self.similarity_threshold:
+                self.misses += 1
+                return None
+
+            entry = self._entries[best_key][2]
+            if self._is_expired(entry):
+                self._remove(best_key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            self.latency_saved_seconds += entry.generation_seconds
+            return entry
+
+    def store(self, query_embedding, namespace: tuple, entry: CachedAnswer):
+        """Add an answer, evicting the least recently used one when full"""
+        if self.max_size <= 0:
+            return
+        vector = self._unit(query_embedding)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+            if not self._free_slots:
+                self._remove(next(iter(self._entries)))
+            slot = self._free_slots.pop()
+            self._vectors[slot] = vector
+            self._entries[self._next_key] = (namespace, slot, entry)
+            self._next_key += 1
+
+    def invalidate(self):
+        """Drop every entry (e.g. after the index or prompt changed)"""
+        with self._lock:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._free_slots = list(range(self.max_size))
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit rate and latency saved for metrics"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "similarity_threshold": self.similarity_threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "latency_saved_seconds": round(self.latency_saved_seconds, 3)
+        }
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+近似最近傍インデックスのベンチマーク
+フラットインデックスの結果を正解として、IVF / HNSW / PQ / IVFPQ の
+recall@k と検索レイテンシ（p50/p99）、インデックスサイズを比較する
+
+ベクトルは既存のベクトルストア（フラットインデックス）から取り出すか、
+--synthetic で合成する。コーパスを --scale 倍に増やして大規模時の挙動も確認できる
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from faiss_index import build_index, apply_search_params
+
+
+def load_corpus(args) -> np.ndarray:
+    """Vectors from the existing store, or clustered synthetic ones"""
+    rng = np.random.default_rng(0)
+    index_file = Path(args.store) / "index.faiss"
+    if not args.synthetic and index_file.exists():
+        index = faiss.read_index(str(index_file))
+        vectors = index.reconstruct_n(0, index.ntotal)
+        print(f"📂 {index.ntotal} vectors from {index_file}")
+    else:
+        # Clustered data behaves more like real embeddings than uniform noise
+        centers = rng.normal(size=(max(1, args.synthetic // 50), args.dim)).astype(np.float32)
+        labels = rng.integers(0, len(centers), args.synthetic)
+        vectors = centers[labels] + 0.3 * rng.normal(size=(args.synthetic, args.dim)).astype(np.float32)
+        print(f"🧪 {args.synthetic} synthetic vectors (dim {args.dim})")
+
+    if args.scale > 1:
+        # Jittered copies stand in for a larger knowledge base
+        copies = [vectors] + [
+            vectors + 0.01 * rng.normal(size=vectors.shape).astype(np.float32)
+            for _ in range(args.scale - 1)
+        ]
+        vectors = np.vstack(copies)
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+def make_queries(vectors: np.ndarray, count: int) -> np.ndarray:
+    """Perturbed corpus vectors, like paraphrased questions"""
+    rng = np.random.default_rng(1)
+    picks = vectors[rng.integers(0, len(vectors), count)]
+    noise = rng.normal(size=picks.shape).astype(np.float32) * picks.std() * 0.1
+    return np.ascontiguousarray(picks + noise, dtype=np.float32)
+
+
+def measure(index, queries: np.ndarray, k: int, truth: np.ndarray) -> dict:
+    """Per-query latency (one query at a time, as the server searches) and recall@k"""
+    latencies, found = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append(time.perf_counter() - start)
+        found.append(ids[0])
+    found = np.array(found)
+    recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+    latencies = np.array(latencies) * 1000
+    return {
+        "recall": recall,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def index_size_mb(index) -> float:
+    return len(faiss.serialize_index(index)) / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ANN index recall vs latency benchmark")
+    parser.add_argument("--store", default="vector_store", help="flat vector store to read vectors from")
+    parser.add_argument("--synthetic", type=int, default=50000, help="synthetic corpus size when no store is found")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--scale", type=int, default=1, help="replicate the corpus N times")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=8, help="matches RETRIEVAL_K")
+    parser.add_argument("--nlist", type=int, default=0, help="0 = auto (~4*sqrt(n))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[32, 64, 128])
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--pq-m", type=int, default=16)
+    args = parser.parse_args()
+
+    faiss.omp_set_num_threads(1)  # one search per request thread, as in the server
+    vectors = load_corpus(args)
+    queries = make_queries(vectors, args.queries)
+
+    flat = build_index(vectors, "flat")
+    flat.add(vectors)
+    _, truth = flat.search(queries, args.k)
+    results = [("flat", "-", index_size_mb(flat), 0.0, measure(flat, queries, args.k, truth))]
+
+    for index_type, knob, values in (
+        ("ivf", "nprobe", args.nprobe),
+        ("hnsw", "efSearch", args.ef_search),
+        ("pq", "-", [None]),
+        ("ivfpq", "nprobe", args.nprobe),
+    ):
+        start = time.perf_counter()
+        index = build_index(vectors, index_type, nlist=args.nlist, hnsw_m=args.hnsw_m, pq_m=args.pq_m)
+        index.add(vectors)
+        build_seconds = time.perf_counter() - start
+        for value in values:
+            if knob == "nprobe":
+                apply_search_params(index, nprobe=value)
+            elif knob == "efSearch":
+                apply_search_params(index, ef_search=value)
+            label = f"{knob}={value}" if value else "-"
+            results.append((index_type, label, index_size_mb(index), build_seconds,
+                            measure(index, queries, args.k, truth)))
+
+    print(f"\n📊 {len(vectors)} vectors, {len(queries)} queries, recall@{args.k} vs flat")
+    print(f"{'index':<8} {'param':<14} {'size MB':>9} {'build s':>8} {'recall':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    for index_type, label, size_mb, build_seconds, r in results:
+        print(f"{index_type:<8} {label:<14} {size_mb:>9.1f} {build_seconds:>8.1f} "
+              f"{r['recall']:>7.3f} {r['p50_ms']:>8.3f} {r['p99_ms']:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
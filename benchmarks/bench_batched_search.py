@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+同時ベクトル検索のマイクロバッチ化ベンチマーク
+同時に届いたクエリを1件ずつ検索する方式（ワーカースレッドでの個別 index.search）と、
+SEARCH_BATCH_WINDOW_MS 内に集めて1回の行列検索にまとめる方式を比較する
+
+合成ベクトルのFAISSストアを使用し、OpenAI APIは呼び出さない
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from config import Config
+from micro_batcher import MicroBatcher
+from server import RAGServer
+
+
+def build_store(size: int, dim: int) -> FAISS:
+    """Unit-norm synthetic vectors, like OpenAI embeddings"""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(size, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    pairs = [(f"chunk {i}", vector.tolist()) for i, vector in enumerate(vectors)]
+    return FAISS.from_embeddings(pairs, DeterministicFakeEmbedding(size=dim))
+
+
+def make_queries(store: FAISS, count: int) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    picks = store.index.reconstruct_n(0, store.index.ntotal)[rng.integers(0, store.index.ntotal, count)]
+    queries = picks + 0.05 * rng.normal(size=picks.shape).astype(np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+async def run_level(search, queries: np.ndarray, concurrency: int) -> dict:
+    """Keep `concurrency` searches in flight until every query is done"""
+    latencies = []
+    next_query = iter(queries)
+
+    async def worker():
+        for query in next_query:
+            start = time.perf_counter()
+            await search(query)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+    return {
+        "qps": len(queries) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+async def benchmark(args):
+    store = build_store(args.size, args.dim)
+    queries = make_queries(store, args.queries)
+    rag_server = RAGServer()
+    rag_server.vector_store = store
+    loop = asyncio.get_running_loop()
+    print(f"🧪 {args.size} vectors (dim {args.dim}), {args.queries} queries, "
+          f"window {args.window_ms}ms, max batch {args.max_batch}")
+
+    async def per_query(query):
+        return await loop.run_in_executor(rag_server.executor, rag_server.retriever.search, store, query)
+
+    print(f"\n{'concurrency':>11} {'mode':<8} {'QPS':>9} {'p50 ms':>8} {'p99 ms':>8} {'avg batch':>10}")
+    for concurrency in args.levels:
+        r = await run_level(per_query, queries, concurrency)
+        print(f"{concurrency:>11} {'single':<8} {r['qps']:>9.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {'-':>10}")
+
+        # A fresh batcher per level so avg batch size reflects this concurrency only
+        batcher = MicroBatcher(rag_server._search_micro_batch, args.max_batch, args.window_ms)
+        r = await run_level(lambda query: batcher.submit((store, query)), queries, concurrency)
+        print(f"{concurrency:>11} {'batched':<8} {r['qps']:>9.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+              f"{batcher.stats()['avg_batch_size']:>10.1f}")
+
+    rag_server.executor.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-query vs micro-batched FAISS search")
+    parser.add_argument("--size", type=int, default=50000, help="vectors in the synthetic store")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--window-ms", type=float, default=Config.SEARCH_BATCH_WINDOW_MS)
+    parser.add_argument("--max-batch", type=int, default=Config.SEARCH_BATCH_MAX_SIZE)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+LLMクライアントの作成コスト・接続再利用のベンチマーク
+ローカルのOpenAI互換スタブに対して、リクエスト毎にChatOpenAIを作る従来方式と
+RAGServerの共有・プール済みクライアントのリクエスト当たりオーバーヘッドを比較する
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import httpx
+from langchain_openai import ChatOpenAI
+from config import Config
+from server import RAGServer
+from stub_openai_server import create_app, start_in_thread
+
+
+async def per_request_client(base_url: str, prompt: str):
+    """Previous behaviour: new client (and new connection) for every request"""
+    http_async_client = httpx.AsyncClient()
+    try:
+        llm = ChatOpenAI(
+            model=Config.LLM_MODEL,
+            temperature=Config.LLM_TEMPERATURE,
+            base_url=base_url,
+            http_async_client=http_async_client
+        )
+        return await llm.ainvoke(prompt)
+    finally:
+        await http_async_client.aclose()
+
+
+async def measure(label: str, call, iterations: int, concurrency: int):
+    """Run `call` `iterations` times with bounded concurrency and report latency"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+    
+    await call()  # warm-up
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(iterations)])
+    elapsed = time.perf_counter() - start
+    
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{label:<24} mean {statistics.mean(latencies) * 1000:7.2f} ms  "
+        f"p95 {p95 * 1000:7.2f} ms  {iterations / elapsed:8.1f} req/s"
+    )
+    return statistics.mean(latencies)
+
+
+async def main_async(args):
+    base_url, stub_server = start_in_thread(create_app(latency=args.latency))
+    prompt = "What is sector rotation in a recession?"
+    
+    # Point the shared clients at the stub
+    os.environ["OPENAI_BASE_URL"] = base_url
+    rag_server = RAGServer()
+    rag_server.setup_llm_clients()
+    
+    print(f"🧪 Stub latency {args.latency * 1000:.0f} ms, {args.iterations} requests, concurrency {args.concurrency}")
+    before = await measure(
+        "per-request client",
+        lambda: per_request_client(base_url, prompt),
+        args.iterations,
+        args.concurrency
+    )
+    after = await measure(
+        "shared pooled client",
+        lambda: rag_server.llm.ainvoke(prompt),
+        args.iterations,
+        args.concurrency
+    )
+    print(f"📊 Per-request overhead saved: {(before - after) * 1000:.2f} ms")
+    
+    await rag_server.shutdown()
+    stub_server.should_exit = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM client pooling benchmark")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub server latency (seconds)")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
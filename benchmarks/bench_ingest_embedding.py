@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+ETL埋め込みスループットのベンチマーク
+ローカルのOpenAI互換スタブ（固定レイテンシ）に対して、同時実行数ごとの
+chunks/sec を計測し、ETL時間が同時実行数に応じて短縮されることを確認する
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_openai import OpenAIEmbeddings
+from config import Config
+from ingest import KnowledgeIngester, ParallelBatchEmbeddings
+from stub_openai_server import create_app, start_in_thread
+
+
+def load_chunks(repeat: int):
+    """Split the real knowledge corpus, repeated to simulate a larger one"""
+    ingester = KnowledgeIngester()
+    chunks = []
+    for file_path in ingester.load_markdown_files():
+        with open(file_path, 'r', encoding='utf-8') as f:
+            chunks.extend(ingester.split_text_into_chunks(f.read()))
+    return chunks * repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched embedding throughput benchmark")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--batch-size", type=int, default=Config.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub latency per embeddings request")
+    parser.add_argument("--repeat", type=int, default=4, help="corpus multiplier")
+    args = parser.parse_args()
+    
+    base_url, stub_server = start_in_thread(create_app(latency=args.latency))
+    chunks = load_chunks(args.repeat)
+    inner = OpenAIEmbeddings(
+        model=Config.EMBEDDING_MODEL,
+        base_url=base_url,
+        check_embedding_ctx_length=False  # avoid downloading tiktoken encodings
+    )
+    
+    print(f"🧪 {len(chunks)} chunks, batch size {args.batch_size}, stub latency {args.latency * 1000:.0f} ms")
+    print(f"{'concurrency':>12} {'seconds':>10} {'chunks/sec':>12}")
+    for concurrency in args.levels:
+        embeddings = ParallelBatchEmbeddings(inner, batch_size=args.batch_size, max_concurrency=concurrency)
+        start = time.perf_counter()
+        embeddings.embed_documents(chunks)
+        elapsed = time.perf_counter() - start
+        print(f"{concurrency:>12} {elapsed:>10.2f} {len(chunks) / elapsed:>12.1f}")
+    
+    stub_server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+リクエスト毎のプロンプト準備コストのマイクロベンチマーク
+言語判定 + プロンプトテンプレート取得 + format までを、
+従来方式（毎回 langdetect と PromptTemplate 生成）と
+現在の方式（文字種による高速判定 + メモ化 + 事前コンパイル済みテンプレート）で比較する
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langdetect import detect
+from langchain.prompts import PromptTemplate
+
+from server import RAGServer
+
+QUERIES = [
+    "リスク管理の基本的な考え方を教えてください",
+    "CPPIとは何ですか？",
+    "What is the difference between CPPI and constant-mix rebalancing?",
+    "How should I size positions with Minervini's method?",
+    "資産配分",
+    "What does リスクパリティ mean?",
+]
+CONTEXT = "参考情報のチャンク。" * 200
+
+
+def legacy_prepare(rag_server: RAGServer, question: str) -> str:
+    """Previous per-request path: unseeded langdetect and a fresh PromptTemplate"""
+    try:
+        language = "japanese" if detect(question) == "ja" else "english"
+    except Exception:
+        language = "english"
+    system_prompt = rag_server.prompt_config.get("system_prompt", "")
+    if language == "japanese":
+        template = f"{system_prompt}\n\n以下の情報を基に、質問に日本語で答えてください。\n\n【参考情報】\n{{context}}\n\n【質問】\n{{question}}\n\n【回答】\n"
+    else:
+        template = f"{system_prompt}\n\nPlease answer the question in English based on the following information.\n\n**Reference Information**\n{{context}}\n\n**Question**\n{{question}}\n\n**Answer**\n"
+    prompt = PromptTemplate(template=template, input_variables=["context", "question"])
+    return prompt.format(context=CONTEXT, question=question)
+
+
+def current_prepare(rag_server: RAGServer, question: str) -> str:
+    return rag_server.get_dynamic_prompt_template(question).format(context=CONTEXT, question=question)
+
+
+def measure(prepare, rag_server: RAGServer, iterations: int) -> dict:
+    latencies = []
+    for i in range(iterations):
+        question = QUERIES[i % len(QUERIES)]
+        start = time.perf_counter()
+        prepare(rag_server, question)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    latencies.sort()
+    return {
+        "mean_us": statistics.fmean(latencies),
+        "p50_us": latencies[len(latencies) // 2],
+        "p99_us": latencies[int(len(latencies) * 0.99)],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request prompt preparation overhead")
+    parser.add_argument("--iterations", type=int, default=3000)
+    args = parser.parse_args()
+
+    rag_server = RAGServer()
+    rag_server.load_prompt_template()
+    # Warm-up: langdetect loads its profiles on first use
+    legacy_prepare(rag_server, QUERIES[0])
+    current_prepare(rag_server, QUERIES[0])
+
+    print(f"\n📊 {args.iterations} prompts, {len(QUERIES)} distinct questions")
+    print(f"{'path':<10} {'mean µs':>9} {'p50 µs':>9} {'p99 µs':>9}")
+    for name, prepare in (("legacy", legacy_prepare), ("current", current_prepare)):
+        r = measure(prepare, rag_server, args.iterations)
+        print(f"{name:<10} {r['mean_us']:>9.1f} {r['p50_us']:>9.1f} {r['p99_us']:>9.1f}")
+    print(f"🔍 Language detection: {rag_server.language_detector.stats()}")
+    rag_server.executor.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+SSEトークンストリームのエンコードのベンチマーク
+多数の同時ストリームで、従来方式（トークン毎に dict + datetime.now().isoformat()
++ json.dumps、トークン毎に1回の書き込み）と、SSEEncoder（トークンのまとめ送信 +
+ミリ秒オフセット、json / orjson）を比較する
+
+計測はCPU時間ベース（単一イベントループ = 1コア）で、tokens/sec per core と
+トークン当たりの書き込み回数を表示する。LLMとネットワークは模擬で、OpenAI APIは呼び出さない
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import streaming
+from streaming import SSEEncoder
+
+# Typical streamed pieces: short Japanese fragments and English sub-words
+TOKENS = ["リスク", "管理", "では", "、", " position", " sizing", "が", "重要", "です", "。", "\n- ", "**", "CPPI", "**"]
+
+
+async def fake_llm(count: int, gap: float):
+    """Token source; gap=0 still yields to the loop like a real network read"""
+    for i in range(count):
+        await asyncio.sleep(gap)
+        yield TOKENS[i % len(TOKENS)]
+
+
+async def legacy_stream(count: int, gap: float):
+    async for token in fake_llm(count, gap):
+        token_data = {
+            "type": "token",
+            "content": token,
+            "timestamp": datetime.now().isoformat()
+        }
+        yield f"data: {json.dumps(token_data, ensure_ascii=False)}\n\n"
+    yield f"data: {json.dumps({'type': 'complete', 'timestamp': datetime.now().isoformat()}, ensure_ascii=False)}\n\n"
+
+
+async def encoded_stream(count: int, gap: float, interval_ms: float, flush_chars: int):
+    encoder = SSEEncoder(interval_ms, flush_chars)
+    async for token in fake_llm(count, gap):
+        frame = encoder.token(token)
+        if frame is not None:
+            yield frame
+    frame = encoder.flush()
+    if frame is not None:
+        yield frame
+    yield encoder.event("complete")
+
+
+async def consume(stream, counters: dict):
+    """Stand-in for the ASGI server: encode each chunk and hand it to the transport"""
+    async for frame in stream:
+        counters["bytes"] += len(frame.encode("utf-8"))
+        counters["writes"] += 1
+        await asyncio.sleep(0)
+
+
+async def run(make_stream, streams: int, tokens: int) -> dict:
+    counters = {"bytes": 0, "writes": 0}
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await asyncio.gather(*[consume(make_stream(), counters) for _ in range(streams)])
+    cpu = time.process_time() - cpu_start
+    total = streams * tokens
+    return {
+        "tokens_per_core_sec": total / cpu if cpu else float("inf"),
+        "wall_s": time.perf_counter() - wall_start,
+        "writes_per_token": counters["writes"] / total,
+        "bytes_per_token": counters["bytes"] / total,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE token encoding throughput")
+    parser.add_argument("--streams", type=int, default=200, help="concurrent streams")
+    parser.add_argument("--tokens", type=int, default=500, help="tokens per stream")
+    parser.add_argument("--token-gap-ms", type=float, default=1.0, help="delay between tokens from the fake LLM")
+    parser.add_argument("--interval-ms", type=float, nargs="+", default=[0, 20, 50])
+    parser.add_argument("--flush-chars", type=int, default=256)
+    args = parser.parse_args()
+    gap = args.token_gap_ms / 1000
+
+    modes = [("legacy", "-", None, lambda: legacy_stream(args.tokens, gap))]
+    encoders = ["orjson", "json"] if streaming.orjson is not None else ["json"]
+    for encoder_name in encoders:
+        for interval in args.interval_ms:
+            modes.append((
+                f"encoder/{encoder_name}", f"{interval:g}", encoder_name,
+                lambda interval=interval: encoded_stream(args.tokens, gap, interval, args.flush_chars)
+            ))
+
+    print(f"🧪 {args.streams} streams x {args.tokens} tokens, {args.token_gap_ms}ms between tokens")
+    print(f"{'mode':<16} {'flush ms':>8} {'tokens/s/core':>14} {'writes/token':>13} {'bytes/token':>12} {'wall s':>7}")
+    for name, interval, encoder_name, make_stream in modes:
+        with patch.object(streaming, "orjson", None if encoder_name == "json" else streaming.orjson):
+            r = asyncio.run(run(make_stream, args.streams, args.tokens))
+        print(f"{name:<16} {interval:>8} {r['tokens_per_core_sec']:>14,.0f} {r['writes_per_token']:>13.3f} "
+              f"{r['bytes_per_token']:>12.1f} {r['wall_s']:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+ワーカー起動時間・メモリのベンチマーク
+合成したベクトルストア（インデックスサイズを段階的に増加）を各ワーカープロセスで
+読み込み、通常読み込みとmmap読み込みの time-to-ready と RSS（私有/ファイル共有）を比較する
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def build_store(path: str, size: int, dim: int):
+    """Write a synthetic FAISS store with `size` random vectors"""
+    import numpy as np
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.embeddings import FakeEmbeddings
+    
+    rng = np.random.default_rng(0)
+    vectors = rng.random((size, dim), dtype=np.float32)
+    pairs = [(f"chunk {i}", vector) for i, vector in enumerate(vectors)]
+    FAISS.from_embeddings(pairs, FakeEmbeddings(size=dim)).save_local(path)
+
+
+def read_rss():
+    """Private (anon) and file-backed resident memory in MB"""
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("RssAnon", "RssFile")):
+                key, value = line.split(":")
+                values[key] = int(value.split()[0]) / 1024
+    return values
+
+
+def worker():
+    """Runs in a fresh process: load the store like a uvicorn worker does"""
+    start = time.perf_counter()
+    from server import rag_server
+    import_seconds = time.perf_counter() - start
+    
+    before = read_rss()
+    start = time.perf_counter()
+    rag_server.load_vector_store()
+    # Touch the whole index once, as the first queries would
+    import numpy as np
+    rag_server.vector_store.index.search(np.zeros((1, rag_server.vector_store.index.d), dtype=np.float32), 1)
+    load_seconds = time.perf_counter() - start
+    
+    after = read_rss()
+    print(json.dumps({
+        "import_seconds": import_seconds,
+        "load_seconds": load_seconds,
+        "anon_mb": after["RssAnon"] - before["RssAnon"],
+        "file_mb": after["RssFile"] - before["RssFile"],
+    }))
+
+
+def run_worker(store_path: str, mmap: bool) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "OPENAI_API_KEY": env.get("OPENAI_API_KEY", "sk-benchmark"),
+        "VECTOR_STORE_PATH": store_path,
+        "VECTOR_STORE_MMAP": "true" if mmap else "false",
+    })
+    output = subprocess.run(
+        [sys.executable, __file__, "--worker"],
+        env=env, cwd=str(ROOT), capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker startup benchmark (regular vs mmap load)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 20000, 50000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        worker()
+        return
+    
+    print(f"{'vectors':>8} {'index MB':>9} {'mode':>8} {'ready (s)':>10} {'private MB':>11} {'shared MB':>10}")
+    for size in args.sizes:
+        store_path = tempfile.mkdtemp(prefix="bench_store_")
+        try:
+            build_store(store_path, size, args.dim)
+            index_mb = (Path(store_path) / "index.faiss").stat().st_size / (1024 * 1024)
+            for mmap in (False, True):
+                result = run_worker(store_path, mmap)
+                print(
+                    f"{size:>8} {index_mb:>9.1f} {'mmap' if mmap else 'regular':>8} "
+                    f"{result['load_seconds']:>10.3f} {result['anon_mb']:>11.1f} {result['file_mb']:>10.1f}"
+                )
+        finally:
+            shutil.rmtree(store_path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
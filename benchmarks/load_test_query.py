@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+/query 同時実行ロードテスト
+LLM呼び出しを一定レイテンシのフェイクに置き換え、同時リクエスト数に応じて
+スループットが伸びること（1ワーカーあたり1件に張り付かないこと）を確認する
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+import httpx
+from langchain.schema import Document
+import server
+from server import app, rag_server, verify_token
+
+
+class FakeEmbeddings:
+    """Embedding client with fixed network latency"""
+    
+    def __init__(self, latency: float):
+        self.latency = latency
+    
+    async def aembed_query(self, text: str):
+        await asyncio.sleep(self.latency)
+        return [0.0] * 8
+    
+    async def aembed_documents(self, texts):
+        # One batched request: same latency as a single query
+        await asyncio.sleep(self.latency)
+        return [[0.0] * 8 for _ in texts]
+
+
+class FakeChatOpenAI:
+    """ChatOpenAI replacement with fixed generation latency"""
+    
+    latency = 0.5
+    
+    def __init__(self, **kwargs):
+        pass
+    
+    async def ainvoke(self, prompt: str):
+        await asyncio.sleep(self.latency)
+        return type("Result", (), {"content": "benchmark answer"})()
+
+
+class FakeVectorStore:
+    """FAISS replacement returning fixed documents"""
+    
+    def similarity_search_by_vector(self, embedding, k):
+        return [Document(page_content="context", metadata={"source": "bench.md"})] * k
+
+
+async def run_level(client: httpx.AsyncClient, concurrency: int, total: int) -> dict:
+    """Send `total` requests with at most `concurrency` in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    
+    async def one_request(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post("/query", json={"query": f"question {i}"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+    
+    async def probe_health():
+        # Measure /health while queries are in flight
+        await asyncio.sleep(0.05)
+        start = time.perf_counter()
+        await client.get("/health")
+        return time.perf_counter() - start
+    
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        probe_health(),
+        *[one_request(i) for i in range(total)]
+    )
+    elapsed = time.perf_counter() - start
+    
+    return {
+        "concurrency": concurrency,
+        "throughput": total / elapsed,
+        "p50": statistics.median(latencies),
+        "health": results[0],
+    }
+
+
+async def main_async(args):
+    FakeChatOpenAI.latency = args.llm_latency
+    rag_server.embeddings = FakeEmbeddings(args.embedding_latency)
+    rag_server.vector_store = FakeVectorStore()
+    rag_server.prompt = None
+    # Measure the uncached path
+    rag_server.embedding_cache.max_size = 0
+    rag_server.answer_cache.max_size = 0
+    app.dependency_overrides[verify_token] = lambda: {"sub": "benchmark"}
+    
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        print(f"🧪 LLM latency: {args.llm_latency * 1000:.0f} ms / embedding latency: {args.embedding_latency * 1000:.0f} ms")
+        print(f"{'concurrency':>12} {'req/s':>10} {'p50 (ms)':>10} {'/health (ms)':>14}")
+        for concurrency in args.levels:
+            total = max(args.requests, concurrency)
+            result = await run_level(client, concurrency, total)
+            print(
+                f"{result['concurrency']:>12} {result['throughput']:>10.2f} "
+                f"{result['p50'] * 1000:>10.1f} {result['health'] * 1000:>14.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/query concurrency load test")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=32, help="requests per level")
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    args = parser.parse_args()
+    
+    with patch.object(server, "ChatOpenAI", FakeChatOpenAI):
+        asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+ローカル用のOpenAI互換スタブサーバー
+/v1/embeddings と /v1/chat/completions（ストリーミング対応）を固定レイテンシで返す
+"""
+
+import json
+import time
+import socket
+import asyncio
+import hashlib
+import argparse
+import threading
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+EMBEDDING_DIM = 64
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM):
+    """Deterministic pseudo-embedding derived from the text hash"""
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return [((digest[i % len(digest)] / 255.0) - 0.5) for i in range(dim)]
+
+
+def create_app(latency: float = 0.0, token_delay: float = 0.0, tokens: int = 20) -> FastAPI:
+    """Build the stub app; latency applies per request, token_delay per streamed token"""
+    stub = FastAPI()
+    stub.state.stats = {"embeddings": 0, "embedded_texts": 0, "chat": 0}
+    
+    @stub.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body["input"]
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        stub.state.stats["embeddings"] += 1
+        stub.state.stats["embedded_texts"] += len(inputs)
+        await asyncio.sleep(latency)
+        return {
+            "object": "list",
+            "model": body.get("model", "stub"),
+            "data": [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(str(text))}
+                for i, text in enumerate(inputs)
+            ],
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+    
+    @stub.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stub.state.stats["chat"] += 1
+        model = body.get("model", "stub")
+        created = int(time.time())
+        await asyncio.sleep(latency)
+        
+        if not body.get("stream"):
+            return {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "stub " * tokens},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": tokens, "total_tokens": tokens},
+            }
+        
+        async def event_stream():
+            for i in range(tokens):
+                if token_delay:
+                    await asyncio.sleep(token_delay)
+                chunk = {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": f"tok{i} "}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            done = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            }
+            yield f"data: {json.dumps(done)}\n\n"
+            yield "data: [DONE]\n\n"
+        
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+    
+    return stub
+
+
+def free_port() -> int:
+    """Pick an unused local port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_in_thread(stub: FastAPI, port: int = None):
+    """Run the stub on a background thread and return (base_url, server)"""
+    port = port or free_port()
+    server = uvicorn.Server(uvicorn.Config(stub, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}/v1", server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub server")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--token-delay", type=float, default=0.0)
+    args = parser.parse_args()
+    
+    print(f"🧪 Stub OpenAI server: http://127.0.0.1:{args.port}/v1")
+    uvicorn.run(create_app(args.latency, args.token_delay), host="127.0.0.1", port=args.port)
@@ -0,0 +1,100 @@
+"""
+Offset-indexed chunk store
+Chunk text and metadata are stored as one JSON record per FAISS vector
+position in a single blob (chunks.bin) with an int64 offset array
+(chunks.offsets.npy). The server memory-maps both and materializes only the
+documents a search returns, without unpickling index.pkl.
+"""
+
+import os
+import json
+import mmap
+from pathlib import Path
+from collections.abc import Mapping
+from typing import Union
+
+import numpy as np
+from langchain.schema import Document
+from langchain_community.docstore.base import Docstore
+
+CHUNKS_FILE = "chunks.bin"
+OFFSETS_FILE = "chunks.offsets.npy"
+
+
+def write_chunk_store(folder_path: str, vector_store) -> int:
+    """Write the store's documents in vector-position order; returns the count"""
+    folder = Path(folder_path)
+    # Write new files and swap them in: a running server has the old ones mmapped,
+    # and truncating a mapped file under it would crash the next chunk read (SIGBUS)
+    chunks_tmp = folder / f".{CHUNKS_FILE}.tmp"
+    offsets_tmp = folder / f".{OFFSETS_FILE}.tmp"
+    offsets = [0]
+    with open(chunks_tmp, 'wb') as f:
+        for _, doc_id in sorted(vector_store.index_to_docstore_id.items()):
+            doc = vector_store.docstore.search(doc_id)
+            record = json.dumps(
+                {"id": doc_id, "text": doc.page_content, "metadata": doc.metadata},
+                ensure_ascii=False
+            ).encode('utf-8')
+            f.write(record)
+            offsets.append(offsets[-1] + len(record))
+    with open(offsets_tmp, 'wb') as f:
+        np.save(f, np.asarray(offsets, dtype=np.int64))
+    os.replace(chunks_tmp, folder / CHUNKS_FILE)
+    os.replace(offsets_tmp, folder / OFFSETS_FILE)
+    return len(offsets) - 1
+
+
+class PositionalIds(Mapping):
+    """index_to_docstore_id stand-in: vector position i maps to docstore key i"""
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def __getitem__(self, position):
+        position = int(position)
+        if not 0 <= position < self.size:
+            raise KeyError(position)
+        return position
+
+    def __iter__(self):
+        return iter(range(self.size))
+
+    def __len__(self):
+        return self.size
+
+
+class ChunkStore(Docstore):
+    """Read-only, lazily decoded docstore keyed by vector position"""
+
+    def __init__(self, folder_path: str):
+        folder = Path(folder_path)
+        self.offsets = np.load(folder / OFFSETS_FILE, mmap_mode='r')
+        self._file = open(folder / CHUNKS_FILE, 'rb')
+        # mmap cannot map an empty file
+        self._blob = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.offsets[-1] else b""
+
+    @staticmethod
+    def exists(folder_path: str) -> bool:
+        folder = Path(folder_path)
+        return (folder / CHUNKS_FILE).exists() and (folder / OFFSETS_FILE).exists()
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def positional_ids(self) -> PositionalIds:
+        return PositionalIds(len(self))
+
+    def search(self, search: Union[int, str]) -> Union[str, Document]:
+        """Decode the record at a vector position"""
+        position = int(search)
+        if not 0 <= position < len(self):
+            return f"ID {search} not found."
+        start, end = int(self.offsets[position]), int(self.offsets[position + 1])
+        record = json.loads(self._blob[start:end].decode('utf-8'))
+        return Document(page_content=record["text"], metadata=record["metadata"])
+
+    def close(self):
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._file.close()
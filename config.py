@@ -15,19 +15,85 @@ class Config:
     # ETL設定 - 投資文書用に最適化
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1200"))  # 複雑な投資戦略により大きなチャンク
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "150"))  # より多くのオーバーラップで文脈保持
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))  # 1リクエストで埋め込むチャンク数
+    EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "4"))  # 同時に投げる埋め込みリクエスト数
+    EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))  # レート制限時のリトライ回数
+    CHUNK_EMBEDDING_CACHE_PATH = os.getenv("CHUNK_EMBEDDING_CACHE_PATH", "cache/chunk_embeddings")  # 空で無効（--fullでも消えない場所に置く）
     
     # RAG設定 - 包括的な投資アドバイス用
     RETRIEVAL_K = int(os.getenv("RETRIEVAL_K", "8"))  # より多くの関連文書を取得
+    RETRIEVAL_STRATEGY = os.getenv("RETRIEVAL_STRATEGY", "similarity")  # similarity / threshold / mmr / adaptive
+    RETRIEVAL_SCORE_THRESHOLD = float(os.getenv("RETRIEVAL_SCORE_THRESHOLD", "0.3"))  # thresholdで採用するコサイン類似度の下限
+    RETRIEVAL_FETCH_K = int(os.getenv("RETRIEVAL_FETCH_K", "20"))  # MMRの候補数
+    RETRIEVAL_MMR_LAMBDA = float(os.getenv("RETRIEVAL_MMR_LAMBDA", "0.5"))  # 1で関連度のみ、0で多様性のみ
+    RETRIEVAL_MIN_K = int(os.getenv("RETRIEVAL_MIN_K", "2"))  # adaptiveでも必ず使うチャンク数
+    RETRIEVAL_ADAPTIVE_DROP = float(os.getenv("RETRIEVAL_ADAPTIVE_DROP", "0.1"))  # 最上位からこれ以上類似度が下がったら打ち切り
+    HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"  # BM25(キーワード)検索とベクトル検索を融合
+    HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))  # Reciprocal Rank Fusionの定数
+    LEXICAL_SKIP_CONFIDENCE = float(os.getenv("LEXICAL_SKIP_CONFIDENCE", "0.9"))  # 最上位チャンクがクエリ語をこの割合以上含めば埋め込みを省略（1超で無効）
+    RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"  # 検索後にCPUで再ランキング
+    RERANK_MODEL = os.getenv("RERANK_MODEL", "lexical")  # lexical（語の重なり）またはsentence-transformersのcross-encoder名
+    RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "24"))  # 再ランキング前に取得する候補数
+    RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))  # 1回にスコア計算するチャンク数
+    RERANK_TIME_BUDGET_MS = float(os.getenv("RERANK_TIME_BUDGET_MS", "50"))  # 超えたら残りの候補は元の順位のまま
     LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", "0.2"))  # より保守的な金融アドバイス
     LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")  # 最新の推奨モデル (2025年1月時点)
     
     # 投資特化設定
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
-    MAX_CONTEXT_LENGTH = int(os.getenv("MAX_CONTEXT_LENGTH", "8000"))
+    MAX_CONTEXT_LENGTH = int(os.getenv("MAX_CONTEXT_LENGTH", "8000"))  # プロンプトに入れる検索結果のトークン上限
     FINANCIAL_ADVICE_TEMPERATURE = float(os.getenv("FINANCIAL_ADVICE_TEMPERATURE", "0.1"))
     INCLUDE_RISK_WARNINGS = os.getenv("INCLUDE_RISK_WARNINGS", "true").lower() == "true"
     REQUIRE_DISCLAIMERS = os.getenv("REQUIRE_DISCLAIMERS", "true").lower() == "true"
     
+    # 非同期処理設定 - イベントループをブロックしないための設定
+    QUERY_THREAD_POOL_SIZE = int(os.getenv("QUERY_THREAD_POOL_SIZE", "8"))  # FAISS検索などCPU処理を逃がすスレッド数
+    QUERY_EMBEDDING_BATCH_WINDOW_MS = float(os.getenv("QUERY_EMBEDDING_BATCH_WINDOW_MS", "5"))  # 実行中の埋め込みリクエストがある間だけ後続をまとめる最大待ち時間（ミリ秒）
+    QUERY_EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("QUERY_EMBEDDING_BATCH_MAX_SIZE", "64"))  # 1回の埋め込みリクエストにまとめる最大質問数（1で無効）
+    SEARCH_BATCH_WINDOW_MS = float(os.getenv("SEARCH_BATCH_WINDOW_MS", "2"))  # 実行中の検索がある間だけ後続をまとめる最大待ち時間（ミリ秒）
+    SEARCH_BATCH_MAX_SIZE = int(os.getenv("SEARCH_BATCH_MAX_SIZE", "32"))  # 1回のFAISS検索にまとめる最大クエリ数（1で無効）
+    BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "500"))  # /query/batch 1回あたりの質問数上限
+    BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))  # バッチ内で同時に実行するLLM呼び出し数
+    
+    # HTTPクライアント設定 - OpenAI APIへの接続をリクエスト間で再利用
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))  # コネクションプールの上限
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))  # 待機させておく接続数
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))  # アイドル接続の保持秒数
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))  # ストリーミング中のトークン間隔も含む
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    STREAM_FLUSH_INTERVAL_MS = float(os.getenv("STREAM_FLUSH_INTERVAL_MS", "20"))  # トークンをまとめて送る間隔（ミリ秒、0でトークン毎）
+    STREAM_FLUSH_CHARS = int(os.getenv("STREAM_FLUSH_CHARS", "256"))  # この文字数に達したら間隔を待たずに送信
+    STREAM_BUFFER_FRAMES = int(os.getenv("STREAM_BUFFER_FRAMES", "16"))  # 1ストリームで送信待ちにできるフレーム数（超えるとLLMの読み出しを止める）
+    STREAM_SEND_TIMEOUT = float(os.getenv("STREAM_SEND_TIMEOUT", "30"))  # 秒、クライアントが読まないままならストリームを中断
+    STREAM_DISCONNECT_CHECK_MS = float(os.getenv("STREAM_DISCONNECT_CHECK_MS", "250"))  # クライアント切断を確認する間隔（ミリ秒）
+    LLM_PREWARM_CONNECTION = os.getenv("LLM_PREWARM_CONNECTION", "true").lower() == "true"  # ストリーミング時、検索と並行してLLM APIへの接続を確立
+    
+    # クエリ埋め込みキャッシュ設定 - 同じ質問の再埋め込みを省略
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))  # 0で無効
+    EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "86400"))  # 秒、0で無期限
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")  # 空なら永続化しない (例: cache/query_embeddings.sqlite)
+    
+    # 回答キャッシュ設定 - ほぼ同じ質問にはLLMを呼ばずに回答を返す
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "512"))  # 0で無効
+    ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.97"))  # コサイン類似度のしきい値
+    ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", "3600"))  # 秒、0で無期限
+    
+    # ベクトルストアのホットリロード - ETL完了を検知して再起動なしで差し替え
+    VECTOR_STORE_WATCH_INTERVAL = float(os.getenv("VECTOR_STORE_WATCH_INTERVAL", "5"))  # 秒、0で監視しない
+    PROMPT_WATCH_INTERVAL = float(os.getenv("PROMPT_WATCH_INTERVAL", "5"))  # 秒、プロンプト設定の変更を検知して再読み込み（0で監視しない）
+    VECTOR_STORE_MMAP = os.getenv("VECTOR_STORE_MMAP", "false").lower() == "true"  # インデックスを読み取り専用でmmap（複数ワーカーでページキャッシュを共有）
+    
+    # FAISSインデックス設定 - 大規模コーパス向けの近似最近傍探索
+    FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")  # flat / ivf / hnsw / pq / ivfpq（ETL時に適用）
+    FAISS_IVF_NLIST = int(os.getenv("FAISS_IVF_NLIST", "0"))  # IVFのクラスタ数、0で自動（約4√n）
+    FAISS_IVF_NPROBE = int(os.getenv("FAISS_IVF_NPROBE", "16"))  # 検索時に調べるクラスタ数（大きいほど高再現率・低速）
+    FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))  # HNSWグラフの近傍数
+    FAISS_HNSW_EF_CONSTRUCTION = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "200"))
+    FAISS_HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))  # 検索時の候補数（大きいほど高再現率・低速）
+    FAISS_PQ_M = int(os.getenv("FAISS_PQ_M", "16"))  # PQのサブベクトル数（コードサイズ = M × NBITS / 8 バイト）
+    FAISS_PQ_NBITS = int(os.getenv("FAISS_PQ_NBITS", "8"))
+    
     # サーバー設定
     HOST = os.getenv("HOST", "0.0.0.0")
     PORT = int(os.getenv("PORT", "8000"))
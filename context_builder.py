@@ -0,0 +1,192 @@
+"""
+Token-budgeted context assembly
+Packs the highest-ranked retrieved chunks into the prompt up to
+MAX_CONTEXT_LENGTH tokens, dropping duplicate chunks and the text that
+adjacent chunks of the same file share through the splitter overlap
+"""
+
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Any
+
+from langchain.schema import Document
+
+# CJK characters are roughly one token each; other text averages ~4 chars per token
+_CJK_PATTERN = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokenizer-free estimate used when no tiktoken encoding is available"""
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+class TokenCounter:
+    """tiktoken counter for the LLM model, loaded on first use"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                import tiktoken
+                try:
+                    self._encoding = tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    self._encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                # tiktoken downloads encodings on first use; offline hosts fall back to estimates
+                print(f"⚠️  tiktoken encoding unavailable, estimating token counts: {e}")
+                self._encoding = None
+            self._loaded = True
+
+    @property
+    def exact(self) -> bool:
+        if not self._loaded:
+            self._load()
+        return self._encoding is not None
+
+    def count(self, text: str) -> int:
+        if not self._loaded:
+            self._load()
+        if self._encoding is None:
+            return estimate_tokens(text)
+        return len(self._encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to at most max_tokens tokens"""
+        if max_tokens <= 0:
+            return ""
+        if not self._loaded:
+            self._load()
+        if self._encoding is not None:
+            return self._encoding.decode(self._encoding.encode(text, disallowed_special=())[:max_tokens])
+        # Shrink proportionally until the estimate fits
+        while text and estimate_tokens(text) > max_tokens:
+            text = text[:int(len(text) * max_tokens / estimate_tokens(text)) or len(text) - 1]
+        return text
+
+
+def strip_overlap(previous: str, following: str, max_overlap: int) -> str:
+    """Drop the prefix of `following` that repeats the end of `previous`"""
+    limit = min(len(previous), len(following), max_overlap)
+    for size in range(limit, 0, -1):
+        if previous.endswith(following[:size]):
+            return following[size:].lstrip()
+    return following
+
+
+@dataclass
+class ContextResult:
+    """Assembled context and what it cost"""
+    context: str
+    documents: List[Document] = field(default_factory=list)
+    tokens: int = 0
+    original_tokens: int = 0
+    dropped: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.original_tokens - self.tokens)
+
+
+class ContextBuilder:
+    """Dedupe and pack retrieved chunks into a token budget"""
+
+    SEPARATOR = "\n\n"
+
+    def __init__(self, max_tokens: int, counter: TokenCounter, max_overlap: int = 0):
+        self.max_tokens = max_tokens
+        self.counter = counter
+        # Adjacent chunks share at most CHUNK_OVERLAP characters
+        self.max_overlap = max_overlap
+        self.requests = 0
+        self.total_tokens = 0
+        self.total_tokens_saved = 0
+
+    @staticmethod
+    def _chunk_key(doc) -> Optional[tuple]:
+        metadata = getattr(doc, "metadata", None) or {}
+        if "source" in metadata and isinstance(metadata.get("chunk_id"), int):
+            return metadata["source"], metadata["chunk_id"]
+        return None
+
+    def _merge_adjacent(self, docs: List[Document]) -> List[List[Document]]:
+        """Group chunks into runs of consecutive chunk_ids, placed at their best rank"""
+        runs: List[List[Document]] = []
+        run_of: Dict[tuple, int] = {}
+        seen_text = set()
+        for doc in docs:
+            key = self._chunk_key(doc)
+            if doc.page_content in seen_text or (key is not None and key in run_of):
+                continue
+            seen_text.add(doc.page_content)
+
+            if key is not None:
+                source, chunk_id = key
+                before, after = run_of.get((source, chunk_id - 1)), run_of.get((source, chunk_id + 1))
+                if before is not None:
+                    runs[before].append(doc)
+                    run_of[key] = before
+                    continue
+                if after is not None:
+                    runs[after].insert(0, doc)
+                    run_of[key] = after
+                    continue
+                run_of[key] = len(runs)
+            runs.append([doc])
+        return runs
+
+    def _run_text(self, run: List[Document]) -> str:
+        text = run[0].page_content
+        for previous, doc in zip(run, run[1:]):
+            text += self.SEPARATOR + strip_overlap(previous.page_content, doc.page_content, self.max_overlap)
+        return text
+
+    def build(self, docs: List[Document]) -> ContextResult:
+        """Pack chunks (given best-first) until the token budget is used up"""
+        original_tokens = self.counter.count(self.SEPARATOR.join(doc.page_content for doc in docs))
+        separator_tokens = self.counter.count(self.SEPARATOR)
+
+        parts, used_docs, used = [], [], 0
+        for run in self._merge_adjacent(docs):
+            text = self._run_text(run)
+            tokens = self.counter.count(text) + (separator_tokens if parts else 0)
+            if used + tokens > self.max_tokens:
+                if parts:
+                    continue  # a later, shorter chunk may still fit
+                # Always keep (a truncated) best chunk
+                text = self.counter.truncate(text, self.max_tokens)
+                tokens = self.counter.count(text)
+            parts.append(text)
+            used_docs.extend(run)
+            used += tokens
+
+        context = self.SEPARATOR.join(parts)
+        result = ContextResult(
+            context=context,
+            documents=used_docs,
+            tokens=used,
+            original_tokens=original_tokens,
+            dropped=len(docs) - len(used_docs)
+        )
+        self.requests += 1
+        self.total_tokens += result.tokens
+        self.total_tokens_saved += result.tokens_saved
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_tokens": self.max_tokens,
+            "exact_token_counts": self.counter.exact,
+            "requests": self.requests,
+            "avg_context_tokens": round(self.total_tokens / self.requests, 1) if self.requests else 0.0,
+            "tokens_saved": self.total_tokens_saved
+        }
@@ -0,0 +1,279 @@
+"""
+Embedding caches
+- QueryEmbeddingCache: recently used query vectors in memory (LRU + TTL) with an
+  optional SQLite backing store so that repeated questions skip the embeddings API;
+  new vectors are written behind in batches by a background thread
+- ChunkEmbeddingCache: persistent content-addressed chunk vectors for the ETL
+"""
+
+import os
+import json
+import time
+import array
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from pathlib import Path
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any
+
+import numpy as np
+
+
+def normalize_query(text: str) -> str:
+    """Normalize query text so trivial variations share a cache entry"""
+    # NFKC folds full-width characters used in Japanese input
+    text = unicodedata.normalize("NFKC", text)
+    return " ".join(text.lower().split())
+
+
+class QueryEmbeddingCache:
+    """LRU/TTL cache for query embeddings keyed by normalized text and model"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 86400, persist_path: Optional[str] = None,
+                 flush_interval: float = 1.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        self.flush_interval = flush_interval
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        # Rows waiting for the writer thread; SQLite commits never run on the caller's thread
+        self._pending: Dict[str, tuple] = {}
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self.hits = 0
+        self.misses = 0
+
+        if persist_path:
+            self._open_store(persist_path)
+            self._writer = threading.Thread(target=self._write_behind, name="query-embedding-writer", daemon=True)
+            self._writer.start()
+
+    def _make_key(self, text: str, model: str) -> str:
+        """Cache key from embedding model and normalized query text"""
+        raw = f"{model}\0{normalize_query(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _is_expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def _open_store(self, persist_path: str):
+        """Open the on-disk store and warm the in-memory cache from it"""
+        Path(persist_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(persist_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS query_embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, created_at REAL NOT NULL)"
+        )
+        if self.ttl_seconds > 0:
+            self._db.execute(
+                "DELETE FROM query_embeddings WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+        self._db.commit()
+
+        rows = self._db.execute(
+            "SELECT key, vector, created_at FROM query_embeddings ORDER BY created_at DESC LIMIT ?",
+            (self.max_size,)
+        ).fetchall()
+        # Oldest first so the newest entries end up most recently used
+        for key, blob, created_at in reversed(rows):
+            vector = array.array("f")
+            vector.frombytes(blob)
+            self._entries[key] = (vector.tolist(), created_at)
+
+    def get(self, text: str, model: str) -> Optional[List[float]]:
+        """Return the cached vector or None"""
+        if self.max_size <= 0:
+            return None
+        key = self._make_key(text, model)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._is_expired(entry[1]):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, text: str, model: str, vector: List[float]):
+        """Store a vector, evicting the least recently used entry when full"""
+        if self.max_size <= 0:
+            return
+        key = self._make_key(text, model)
+        created_at = time.time()
+        with self._lock:
+            self._entries[key] = (list(vector), created_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+            if self._writer is not None:
+                self._pending[key] = (array.array("f", vector).tobytes(), created_at)
+        if self._writer is not None:
+            self._wake.set()
+
+    def _write_behind(self):
+        """Writer thread: batch pending rows into one transaction per flush interval"""
+        while not self._stop.is_set():
+            self._wake.wait()
+            # Let a burst of misses accumulate into a single commit (close() cuts the wait short)
+            self._stop.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"⚠️ Query embedding cache write error: {e}")
+
+    def flush(self):
+        """Write pending rows to disk now"""
+        with self._db_lock:
+            with self._lock:
+                rows = [(key, blob, created_at) for key, (blob, created_at) in self._pending.items()]
+                self._pending.clear()
+            if rows and self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO query_embeddings (key, vector, created_at) VALUES (?, ?, ?)",
+                    rows
+                )
+                self._db.commit()
+
+    def clear(self):
+        """Drop all entries (memory and disk)"""
+        with self._db_lock:
+            with self._lock:
+                self._entries.clear()
+                self._pending.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM query_embeddings")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for metrics"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def close(self):
+        """Stop the writer thread, flush what is pending and close the store"""
+        if self._writer is not None:
+            self._stop.set()
+            self._wake.set()
+            self._writer.join()
+            self._writer = None
+        if self._db is not None:
+            self.flush()
+            with self._db_lock:
+                self._db.close()
+                self._db = None
+
+
+class ChunkEmbeddingCache:
+    """Persistent content-addressed cache of chunk embeddings for the ETL
+
+    Vectors are appended to a raw float32 file read back through a NumPy
+    memmap; ``index.json`` maps sha256(model, chunk text) to a row number.
+    """
+
+    INDEX_FILE = "index.json"
+    VECTORS_FILE = "vectors.f32"
+
+    def __init__(self, cache_path: str, model: str):
+        self.model = model
+        # One directory per model so every row in a file has the same dimension
+        self.cache_dir = Path(cache_path) / model.replace("/", "_")
+        self.index_path = self.cache_dir / self.INDEX_FILE
+        self.vectors_path = self.cache_dir / self.VECTORS_FILE
+        self.dim = None
+        self.rows: Dict[str, int] = {}
+        self._matrix = None
+        self.hits = 0
+        self.misses = 0
+        self._load_index()
+
+    def _load_index(self):
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.dim = data["dim"]
+            self.rows = data["rows"]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️  Chunk embedding cache unreadable, starting empty: {e}")
+            self.dim, self.rows = None, {}
+
+    def _save_index(self):
+        """Write the index atomically (vectors are always written first)"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"model": self.model, "dim": self.dim, "rows": self.rows}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _vectors(self):
+        if self._matrix is None:
+            # Whole rows only: a torn append can leave a partial row at the end
+            row_count = self.vectors_path.stat().st_size // (4 * self.dim)
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(row_count, self.dim))
+        return self._matrix
+
+    def make_key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Cached vector for each text, or None where missing"""
+        results = []
+        for text in texts:
+            row = self.rows.get(self.make_key(text))
+            if row is None:
+                self.misses += 1
+                results.append(None)
+            else:
+                self.hits += 1
+                results.append(self._vectors()[row].tolist())
+        return results
+
+    def put_many(self, texts: List[str], vectors: List[List[float]]):
+        """Append new vectors and record their rows"""
+        new_items = {}
+        for text, vector in zip(texts, vectors):
+            key = self.make_key(text)
+            if key not in self.rows and key not in new_items:
+                new_items[key] = vector
+        if not new_items:
+            return
+
+        matrix = np.asarray(list(new_items.values()), dtype=np.float32)
+        if self.dim is None:
+            self.dim = matrix.shape[1]
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        # Append after the rows the saved index knows about; anything past them is left over
+        # from a crashed run (possibly a partial row) and is cut off first, so a crash here is harmless
+        offset = max(self.rows.values(), default=-1) + 1
+        self._matrix = None
+        with open(self.vectors_path, 'ab') as f:
+            if f.tell() > offset * 4 * self.dim:
+                f.truncate(offset * 4 * self.dim)
+                f.seek(0, os.SEEK_END)
+            f.write(matrix.tobytes())
+        for i, key in enumerate(new_items):
+            self.rows[key] = offset + i
+        self._matrix = None
+        self._save_index()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"size": len(self.rows), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,120 @@
+"""
+FAISS index construction
+Builds flat, IVF, HNSW or PQ-compressed indexes (L2, like FAISS.from_documents)
+and applies the query-time parameters (nprobe, efSearch) on load
+"""
+
+import math
+from typing import Optional
+
+import faiss
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf", "hnsw", "pq", "ivfpq")
+
+
+def auto_nlist(n_vectors: int) -> int:
+    """Rule-of-thumb list count: ~4*sqrt(n), with >=39 training points per list"""
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+
+def pq_subquantizers(dim: int, requested: int) -> int:
+    """Largest sub-quantizer count <= requested that divides the dimension"""
+    for m in range(min(requested, dim), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def index_factory_string(index_type: str, dim: int, n_vectors: int, nlist: int = 0,
+                         hnsw_m: int = 32, pq_m: int = 16, pq_nbits: int = 8) -> str:
+    """faiss.index_factory description for an index type"""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown FAISS index type: {index_type} (choose from {', '.join(INDEX_TYPES)})")
+    nlist = nlist or auto_nlist(n_vectors)
+    pq = f"PQ{pq_subquantizers(dim, pq_m)}x{pq_nbits}"
+    return {
+        "flat": "Flat",
+        "ivf": f"IVF{nlist},Flat",
+        "hnsw": f"HNSW{hnsw_m}",
+        "pq": pq,
+        "ivfpq": f"IVF{nlist},{pq}",
+    }[index_type]
+
+
+def min_training_vectors(index_type: str, nlist: int, pq_nbits: int) -> int:
+    """Fewest vectors the index can be trained on"""
+    required = 0
+    if index_type in ("ivf", "ivfpq"):
+        required = max(required, nlist)
+    if index_type in ("pq", "ivfpq"):
+        required = max(required, 2 ** pq_nbits)
+    return required
+
+
+def build_index(vectors: np.ndarray, index_type: str = "flat", nlist: int = 0,
+                hnsw_m: int = 32, ef_construction: int = 200,
+                pq_m: int = 16, pq_nbits: int = 8) -> faiss.Index:
+    """Create and train an empty index for the given vectors (vectors are not added)"""
+    n_vectors, dim = vectors.shape
+    nlist = nlist or auto_nlist(n_vectors)
+    required = min_training_vectors(index_type, nlist, pq_nbits)
+    if n_vectors < required:
+        print(f"⚠️  {index_type} index needs at least {required} vectors to train "
+              f"(have {n_vectors}); using a flat index")
+        index_type = "flat"
+
+    spec = index_factory_string(index_type, dim, n_vectors, nlist, hnsw_m, pq_m, pq_nbits)
+    index = faiss.index_factory(dim, spec, faiss.METRIC_L2)
+    if index_type == "hnsw":
+        index.hnsw.efConstruction = ef_construction
+    if not index.is_trained:
+        index.train(np.ascontiguousarray(vectors, dtype=np.float32))
+    print(f"🧭 FAISS index: {spec} ({n_vectors} vectors, dim {dim})")
+    return index
+
+
+def is_ivf(index: faiss.Index) -> bool:
+    try:
+        faiss.extract_index_ivf(index)
+        return True
+    except RuntimeError:
+        return False
+
+
+def apply_search_params(index: faiss.Index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """Set query-time recall/latency knobs on a loaded index (and let IVF indexes reconstruct vectors)"""
+    if not isinstance(index, faiss.Index):
+        return
+    if is_ivf(index):
+        ivf = faiss.extract_index_ivf(index)
+        if nprobe:
+            ivf.nprobe = nprobe
+        # reconstruct() (used by MMR) needs the id -> list map on IVF indexes
+        ivf.make_direct_map()
+    if ef_search and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
+
+
+def supports_removal(index: faiss.Index) -> bool:
+    """HNSW graphs cannot delete vectors; everything else here can (see remove_positions)"""
+    return not hasattr(index, "hnsw")
+
+
+def remove_positions(index: faiss.Index, positions) -> None:
+    """Remove vectors so the survivors are renumbered 0..n-1 in their old order,
+    which is what LangChain's FAISS wrapper assumes after a delete"""
+    drop = np.asarray(sorted(positions), dtype=np.int64)
+    if not is_ivf(index):
+        # Flat and PQ codes are compacted in order by remove_ids
+        index.remove_ids(drop)
+        return
+
+    # IVF remove_ids keeps the old labels, so rebuild from the remaining vectors instead
+    # (the coarse quantizer stays trained; IVFPQ codes are re-encoded from their decoded vectors)
+    keep = np.setdiff1d(np.arange(index.ntotal, dtype=np.int64), drop)
+    faiss.extract_index_ivf(index).make_direct_map()
+    vectors = index.reconstruct_batch(keep) if len(keep) else None
+    index.reset()
+    if vectors is not None:
+        index.add(np.ascontiguousarray(vectors, dtype=np.float32))
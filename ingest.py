@@ -6,15 +6,132 @@ Including incremental update functionality
 
 import os
 import json
+import time
+import uuid
+import random
+import shutil
 import hashlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from config import Config
+from embedding_cache import ChunkEmbeddingCache
+from chunk_store import write_chunk_store
+from lexical_index import write_lexical_index
+from faiss_index import build_index, apply_search_params, supports_removal, remove_positions
 from langchain.text_splitter import MarkdownTextSplitter
 from langchain_openai import OpenAIEmbeddings
 from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain.schema import Document
+from langchain_core.embeddings import Embeddings
+from openai import RateLimitError, APITimeoutError, APIConnectionError
+
+# 変更検知用のファイルハッシュ（ストリーミングで計算）
+FILE_HASH_ALGORITHM = "blake2b"
+FILE_HASH_BLOCK_SIZE = 1024 * 1024
+
+# ベクトルストアの版数を記録するファイル（サーバー側のキャッシュ無効化に使用）
+STORE_VERSION_FILE = "store_version.json"
+
+
+def write_store_version(vector_store_path: str) -> str:
+    """Record a new version for the vector store and return it"""
+    version = uuid.uuid4().hex
+    version_file = Path(vector_store_path) / STORE_VERSION_FILE
+    with open(version_file, 'w', encoding='utf-8') as f:
+        json.dump({"version": version, "updated_at": datetime.now().isoformat()}, f)
+    return version
+
+
+def read_store_version(vector_store_path: str) -> str:
+    """Read the vector store version ("unversioned" for stores built before versioning)"""
+    version_file = os.path.join(vector_store_path, STORE_VERSION_FILE)
+    try:
+        with open(version_file, 'r', encoding='utf-8') as f:
+            return json.load(f)["version"]
+    except (OSError, ValueError, KeyError):
+        return "unversioned"
+
+
+class ParallelBatchEmbeddings(Embeddings):
+    """Embeddings wrapper that embeds documents in batches with bounded concurrency"""
+    
+    RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError)
+    
+    def __init__(self, embeddings: Embeddings, batch_size: int = 100, max_concurrency: int = 4,
+                 max_retries: int = 5, backoff_base: float = 1.0,
+                 cache: Optional[ChunkEmbeddingCache] = None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.reset_stats()
+    
+    def reset_stats(self):
+        """Reset throughput counters"""
+        self.stats = {"chunks": 0, "cached": 0, "batches": 0, "retries": 0, "seconds": 0.0}
+    
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """Embed one batch, backing off exponentially on rate limits"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.embeddings.embed_documents(batch)
+            except self.RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff_base * (2 ** attempt) + random.uniform(0, self.backoff_base)
+                print(f"  ⏳ Embedding retry {attempt + 1}/{self.max_retries} in {delay:.1f}s: {e}")
+                self.stats["retries"] += 1
+                time.sleep(delay)
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts in concurrent batches, preserving input order"""
+        if not texts:
+            return []
+        
+        started = time.perf_counter()
+        
+        # Only texts missing from the chunk cache go to the API (each distinct text once)
+        vectors = self.cache.get_many(texts) if self.cache is not None else [None] * len(texts)
+        missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        self.stats["cached"] += len(texts) - sum(1 for vector in vectors if vector is None)
+        
+        if missing:
+            batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+            
+            if len(batches) == 1 or self.max_concurrency == 1:
+                results = [self._embed_batch(batch) for batch in batches]
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(batches))) as executor:
+                    results = list(executor.map(self._embed_batch, batches))
+            
+            embedded = [vector for batch_vectors in results for vector in batch_vectors]
+            if self.cache is not None:
+                self.cache.put_many(missing, embedded)
+            
+            by_text = dict(zip(missing, embedded))
+            vectors = [vector if vector is not None else by_text[text] for text, vector in zip(texts, vectors)]
+            self.stats["chunks"] += len(missing)
+            self.stats["batches"] += len(batches)
+        
+        self.stats["seconds"] += time.perf_counter() - started
+        return vectors
+    
+    def embed_query(self, text: str) -> List[float]:
+        return self.embeddings.embed_query(text)
+    
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.embeddings.aembed_query(text)
+    
+    def throughput(self) -> float:
+        """Embedded chunks per second"""
+        return self.stats["chunks"] / self.stats["seconds"] if self.stats["seconds"] else 0.0
+
 
 class KnowledgeIngester:
     """Class for ingesting knowledge files and creating vector store"""
@@ -27,7 +144,17 @@ class KnowledgeIngester:
             chunk_size=Config.CHUNK_SIZE,
             chunk_overlap=Config.CHUNK_OVERLAP
         )
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        chunk_cache = None
+        if Config.CHUNK_EMBEDDING_CACHE_PATH:
+            chunk_cache = ChunkEmbeddingCache(Config.CHUNK_EMBEDDING_CACHE_PATH, Config.EMBEDDING_MODEL)
+        self.embeddings = ParallelBatchEmbeddings(
+            OpenAIEmbeddings(model=Config.EMBEDDING_MODEL),
+            batch_size=Config.EMBEDDING_BATCH_SIZE,
+            max_concurrency=Config.EMBEDDING_CONCURRENCY,
+            max_retries=Config.EMBEDDING_MAX_RETRIES,
+            cache=chunk_cache
+        )
+        self.index_type = Config.FAISS_INDEX_TYPE
     
     def load_markdown_files(self) -> List[str]:
         """Markdown file loading - implementation to pass tests"""
@@ -45,6 +172,11 @@ class KnowledgeIngester:
         chunks = self.text_splitter.split_text(text)
         return chunks
     
+    def _generate_document_id(self, file_path: str, chunk_id: int) -> str:
+        """Generate unique document ID"""
+        file_name = Path(file_path).name
+        return f"{file_name}::{chunk_id}"
+    
     def create_documents_from_chunks(self, chunks: List[str], source_file: str) -> List[Dict[str, Any]]:
         """Document creation from chunks - implementation to pass tests"""
         documents = []
@@ -54,7 +186,8 @@ class KnowledgeIngester:
                 "metadata": {
                     "source": source_file,
                     "chunk_id": i,
-                    "total_chunks": len(chunks)
+                    "total_chunks": len(chunks),
+                    "document_id": self._generate_document_id(source_file, i)
                 }
             }
             documents.append(doc)
@@ -73,22 +206,78 @@ class KnowledgeIngester:
             )
             langchain_docs.append(langchain_doc)
         
-        # Create FAISS vector store
-        vector_store = FAISS.from_documents(
-            langchain_docs,
-            self.embeddings
-        )
+        # Deterministic docstore IDs let IncrementalIngester replace/remove chunks later
+        ids = [doc.metadata.get("document_id") for doc in langchain_docs]
+        if not all(ids):
+            ids = None
+        
+        return self._build_vector_store(langchain_docs, ids)
+    
+    def _build_vector_store(self, langchain_docs: List[Document], ids: Optional[List[str]] = None) -> FAISS:
+        """Embed documents into a new store using the configured FAISS index type"""
+        if self.index_type == "flat":
+            # Create FAISS vector store (embedded in concurrent batches)
+            return FAISS.from_documents(langchain_docs, self.embeddings, ids=ids)
         
+        # ANN indexes must be trained on the vectors before they are added
+        texts = [doc.page_content for doc in langchain_docs]
+        vectors = self.embeddings.embed_documents(texts)
+        index = build_index(
+            np.asarray(vectors, dtype=np.float32),
+            index_type=self.index_type,
+            nlist=Config.FAISS_IVF_NLIST,
+            hnsw_m=Config.FAISS_HNSW_M,
+            ef_construction=Config.FAISS_HNSW_EF_CONSTRUCTION,
+            pq_m=Config.FAISS_PQ_M,
+            pq_nbits=Config.FAISS_PQ_NBITS
+        )
+        apply_search_params(index, Config.FAISS_IVF_NPROBE, Config.FAISS_HNSW_EF_SEARCH)
+        vector_store = FAISS(self.embeddings, index, InMemoryDocstore(), {})
+        vector_store.add_embeddings(
+            list(zip(texts, vectors)),
+            metadatas=[doc.metadata for doc in langchain_docs],
+            ids=ids
+        )
         return vector_store
     
-    def save_vector_store(self, vector_store):
+    def report_embedding_throughput(self):
+        """Print embedding throughput for the last run"""
+        stats = self.embeddings.stats
+        if stats["cached"]:
+            print(f"♻️  Reused {stats['cached']} cached chunk embeddings")
+        if stats["chunks"]:
+            print(
+                f"⚡ Embedded {stats['chunks']} chunks in {stats['seconds']:.2f}s "
+                f"({self.embeddings.throughput():.1f} chunks/sec, "
+                f"{stats['batches']} batches, {stats['retries']} retries)"
+            )
+    
+    def save_vector_store(self, vector_store, save_path: Optional[str] = None):
         """Vector store saving - implementation to pass tests"""
         # Create save directory
-        save_path = Path(self.vector_store_path)
+        save_path = Path(save_path or self.vector_store_path)
         save_path.mkdir(exist_ok=True)
         
-        # Save FAISS index
-        vector_store.save_local(str(save_path))
+        # Write into a staging dir and move each file into place: a running server may have
+        # index.faiss / chunks.bin mmapped, and truncating a mapped file crashes it (SIGBUS)
+        staging = save_path / f".staging-{uuid.uuid4().hex[:8]}"
+        staging.mkdir()
+        try:
+            # Save FAISS index
+            vector_store.save_local(str(staging))
+            # Chunk text for the server, readable by vector position without unpickling
+            write_chunk_store(str(staging), vector_store)
+            # BM25 index over the same positions for hybrid retrieval
+            write_lexical_index(str(staging), vector_store)
+            # Bump the version so running servers drop stale cached answers
+            write_store_version(str(staging))
+            
+            # The version file goes last: servers reload when it changes
+            files = sorted(staging.iterdir(), key=lambda path: path.name == STORE_VERSION_FILE)
+            for path in files:
+                os.replace(path, save_path / path.name)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
         
         return str(save_path)
     
@@ -136,8 +325,10 @@ class KnowledgeIngester:
         # 3. Vector store creation
         print("🔄 Creating vector store...")
         try:
+            self.embeddings.reset_stats()
             vector_store = self.create_vector_store(all_documents)
             print("✅ Vector store creation completed.")
+            self.report_embedding_throughput()
             
             # 4. Vector store saving
             print("💾 Saving vector store...")
@@ -158,20 +349,24 @@ class IncrementalIngester(KnowledgeIngester):
         super().__init__()
         self.metadata_file = Path(self.vector_store_path) / "file_metadata.json"
     
-    def _calculate_file_hash(self, file_path: str) -> str:
-        """Calculate file hash value"""
+    def _calculate_file_hash(self, file_path: str, algorithm: str = FILE_HASH_ALGORITHM) -> str:
+        """Calculate file hash value (streamed so large files are not read into memory)"""
+        file_hash = hashlib.new(algorithm)
         with open(file_path, 'rb') as f:
-            file_hash = hashlib.md5(f.read()).hexdigest()
-        return file_hash
+            for block in iter(lambda: f.read(FILE_HASH_BLOCK_SIZE), b''):
+                file_hash.update(block)
+        return file_hash.hexdigest()
     
-    def _get_file_metadata(self, file_path: str) -> Dict[str, Any]:
-        """Get file metadata"""
-        file_stat = os.stat(file_path)
+    def _get_file_metadata(self, file_path: str, file_hash: Optional[str] = None,
+                           file_stat: Optional[os.stat_result] = None) -> Dict[str, Any]:
+        """Get file metadata (pass the stat taken with file_hash so both describe the same bytes)"""
+        file_stat = file_stat or os.stat(file_path)
         return {
             "path": file_path,
             "size": file_stat.st_size,
             "mtime": file_stat.st_mtime,
-            "hash": self._calculate_file_hash(file_path),
+            "hash": file_hash or self._calculate_file_hash(file_path),
+            "hash_algorithm": FILE_HASH_ALGORITHM,
             "last_processed": datetime.now().isoformat()
         }
     
@@ -182,27 +377,114 @@ class IncrementalIngester(KnowledgeIngester):
                 return json.load(f)
         return {}
     
-    def _save_metadata(self, metadata: Dict[str, Dict[str, Any]]):
+    def _save_metadata(self, metadata: Dict[str, Dict[str, Any]], metadata_file: Optional[Path] = None):
         """Save file metadata"""
-        self.metadata_file.parent.mkdir(exist_ok=True)
-        with open(self.metadata_file, 'w', encoding='utf-8') as f:
+        metadata_file = metadata_file or self.metadata_file
+        metadata_file.parent.mkdir(exist_ok=True)
+        with open(metadata_file, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, ensure_ascii=False, indent=2)
     
-    def _file_has_changed(self, file_path: str, stored_metadata: Dict[str, Any]) -> bool:
-        """Check if file has changed"""
+    def _check_file(self, file_path: str, stored_metadata: Dict[str, Any]) -> str:
+        """Classify a file as new / changed / touched (same content, new mtime) / unchanged"""
         if file_path not in stored_metadata:
-            return True
+            return "new"
         
-        current_meta = self._get_file_metadata(file_path)
         stored_meta = stored_metadata[file_path]
+        file_stat = os.stat(file_path)
+        
+        # Fast path: same size and mtime means unchanged without reading the file
+        if file_stat.st_size == stored_meta.get("size") and file_stat.st_mtime == stored_meta.get("mtime"):
+            return "unchanged"
+        if file_stat.st_size != stored_meta.get("size"):
+            return "changed"
         
-        # Detect changes with hash value
-        return current_meta["hash"] != stored_meta.get("hash", "")
+        # Same size but a different mtime: only now hash the contents
+        algorithm = stored_meta.get("hash_algorithm", "md5")  # metadata written before blake2b used md5
+        if self._calculate_file_hash(file_path, algorithm) != stored_meta.get("hash", ""):
+            return "changed"
+        return "touched"
     
-    def _generate_document_id(self, file_path: str, chunk_id: int) -> str:
-        """Generate unique document ID"""
-        file_name = Path(file_path).name
-        return f"{file_name}::{chunk_id}"
+    def _file_has_changed(self, file_path: str, stored_metadata: Dict[str, Any]) -> bool:
+        """Check if file has changed"""
+        return self._check_file(file_path, stored_metadata) in ("new", "changed")
+    
+    def _find_file_chunk_ids(self, vector_store: FAISS, file_path: str,
+                             stored_meta: Optional[Dict[str, Any]] = None) -> List[str]:
+        """Docstore IDs of the chunks currently indexed for a file"""
+        live_ids = set(vector_store.index_to_docstore_id.values())
+        chunk_ids = (stored_meta or {}).get("chunk_ids")
+        if chunk_ids is not None:
+            return [doc_id for doc_id in chunk_ids if doc_id in live_ids]
+        
+        # Stores built before the chunk ID registry: scan the docstore
+        return [
+            doc_id for doc_id in vector_store.index_to_docstore_id.values()
+            if getattr(vector_store.docstore.search(doc_id), "metadata", {}).get("source") == file_path
+        ]
+    
+    def _delete_chunks(self, vector_store: FAISS, doc_ids: List[str]):
+        """Delete chunks, refusing up front on indexes that cannot remove vectors"""
+        if not supports_removal(vector_store.index):
+            raise ValueError(
+                "HNSW indexes cannot delete vectors; rebuild with `python run_etl.py --full`"
+            )
+        # Same bookkeeping as FAISS.delete, but with labels that stay contiguous on IVF indexes
+        reversed_index = {doc_id: position for position, doc_id in vector_store.index_to_docstore_id.items()}
+        missing = [doc_id for doc_id in doc_ids if doc_id not in reversed_index]
+        if missing:
+            raise ValueError(f"Chunks not found in the vector store: {missing}")
+        positions = {reversed_index[doc_id] for doc_id in doc_ids}
+        remove_positions(vector_store.index, positions)
+        vector_store.docstore.delete(doc_ids)
+        remaining = [
+            doc_id for position, doc_id in sorted(vector_store.index_to_docstore_id.items())
+            if position not in positions
+        ]
+        vector_store.index_to_docstore_id = dict(enumerate(remaining))
+    
+    def compact(self) -> Dict[str, int]:
+        """Drop vectors of deleted files and duplicate chunks, then rebuild the registry"""
+        print("🧹 Compacting vector store...")
+        vector_store = self._load_existing_vector_store()
+        if vector_store is None:
+            print("  ⚠️  Vector store does not exist")
+            return {"removed": 0, "remaining": 0}
+        
+        metadata = self._load_metadata()
+        current_files = set(self.load_markdown_files())
+        registered = {doc_id for meta in metadata.values() for doc_id in meta.get("chunk_ids", [])}
+        
+        # Group live chunks by (source, chunk_id)
+        groups: Dict[tuple, List[str]] = {}
+        for _, doc_id in sorted(vector_store.index_to_docstore_id.items()):
+            doc = vector_store.docstore.search(doc_id)
+            meta = getattr(doc, "metadata", {})
+            groups.setdefault((meta.get("source"), meta.get("chunk_id")), []).append(doc_id)
+        
+        stale_ids: List[str] = []
+        surviving: Dict[str, List[str]] = {}
+        for (source, _), doc_ids in groups.items():
+            if source not in current_files:
+                stale_ids.extend(doc_ids)
+                continue
+            # Keep the registered copy, otherwise the most recently added one
+            keep = next((doc_id for doc_id in doc_ids if doc_id in registered), doc_ids[-1])
+            stale_ids.extend(doc_id for doc_id in doc_ids if doc_id != keep)
+            surviving.setdefault(source, []).append(keep)
+        
+        if stale_ids:
+            self._delete_chunks(vector_store, stale_ids)
+        
+        # Registry now mirrors the store exactly
+        metadata = {path: meta for path, meta in metadata.items() if path in current_files}
+        for source, doc_ids in surviving.items():
+            if source in metadata:
+                metadata[source]["chunk_ids"] = doc_ids
+        self._commit(vector_store, metadata)
+        
+        stats = {"removed": len(stale_ids), "remaining": vector_store.index.ntotal}
+        print(f"  ✅ Removed {stats['removed']} vectors, {stats['remaining']} remaining")
+        return stats
     
     def _load_existing_vector_store(self) -> Optional[FAISS]:
         """Load existing vector store"""
@@ -219,54 +501,113 @@ class IncrementalIngester(KnowledgeIngester):
                 return None
         return None
     
+    def _build_file_documents(self, file_path: str):
+        """Read and split a file into Documents with deterministic IDs; also returns the content hash
+        and the stat of the bytes that were read"""
+        # Load file contents once and hash the same bytes
+        with open(file_path, 'rb') as f:
+            # Stat before reading: an edit during the read then shows up as a newer mtime next run
+            file_stat = os.fstat(f.fileno())
+            raw = f.read()
+        file_hash = hashlib.new(FILE_HASH_ALGORITHM, raw).hexdigest()
+        content = raw.decode('utf-8')
+        
+        # Text splitting
+        chunks = self.split_text_into_chunks(content)
+        print(f"  📝 Split into {len(chunks)} chunks")
+        
+        # Document creation
+        documents = []
+        for i, chunk in enumerate(chunks):
+            doc = Document(
+                page_content=chunk,
+                metadata={
+                    "source": file_path,
+                    "chunk_id": i,
+                    "total_chunks": len(chunks),
+                    "document_id": self._generate_document_id(file_path, i)
+                }
+            )
+            documents.append(doc)
+        return documents, file_hash, file_stat
+    
+    def _apply_file(self, vector_store: Optional[FAISS], metadata: Dict[str, Dict[str, Any]],
+                    file_path: str) -> FAISS:
+        """Add or replace a file's chunks in memory; returns the (possibly new) store"""
+        documents, file_hash, file_stat = self._build_file_documents(file_path)
+        ids = [doc.metadata["document_id"] for doc in documents]
+        
+        if vector_store is None:
+            # Create new vector store if it doesn't exist
+            print("  🆕 Creating new vector store")
+            vector_store = self._build_vector_store(documents, ids)
+        else:
+            # Embed first: if this fails the file's previous chunks are still in the store
+            texts = [doc.page_content for doc in documents]
+            vectors = self.embeddings.embed_documents(texts)
+            
+            # Replace the file's previous chunks instead of appending duplicates
+            stale_ids = self._find_file_chunk_ids(vector_store, file_path, metadata.get(file_path))
+            if stale_ids:
+                self._delete_chunks(vector_store, stale_ids)
+                print(f"  ♻️  Removed {len(stale_ids)} stale chunks")
+            print("  ➕ Add to existing vector store")
+            vector_store.add_embeddings(
+                list(zip(texts, vectors)),
+                metadatas=[doc.metadata for doc in documents],
+                ids=ids
+            )
+        
+        # Update metadata (including the chunk ID registry)
+        metadata[file_path] = self._get_file_metadata(file_path, file_hash, file_stat)
+        metadata[file_path]["chunk_ids"] = ids
+        print(f"  ✅ {len(documents)} documents")
+        return vector_store
+    
+    def _remove_file(self, vector_store: Optional[FAISS], metadata: Dict[str, Dict[str, Any]], file_path: str):
+        """Remove a file's chunks and metadata in memory"""
+        if vector_store is not None:
+            stale_ids = self._find_file_chunk_ids(vector_store, file_path, metadata.get(file_path))
+            if stale_ids:
+                self._delete_chunks(vector_store, stale_ids)
+                print(f"  ✅ Removed {len(stale_ids)} chunks from vector store")
+        metadata.pop(file_path, None)
+    
+    def _commit(self, vector_store: FAISS, metadata: Dict[str, Dict[str, Any]]):
+        """Write the store and metadata to a temp dir, then swap it into place"""
+        target = Path(self.vector_store_path)
+        suffix = uuid.uuid4().hex[:8]
+        tmp_dir = target.parent / f".{target.name}.tmp-{suffix}"
+        old_dir = target.parent / f".{target.name}.old-{suffix}"
+        
+        try:
+            self.save_vector_store(vector_store, str(tmp_dir))
+            self._save_metadata(metadata, tmp_dir / self.metadata_file.name)
+            
+            if target.exists():
+                os.rename(target, old_dir)
+            os.rename(tmp_dir, target)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if old_dir.exists() and not target.exists():
+                os.rename(old_dir, target)
+            raise
+        shutil.rmtree(old_dir, ignore_errors=True)
+    
     def add_knowledge_file(self, file_path: str) -> bool:
         """Add single file to existing vector store"""
         print(f"📄 Adding file: {Path(file_path).name}")
         
         try:
-            # Load file contents
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Text splitting
-            chunks = self.split_text_into_chunks(content)
-            print(f"  📝 Split into {len(chunks)} chunks")
-            
-            # Document creation
-            documents = []
-            for i, chunk in enumerate(chunks):
-                doc = Document(
-                    page_content=chunk,
-                    metadata={
-                        "source": file_path,
-                        "chunk_id": i,
-                        "total_chunks": len(chunks),
-                        "document_id": self._generate_document_id(file_path, i)
-                    }
-                )
-                documents.append(doc)
-            
-            # Load existing vector store
             vector_store = self._load_existing_vector_store()
-            
-            if vector_store is None:
-                # Create new vector store if it doesn't exist
-                print("  🆕 Creating new vector store")
-                vector_store = FAISS.from_documents(documents, self.embeddings)
-            else:
-                # Add to existing vector store
-                print("  ➕ Add to existing vector store")
-                vector_store.add_documents(documents)
-            
-            # Save vector store
-            self.save_vector_store(vector_store)
-            
-            # Update metadata
             metadata = self._load_metadata()
-            metadata[file_path] = self._get_file_metadata(file_path)
-            self._save_metadata(metadata)
+            self.embeddings.reset_stats()
             
-            print(f"  ✅ File addition completed: {len(documents)} documents")
+            vector_store = self._apply_file(vector_store, metadata, file_path)
+            self.report_embedding_throughput()
+            
+            self._commit(vector_store, metadata)
+            print(f"  ✅ File addition completed: {Path(file_path).name}")
             return True
             
         except Exception as e:
@@ -284,17 +625,10 @@ class IncrementalIngester(KnowledgeIngester):
                 print("  ⚠️  Vector store does not exist")
                 return False
             
-            # Identify document IDs for deletion
-            # Note: FAISS has limited direct deletion functionality,
-            # rebuilding the entire store is more reliable in practice
-            print("  ⚠️  Due to FAISS limitations, full rebuild is recommended for file deletion")
-            
-            # Remove from metadata
             metadata = self._load_metadata()
-            if file_path in metadata:
-                del metadata[file_path]
-                self._save_metadata(metadata)
-                print("  ✅ Remove from metadata完了")
+            self._remove_file(vector_store, metadata, file_path)
+            self._commit(vector_store, metadata)
+            print("  ✅ Remove from metadata完了")
             
             return True
             
@@ -303,15 +637,13 @@ class IncrementalIngester(KnowledgeIngester):
             return False
     
     def update_knowledge_file(self, file_path: str) -> bool:
-        """Update single file (delete→add)"""
+        """Update single file (old chunks are replaced in a single load/save)"""
         print(f"🔄 ファイルUpdate: {Path(file_path).name}")
         
-        # First delete, then add
-        self.remove_knowledge_file(file_path)
         return self.add_knowledge_file(file_path)
     
-    def incremental_update(self) -> Dict[str, int]:
-        """Update only changed files"""
+    def incremental_update(self) -> Dict[str, Any]:
+        """Update only changed files with a single load and a single atomic save"""
         print("🔄 インクリメンタルUpdate開始...")
         
         # Get current file list
@@ -322,39 +654,74 @@ class IncrementalIngester(KnowledgeIngester):
             "added": 0,
             "updated": 0,
             "removed": 0,
-            "unchanged": 0
+            "unchanged": 0,
+            "io_seconds": 0.0,
+            "embedding_seconds": 0.0
         }
         
-        # Process new and updated files
+        current_file_set = set(current_files)
+        changed_files = []
+        touched_files = []
         for file_path in current_files:
-            if self._file_has_changed(file_path, stored_metadata):
-                if file_path in stored_metadata:
-                    # Update
-                    if self.update_knowledge_file(file_path):
-                        stats["updated"] += 1
-                else:
-                    # New addition
-                    if self.add_knowledge_file(file_path):
-                        stats["added"] += 1
+            state = self._check_file(file_path, stored_metadata)
+            if state in ("new", "changed"):
+                changed_files.append(file_path)
             else:
                 stats["unchanged"] += 1
+                if state == "touched":
+                    touched_files.append(file_path)
+        removed_files = [path for path in stored_metadata if path not in current_file_set]
         
-        # Process deleted files
-        current_file_set = set(current_files)
-        for stored_file in stored_metadata.keys():
-            if stored_file not in current_file_set:
-                if self.remove_knowledge_file(stored_file):
-                    stats["removed"] += 1
+        # Same content with a new mtime: record it so the next run takes the fast path
+        for file_path in touched_files:
+            stored_metadata[file_path]["mtime"] = os.stat(file_path).st_mtime
+        if touched_files and not (changed_files or removed_files):
+            self._save_metadata(stored_metadata)
+        
+        if changed_files or removed_files:
+            # Load once
+            io_started = time.perf_counter()
+            vector_store = self._load_existing_vector_store()
+            metadata = dict(stored_metadata)
+            stats["io_seconds"] += time.perf_counter() - io_started
+            self.embeddings.reset_stats()
+            
+            # Process new and updated files in memory
+            for file_path in changed_files:
+                is_update = file_path in stored_metadata
+                print(f"{'🔄 ファイルUpdate' if is_update else '📄 Adding file'}: {Path(file_path).name}")
+                try:
+                    vector_store = self._apply_file(vector_store, metadata, file_path)
+                    stats["updated" if is_update else "added"] += 1
+                except Exception as e:
+                    print(f"  ❌ File processing error: {e}")
+            
+            # Process deleted files
+            for stored_file in removed_files:
+                print(f"🗑️  Deleting file: {Path(stored_file).name}")
+                self._remove_file(vector_store, metadata, stored_file)
+                stats["removed"] += 1
+            
+            stats["embedding_seconds"] = self.embeddings.stats["seconds"]
+            self.report_embedding_throughput()
+            
+            # Commit once
+            io_started = time.perf_counter()
+            if vector_store is not None:
+                self._commit(vector_store, metadata)
+            else:
+                self._save_metadata(metadata)
+            stats["io_seconds"] += time.perf_counter() - io_started
         
         print(f"📊 インクリメンタルUpdate完了:")
         print(f"  ➕ Added: {stats['added']} files")
         print(f"  🔄 Update: {stats['updated']}ファイル")  
         print(f"  🗑️  Deleted: {stats['removed']} files")
         print(f"  ✅ Unchanged: {stats['unchanged']} files")
+        print(f"  ⏱️  I/O: {stats['io_seconds']:.2f}s / Embedding: {stats['embedding_seconds']:.2f}s")
         
         return stats
 
-
 if __name__ == "__main__":
     # Test when run directly
     ingester = KnowledgeIngester()
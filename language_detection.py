@@ -0,0 +1,83 @@
+"""
+Query language detection
+Most questions are settled by their script alone: kana means Japanese and
+plain ASCII can only ever be English for this server. Everything else goes to
+langdetect, seeded so the same text always gets the same answer.
+Results are memoized per text (LRU).
+"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional
+
+from langdetect import DetectorFactory, detect
+
+# langdetect is randomized unless seeded
+DetectorFactory.seed = 0
+
+# Only Japanese gets its own prompt; every other language is answered in English
+LANGUAGES = {"ja": "japanese", "en": "english"}
+DEFAULT_LANGUAGE = "english"
+
+_KANA = re.compile(r"[\u3040-\u30ff\uff66-\uff9f]")
+_JAPANESE = re.compile(r"[\u3040-\u30ff\uff66-\uff9f\u3400-\u4dbf\u4e00-\u9fff]")
+_LATIN = re.compile(r"[A-Za-z]")
+
+
+def detect_by_script(text: str) -> Optional[str]:
+    """Cheap answer from character ranges, or None when the detector is needed"""
+    if text.isascii():
+        return DEFAULT_LANGUAGE
+    if _KANA.search(text):
+        # An English sentence quoting a Japanese term still goes to the detector
+        if len(_JAPANESE.findall(text)) * 2 >= len(_LATIN.findall(text)):
+            return "japanese"
+    return None
+
+
+class LanguageDetector:
+    """Script fast path, then memoized langdetect"""
+
+    def __init__(self, cache_size: int = 4096):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.fast_path = 0
+        self.cache_hits = 0
+        self.detector_calls = 0
+
+    def detect(self, text: str) -> str:
+        language = detect_by_script(text)
+        if language is not None:
+            self.fast_path += 1
+            return language
+
+        with self._lock:
+            language = self._cache.get(text)
+            if language is not None:
+                self._cache.move_to_end(text)
+                self.cache_hits += 1
+                return language
+
+        self.detector_calls += 1
+        try:
+            language = LANGUAGES.get(detect(text), DEFAULT_LANGUAGE)
+        except Exception as e:
+            print(f"⚠️ Language detection error: {e}")
+            # Errors are not cached so a transient failure is retried
+            return DEFAULT_LANGUAGE
+
+        with self._lock:
+            self._cache[text] = language
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return language
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "fast_path": self.fast_path,
+            "cache_hits": self.cache_hits,
+            "detector_calls": self.detector_calls,
+            "cached": len(self._cache)
+        }
@@ -0,0 +1,231 @@
+"""
+Lexical (BM25) index for hybrid retrieval
+Built by the ETL next to the FAISS index and searched locally, so exact terms
+such as "CPPI" or "Minervini" are found even when the embedding misses them.
+Japanese text is indexed as character bigrams; no tokenizer download needed.
+"""
+
+import re
+import math
+import threading
+import unicodedata
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+from langchain.schema import Document
+
+LEXICAL_INDEX_FILE = "lexical_index.npz"
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """ASCII words as-is, CJK runs as overlapping character bigrams"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    tokens = []
+    for run in _TOKEN_PATTERN.findall(text):
+        if run.isascii() or len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+class BM25Index:
+    """Inverted index over chunks keyed by FAISS vector position"""
+
+    def __init__(self, terms: List[str], term_offsets: np.ndarray, postings_docs: np.ndarray,
+                 postings_tfs: np.ndarray, doc_lengths: np.ndarray, k1: float = 1.5, b: float = 0.75):
+        self.terms = terms
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.term_offsets = term_offsets
+        self.postings_docs = postings_docs
+        self.postings_tfs = postings_tfs
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        self.avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    @classmethod
+    def build(cls, texts: List[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        postings: Dict[str, Dict[int, int]] = {}
+        doc_lengths = []
+        for position, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            for token in tokens:
+                counts = postings.setdefault(token, {})
+                counts[position] = counts.get(position, 0) + 1
+
+        terms = sorted(postings)
+        offsets, docs, tfs = [0], [], []
+        for term in terms:
+            for position, tf in sorted(postings[term].items()):
+                docs.append(position)
+                tfs.append(tf)
+            offsets.append(len(docs))
+        return cls(
+            terms,
+            np.asarray(offsets, dtype=np.int64),
+            np.asarray(docs, dtype=np.int32),
+            np.asarray(tfs, dtype=np.float32),
+            np.asarray(doc_lengths, dtype=np.int32),
+            k1, b
+        )
+
+    def save(self, path: str):
+        np.savez(
+            path,
+            # Terms never contain newlines, so one joined UTF-8 buffer avoids pickled object arrays
+            terms=np.frombuffer("\n".join(self.terms).encode("utf-8"), dtype=np.uint8),
+            term_offsets=self.term_offsets,
+            postings_docs=self.postings_docs,
+            postings_tfs=self.postings_tfs,
+            doc_lengths=self.doc_lengths,
+            params=np.asarray([self.k1, self.b], dtype=np.float64)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as data:
+            raw = data["terms"].tobytes().decode("utf-8")
+            k1, b = data["params"].tolist()
+            return cls(
+                raw.split("\n") if raw else [],
+                data["term_offsets"],
+                data["postings_docs"],
+                data["postings_tfs"],
+                data["doc_lengths"],
+                k1, b
+            )
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def _idf(self, df: int) -> float:
+        n = len(self)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int) -> Tuple[List[int], List[float], float]:
+        """Top-k positions and BM25 scores, plus the share of the query's IDF
+        weight that the best chunk matches (unknown terms count as missing)"""
+        query_terms = set(tokenize(query))
+        if not query_terms or not len(self):
+            return [], [], 0.0
+
+        scores = np.zeros(len(self), dtype=np.float32)
+        term_postings = []
+        total_weight = 0.0
+        for term in query_terms:
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                total_weight += self._idf(0)
+                continue
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            docs, tfs = self.postings_docs[start:end], self.postings_tfs[start:end]
+            idf = self._idf(end - start)
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / self.avg_length)
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+            term_postings.append((docs, idf))
+            total_weight += idf
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return [], [], 0.0
+        top = matched[np.argsort(-scores[matched], kind="stable")[:k]]
+
+        best = top[0]
+        matched_weight = sum(
+            idf for docs, idf in term_postings
+            if np.searchsorted(docs, best) < len(docs) and docs[np.searchsorted(docs, best)] == best
+        )
+        return top.tolist(), scores[top].tolist(), matched_weight / total_weight
+
+
+def write_lexical_index(folder_path: str, vector_store) -> BM25Index:
+    """Index the store's chunks in vector-position order"""
+    texts = [
+        vector_store.docstore.search(doc_id).page_content
+        for _, doc_id in sorted(vector_store.index_to_docstore_id.items())
+    ]
+    index = BM25Index.build(texts)
+    index.save(str(Path(folder_path) / LEXICAL_INDEX_FILE))
+    return index
+
+
+def load_lexical_index(folder_path: str) -> Optional[BM25Index]:
+    """Load the index if the ETL wrote one"""
+    path = Path(folder_path) / LEXICAL_INDEX_FILE
+    if not path.exists():
+        return None
+    try:
+        return BM25Index.load(str(path))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️  Lexical index unreadable, using vector search only: {e}")
+        return None
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int = 60) -> List[Document]:
+    """Merge ranked lists by sum of 1 / (k + rank); chunks are matched by text"""
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            key = doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(key, doc)
+    return [documents[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+@dataclass
+class LexicalResult:
+    """BM25 hits resolved to documents"""
+    documents: List[Document] = field(default_factory=list)
+    scores: List[float] = field(default_factory=list)
+    coverage: float = 0.0
+    confident: bool = False
+
+
+class HybridSearcher:
+    """BM25 lookup, embedding-skip decision and rank fusion"""
+
+    def __init__(self, lexical_k: int = 20, rrf_k: int = 60, confidence: float = 0.9):
+        self.lexical_k = lexical_k
+        self.rrf_k = rrf_k
+        # Share of the query's IDF weight the best chunk must match to skip the embedding call
+        self.confidence = confidence
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.embeddings_skipped = 0
+        self.fused = 0
+
+    def search_lexical(self, index: BM25Index, vector_store, query: str) -> LexicalResult:
+        """BM25 search; resolve hits with the store they were indexed from"""
+        positions, scores, coverage = index.search(query, self.lexical_k)
+        documents = [
+            vector_store.docstore.search(vector_store.index_to_docstore_id[position])
+            for position in positions
+        ]
+        result = LexicalResult(documents, scores, coverage, bool(positions) and coverage >= self.confidence)
+        with self._lock:
+            self.queries += 1
+            if result.confident:
+                self.embeddings_skipped += 1
+        return result
+
+    def fuse(self, dense_documents: List[Document], lexical: LexicalResult, k: int) -> List[Document]:
+        if not lexical.documents:
+            return dense_documents
+        with self._lock:
+            self.fused += 1
+        return reciprocal_rank_fusion([dense_documents, lexical.documents], self.rrf_k)[:k]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lexical_queries": self.queries,
+            "embeddings_skipped": self.embeddings_skipped,
+            "fused": self.fused,
+            "confidence": self.confidence
+        }
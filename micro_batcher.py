@@ -0,0 +1,89 @@
+"""
+Async micro-batching
+Concurrent callers submit single items and each gets its own result back.
+When nothing is in flight a submission is processed on the next loop
+iteration (batching only what arrived in the same tick); while a batch is
+running, new items queue until it finishes, the window expires or the batch
+is full, so waiting only happens when there is load to coalesce
+"""
+
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class MicroBatcher:
+    """Collect submissions while a batch is in flight (at most max_wait_ms / max_batch_size), then run one batch"""
+
+    def __init__(self, process: Callable[[List[Any]], Awaitable[List[Any]]],
+                 max_batch_size: int = 32, max_wait_ms: float = 2.0):
+        self.process = process
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[tuple] = []  # (item, future, enqueued_at)
+        self._timer: Optional[asyncio.Handle] = None
+        self._tasks = set()
+        self.batches = 0
+        self.items = 0
+        self.max_seen = 0
+        self.total_wait = 0.0
+
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            if self._tasks:
+                # A batch is running: coalesce until it finishes (or the window runs out)
+                self._timer = loop.call_later(self.max_wait, self._flush)
+            else:
+                # Idle: no reason to wait beyond the current loop iteration
+                self._timer = loop.call_soon(self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._run(batch))
+            # Hold a reference so the task is not garbage-collected mid-flight
+            self._tasks.add(task)
+            task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Future):
+        self._tasks.discard(task)
+        if self._pending and not self._tasks:
+            # Items queued behind the finished batch go out now
+            self._flush()
+
+    async def _run(self, batch: List[tuple]):
+        started = time.perf_counter()
+        self.batches += 1
+        self.items += len(batch)
+        self.max_seen = max(self.max_seen, len(batch))
+        self.total_wait += sum(started - enqueued_at for _, _, enqueued_at in batch)
+
+        try:
+            results = await self.process([item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            # Callers that gave up (cancelled) are skipped
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_size": self.max_seen,
+            "avg_queue_ms": round(self.total_wait / self.items * 1000, 3) if self.items else 0.0
+        }
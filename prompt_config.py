@@ -0,0 +1,177 @@
+"""
+Prompt configuration snapshot
+prompt.yaml is parsed and validated once, then frozen together with its
+version hash, the rendered system prompt and the per-language templates.
+The server swaps whole snapshots on reload, so requests never touch disk and
+never see a half-updated configuration.
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+import yaml
+from langchain.prompts import PromptTemplate
+
+# Used when the prompt file does not exist
+DEFAULT_SETTINGS = {
+    'name': 'Universal Knowledge Assistant',
+    'description': 'A knowledgeable assistant that provides helpful and contextual answers.',
+    'language': 'auto-detect',
+    'tone': 'friendly',
+    'temperature': 0.3,
+    'system_prompt': 'You are a specialized AI assistant for Japanese cuisine with deep knowledge of authentic Japanese recipes, cooking techniques, and cultural background.',
+    'response_guidelines': []
+}
+
+DEFAULT_SYSTEM_PROMPT = """You are the "Universal Knowledge Assistant".
+A knowledgeable assistant that provides helpful and contextual answers based on your knowledge base.
+
+## Response Rules
+- Display concrete measures and checklists in bullet points
+- Reference sources and documents when available
+- Mark speculations and best practices with ※Reference
+- Respond in a friendly yet professional tone
+"""
+
+
+def freeze(value: Any) -> Any:
+    """Read-only copy: mappings become MappingProxyType, lists become tuples"""
+    if isinstance(value, Mapping):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def compute_version(settings: Mapping[str, Any]) -> str:
+    """Short hash of the prompt configuration (scopes cached answers)"""
+    raw = json.dumps(settings, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:12]
+
+
+def validate_settings(settings: Any) -> dict:
+    """Reject configurations that would only fail later, at request time"""
+    if not isinstance(settings, dict):
+        raise ValueError("prompt configuration must be a YAML mapping")
+    if not isinstance(settings.get('system_prompt', ''), str):
+        raise ValueError("system_prompt must be a string")
+    if not isinstance(settings.get('response_guidelines', []), list):
+        raise ValueError("response_guidelines must be a list")
+    if not isinstance(settings.get('compliance_notes', {}), (list, dict)):
+        raise ValueError("compliance_notes must be a list or mapping")
+    temperature = settings.get('temperature', 0.3)
+    if isinstance(temperature, bool) or not isinstance(temperature, (int, float)):
+        raise ValueError("temperature must be a number")
+    return settings
+
+
+def build_system_prompt(settings: Mapping[str, Any]) -> str:
+    """Render the operating policy, response rules and compliance notes"""
+    system_prompt = f"""あなたは「{settings.get('name', 'Universal Knowledge Assistant')}」です。
+{settings.get('description', '')}
+
+## Operating Policy
+- Language: {settings.get('language', 'ja')}
+- Tone: {settings.get('tone', 'friendly-professional')}
+- Temperature: {settings.get('temperature', 0.3)}
+
+## Response Rules"""
+
+    for rule in settings.get('response_guidelines', []):
+        system_prompt += f"\n- {rule}"
+
+    system_prompt += "\n\n## Compliance & Ethics"
+    for note in settings.get('compliance_notes', {}):
+        system_prompt += f"\n- {note}"
+
+    return system_prompt
+
+
+def build_prompt_templates(system_prompt: str) -> Mapping[str, PromptTemplate]:
+    """Compile the per-language answer templates around the configured system prompt"""
+    japanese = f"""{system_prompt}
+
+以下の情報を基に、質問に日本語で答えてください。
+
+【参考情報】
+{{context}}
+
+【質問】
+{{question}}
+
+【回答】
+"""
+    english = f"""{system_prompt}
+
+Please answer the question in English based on the following information.
+
+**Reference Information**
+{{context}}
+
+**Question**
+{{question}}
+
+**Answer**
+"""
+    templates = {
+        'japanese': PromptTemplate(template=japanese, input_variables=["context", "question"]),
+        'english': PromptTemplate(template=english, input_variables=["context", "question"])
+    }
+    for template in templates.values():
+        # Stray braces in system_prompt would otherwise break every request
+        try:
+            template.format(context="", question="")
+        except (KeyError, IndexError, ValueError) as e:
+            raise ValueError(f"system_prompt is not a valid template (escape braces as {{{{ }}}}): {e}")
+    return MappingProxyType(templates)
+
+
+@dataclass(frozen=True)
+class PromptConfig:
+    """Immutable, validated prompt configuration"""
+    settings: Mapping[str, Any]
+    version: str
+    system_prompt: str
+    templates: Mapping[str, PromptTemplate]
+    path: Optional[str] = None  # None for the built-in default
+    mtime: Optional[float] = None
+
+    @property
+    def is_default(self) -> bool:
+        return self.path is None
+
+
+def _snapshot(settings: dict, system_prompt: str, path: Optional[str], mtime: Optional[float]) -> PromptConfig:
+    return PromptConfig(
+        settings=freeze(settings),
+        version=compute_version(settings),
+        system_prompt=system_prompt,
+        templates=build_prompt_templates(settings.get('system_prompt', '')),
+        path=path,
+        mtime=mtime
+    )
+
+
+def default_prompt_config() -> PromptConfig:
+    return _snapshot(dict(DEFAULT_SETTINGS), DEFAULT_SYSTEM_PROMPT, None, None)
+
+
+def prompt_file_mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def load_prompt_config(path: str) -> PromptConfig:
+    """Parse and validate the prompt file (raises on any problem)"""
+    # Take the mtime before reading: an edit in between triggers another reload
+    mtime = prompt_file_mtime(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        settings = validate_settings(yaml.safe_load(f))
+    return _snapshot(settings, build_system_prompt(settings), str(Path(path)), mtime)
@@ -0,0 +1,113 @@
+"""
+Reranking stage
+Re-orders over-fetched retrieval candidates with a local scorer under a hard
+per-request time budget, so fewer (better) chunks reach the prompt
+- LexicalOverlapScorer: dependency-free default
+- CrossEncoderScorer: sentence-transformers cross-encoder, if installed
+"""
+
+import time
+import threading
+from dataclasses import dataclass
+from typing import List, Dict, Any
+
+from langchain.schema import Document
+
+from lexical_index import tokenize
+
+
+class LexicalOverlapScorer:
+    """Share of the query's distinct terms that appear in the chunk"""
+
+    name = "lexical"
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        query_terms = set(tokenize(query))
+        if not query_terms:
+            return [0.0] * len(texts)
+        return [len(query_terms & set(tokenize(text))) / len(query_terms) for text in texts]
+
+
+class CrossEncoderScorer:
+    """Local cross-encoder (e.g. cross-encoder/ms-marco-MiniLM-L-6-v2) on CPU"""
+
+    def __init__(self, model_name: str):
+        # Optional dependency: only needed when RERANK_MODEL names a model
+        from sentence_transformers import CrossEncoder
+        self.name = model_name
+        self.model = CrossEncoder(model_name, device="cpu")
+
+    def score(self, query: str, texts: List[str]) -> List[float]:
+        return [float(s) for s in self.model.predict([(query, text) for text in texts])]
+
+
+def create_scorer(model: str):
+    """Scorer for RERANK_MODEL, falling back to lexical overlap"""
+    if model in ("", "lexical"):
+        return LexicalOverlapScorer()
+    try:
+        return CrossEncoderScorer(model)
+    except Exception as e:
+        print(f"⚠️  Reranker model '{model}' unavailable, using lexical overlap: {e}")
+        return LexicalOverlapScorer()
+
+
+@dataclass
+class RerankResult:
+    """Reordered documents and how much of the pool was scored in time"""
+    documents: List[Document]
+    candidates: int
+    scored: int
+    seconds: float
+    timed_out: bool = False
+
+
+class Reranker:
+    """Batch-score candidates best-first until the time budget runs out"""
+
+    def __init__(self, scorer, top_n: int = 8, batch_size: int = 16, time_budget_ms: float = 50):
+        self.scorer = scorer
+        self.top_n = top_n
+        self.batch_size = max(1, batch_size)
+        self.time_budget = time_budget_ms / 1000
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.timeouts = 0
+        self.total_seconds = 0.0
+
+    def rerank(self, query: str, documents: List[Document]) -> RerankResult:
+        started = time.perf_counter()
+        scores: List[float] = []
+        timed_out = False
+        for start in range(0, len(documents), self.batch_size):
+            if scores and time.perf_counter() - started > self.time_budget:
+                timed_out = True
+                break
+            batch = documents[start:start + self.batch_size]
+            scores.extend(self.scorer.score(query, [doc.page_content for doc in batch]))
+
+        # Candidates arrive best-first, so unscored ones rank below every scored one;
+        # the stable sort keeps retrieval order between equal scores
+        order = sorted(range(len(scores)), key=lambda i: -scores[i])
+        ranked = [documents[i] for i in order] + documents[len(scores):]
+
+        result = RerankResult(
+            documents=ranked[:self.top_n],
+            candidates=len(documents),
+            scored=len(scores),
+            seconds=time.perf_counter() - started,
+            timed_out=timed_out
+        )
+        with self._lock:
+            self.requests += 1
+            self.timeouts += int(timed_out)
+            self.total_seconds += result.seconds
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "scorer": self.scorer.name,
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "avg_ms": round(self.total_seconds / self.requests * 1000, 3) if self.requests else 0.0
+        }
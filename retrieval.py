@@ -0,0 +1,171 @@
+"""
+Retrieval strategies
+- similarity: plain top-k (previous behaviour)
+- threshold: top-k, then drop chunks below a cosine-similarity cutoff
+- mmr: maximal marginal relevance over a fetch_k candidate pool
+- adaptive: top-k that stops early once scores fall away from the best match
+"""
+
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import List, Dict, Any
+
+import faiss
+import numpy as np
+from langchain.schema import Document
+
+STRATEGIES = ("similarity", "threshold", "mmr", "adaptive")
+
+
+def distance_to_similarity(distance: float) -> float:
+    """FAISS L2 indexes return squared distances; for unit vectors
+    (OpenAI embeddings are normalized) d^2 = 2 - 2cos"""
+    return 1.0 - float(distance) / 2.0
+
+
+@dataclass
+class RetrievalResult:
+    """Retrieved chunks plus what the strategy discarded"""
+    documents: List[Document]
+    strategy: str
+    candidates: int
+    seconds: float
+    scores: List[float] = field(default_factory=list)  # cosine similarity, empty for "similarity"
+
+    @property
+    def dropped(self) -> int:
+        return max(0, self.candidates - len(self.documents))
+
+
+class DocumentRetriever:
+    """Runs the configured strategy against a FAISS store (blocking; call from a worker thread)"""
+
+    def __init__(self, strategy: str = "similarity", k: int = 8, fetch_k: int = 20,
+                 score_threshold: float = 0.3, mmr_lambda: float = 0.5,
+                 min_k: int = 2, adaptive_drop: float = 0.1):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown retrieval strategy: {strategy} (choose from {', '.join(STRATEGIES)})")
+        self.strategy = strategy
+        self.k = k
+        self.fetch_k = max(fetch_k, k)
+        self.score_threshold = score_threshold
+        self.mmr_lambda = mmr_lambda
+        self.min_k = min(min_k, k)
+        self.adaptive_drop = adaptive_drop
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.total_seconds = 0.0
+        self.total_returned = 0
+        self.total_dropped = 0
+
+    def _scored(self, vector_store, embedding, k):
+        pairs = vector_store.similarity_search_with_score_by_vector(embedding, k)
+        return [doc for doc, _ in pairs], [distance_to_similarity(d) for _, d in pairs]
+
+    @staticmethod
+    def _search_matrix(vector_store, embeddings, k):
+        """One native FAISS search for many query vectors; (docs, similarities) per row"""
+        matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        distances, indices = vector_store.index.search(matrix, k)
+        rows = []
+        for row_distances, row_indices in zip(distances, indices):
+            docs, scores = [], []
+            for distance, position in zip(row_distances, row_indices):
+                if position == -1:  # fewer than k vectors in the index
+                    continue
+                docs.append(vector_store.docstore.search(vector_store.index_to_docstore_id[position]))
+                scores.append(distance_to_similarity(distance))
+            rows.append((docs, scores))
+        return rows
+
+    def _select(self, docs, scores):
+        """Apply the strategy's cut to one row of scored results"""
+        if self.strategy == "threshold":
+            kept = [i for i, score in enumerate(scores) if score >= self.score_threshold]
+            return [docs[i] for i in kept], [scores[i] for i in kept]
+        if self.strategy == "adaptive":
+            keep = len(docs)
+            for i in range(self.min_k, len(docs)):
+                # Stop at the first chunk that is clearly worse than the best match
+                if scores[i] < scores[0] - self.adaptive_drop:
+                    keep = i
+                    break
+            return docs[:keep], scores[:keep]
+        return docs, scores
+
+    def _similarity(self, vector_store, embedding):
+        docs = vector_store.similarity_search_by_vector(embedding, self.k)
+        return docs, [], len(docs)
+
+    def _threshold(self, vector_store, embedding):
+        docs, scores = self._scored(vector_store, embedding, self.k)
+        return (*self._select(docs, scores), len(docs))
+
+    def _mmr(self, vector_store, embedding):
+        pairs = vector_store.max_marginal_relevance_search_with_score_by_vector(
+            embedding, k=self.k, fetch_k=self.fetch_k, lambda_mult=self.mmr_lambda
+        )
+        candidates = min(self.fetch_k, vector_store.index.ntotal)
+        return [doc for doc, _ in pairs], [distance_to_similarity(d) for _, d in pairs], candidates
+
+    def _adaptive(self, vector_store, embedding):
+        docs, scores = self._scored(vector_store, embedding, self.k)
+        return (*self._select(docs, scores), len(docs))
+
+    def search(self, vector_store, embedding: List[float]) -> RetrievalResult:
+        started = time.perf_counter()
+        docs, scores, candidates = getattr(self, f"_{self.strategy}")(vector_store, embedding)
+        result = RetrievalResult(
+            documents=docs,
+            strategy=self.strategy,
+            candidates=candidates,
+            seconds=time.perf_counter() - started,
+            scores=scores
+        )
+        self._record([result])
+        return result
+
+    def search_batch(self, vector_store, embeddings: List[List[float]]) -> List[RetrievalResult]:
+        """Search many queries with a single query matrix (MMR still runs per query)"""
+        if not len(embeddings):
+            return []
+        native = isinstance(getattr(vector_store, "index", None), faiss.Index)
+        if self.strategy == "mmr" or len(embeddings) == 1 or not native:
+            return [self.search(vector_store, embedding) for embedding in embeddings]
+
+        started = time.perf_counter()
+        rows = self._search_matrix(vector_store, embeddings, self.k)
+        # Per-query time is the batch time shared across its queries
+        seconds = (time.perf_counter() - started) / len(rows)
+        results = []
+        for docs, scores in rows:
+            kept_docs, kept_scores = self._select(docs, scores)
+            results.append(RetrievalResult(
+                documents=kept_docs,
+                strategy=self.strategy,
+                candidates=len(docs),
+                seconds=seconds,
+                scores=kept_scores
+            ))
+        self._record(results)
+        return results
+
+    def _record(self, results: List[RetrievalResult]):
+        with self._lock:
+            for result in results:
+                self.requests += 1
+                self.total_seconds += result.seconds
+                self.total_returned += len(result.documents)
+                self.total_dropped += result.dropped
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.requests
+        return {
+            "strategy": self.strategy,
+            "k": self.k,
+            "requests": requests,
+            "avg_ms": round(self.total_seconds / requests * 1000, 3) if requests else 0.0,
+            "avg_chunks": round(self.total_returned / requests, 2) if requests else 0.0,
+            "chunks_dropped": self.total_dropped
+        }
@@ -9,7 +9,9 @@ import os
 import sys
 import argparse
 from pathlib import Path
+from config import Config
 from ingest import KnowledgeIngester, IncrementalIngester
+from faiss_index import INDEX_TYPES
 
 def run_full_etl():
     """フル再構築ETL処理"""
@@ -129,6 +131,39 @@ def add_single_file(file_path: str):
         print(f"❌ ファイル追加中にエラーが発生しました: {e}")
         sys.exit(1)
 
+def remove_single_file(file_path: str):
+    """単一ファイルをベクトルストアから削除"""
+    print(f"🗑️  ファイル削除処理: {file_path}")
+    
+    try:
+        ingester = IncrementalIngester()
+        if ingester.remove_knowledge_file(file_path):
+            print(f"✅ ファイル削除完了: {Path(file_path).name}")
+        else:
+            print(f"❌ ファイル削除失敗: {Path(file_path).name}")
+            sys.exit(1)
+            
+    except Exception as e:
+        print(f"❌ ファイル削除中にエラーが発生しました: {e}")
+        sys.exit(1)
+
+def compact_vector_store():
+    """削除済みファイルのベクトルと重複チャンクを取り除く"""
+    print("🧹 ベクトルストアのコンパクションを開始...")
+    
+    if not Path("vector_store").exists():
+        print("❌ ベクトルストアが存在しません")
+        sys.exit(1)
+    
+    try:
+        ingester = IncrementalIngester()
+        stats = ingester.compact()
+        print(f"✅ コンパクション完了: {stats['removed']}件削除、残り{stats['remaining']}件")
+        
+    except Exception as e:
+        print(f"❌ コンパクション中にエラーが発生しました: {e}")
+        sys.exit(1)
+
 def show_status():
     """ベクトルストアとナレッジファイルの状態を表示"""
     print("📊 システム状態確認...")
@@ -142,6 +177,7 @@ def show_status():
             # ベクトルストアファイルのサイズ情報
             index_file = vector_store_path / "index.faiss"
             pkl_file = vector_store_path / "index.pkl"
+            chunks_file = vector_store_path / "chunks.bin"
             
             if index_file.exists():
                 size_mb = index_file.stat().st_size / (1024 * 1024)
@@ -150,6 +186,10 @@ def show_status():
             if pkl_file.exists():
                 size_kb = pkl_file.stat().st_size / 1024
                 print(f"  📊 メタデータ: {size_kb:.2f} KB")
+            
+            if chunks_file.exists():
+                size_kb = chunks_file.stat().st_size / 1024
+                print(f"  📊 チャンクストア: {size_kb:.2f} KB")
         else:
             print("❌ ベクトルストアが存在しません")
         
@@ -195,7 +235,10 @@ def main():
 使用例:
   python3 run_etl.py                    # インクリメンタルUpdate（デフォルト）
   python3 run_etl.py --full             # フル再構築
+  python3 run_etl.py --full --index-type ivf  # IVFインデックスで再構築
   python3 run_etl.py --add recipe.md    # 単一ファイル追加
+  python3 run_etl.py --remove recipe.md # 単一ファイル削除
+  python3 run_etl.py --compact          # 不要なベクトルを削除して圧縮
   python3 run_etl.py --status           # ベクトルストア状態確認
         """
     )
@@ -212,6 +255,24 @@ def main():
         help="指定したファイルをAdd to existing vector store"
     )
     
+    parser.add_argument(
+        "--remove", "-r",
+        metavar="FILE",
+        help="指定したファイルのチャンクをベクトルストアから削除"
+    )
+    
+    parser.add_argument(
+        "--compact", "-c",
+        action="store_true",
+        help="削除済みファイルのベクトルと重複チャンクを取り除く"
+    )
+    
+    parser.add_argument(
+        "--index-type",
+        choices=INDEX_TYPES,
+        help="構築するFAISSインデックスの種類（既定: FAISS_INDEX_TYPE）"
+    )
+    
     parser.add_argument(
         "--force",
         action="store_true",
@@ -225,12 +286,18 @@ def main():
     )
     
     args = parser.parse_args()
+    if args.index_type:
+        Config.FAISS_INDEX_TYPE = args.index_type
     
     # 引数に応じて処理を分岐
     if args.status:
         show_status()
     elif args.add:
         add_single_file(args.add)
+    elif args.remove:
+        remove_single_file(args.remove)
+    elif args.compact:
+        compact_vector_store()
     elif args.full:
         # フル再構築
         if args.force:
@@ -4,15 +4,20 @@ RAG server providing question-answering from knowledge base
 """
 
 import os
-import yaml
 import json
+import time
+import pickle
 import asyncio
+import faiss
+import httpx
+import numpy as np
 from pathlib import Path
-from typing import Dict, List, Any, AsyncGenerator
-from contextlib import asynccontextmanager
+from typing import Dict, List, Any, AsyncGenerator, Awaitable, Callable, Mapping, Optional
+from contextlib import aclosing, asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Depends, status, Form
+from fastapi import FastAPI, HTTPException, Depends, Request, status, Form
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import StreamingResponse, FileResponse
 from fastapi.middleware.cors import CORSMiddleware
@@ -22,13 +27,45 @@ from langchain.chains import RetrievalQA
 from langchain_community.vectorstores import FAISS
 from langchain_openai import OpenAIEmbeddings
 from langchain.prompts import PromptTemplate
+from langchain.schema import Document
 from jose import JWTError, jwt
-from langdetect import detect
 from config import Config
+from embedding_cache import QueryEmbeddingCache
+from answer_cache import SemanticAnswerCache, CachedAnswer
+from ingest import STORE_VERSION_FILE, read_store_version
+from chunk_store import ChunkStore
+from faiss_index import apply_search_params
+from context_builder import ContextBuilder, ContextResult, TokenCounter
+from retrieval import DocumentRetriever, RetrievalResult
+from micro_batcher import MicroBatcher
+from lexical_index import HybridSearcher, LexicalResult, load_lexical_index
+from reranker import Reranker, create_scorer
+from language_detection import LanguageDetector
+from streaming import SSEEncoder, StreamMetrics, ClientDisconnected, StreamStalled, relay_frames, relay_tokens
+from prompt_config import PromptConfig, DEFAULT_SYSTEM_PROMPT, default_prompt_config, load_prompt_config, prompt_file_mtime
 
 # .envファイルを読み込み
 load_dotenv()
 
+# Map index.faiss read-only instead of copying it, so workers share the page cache
+# (IO_FLAG_MMAP_IFC covers flat codes as well as IVF lists in recent FAISS)
+FAISS_MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+
+def load_faiss_store(folder_path: str, embeddings, mmap: bool = False) -> FAISS:
+    """FAISS.load_local equivalent that prefers the lazily read chunk store
+
+    Stores written before chunks.bin existed fall back to unpickling index.pkl.
+    """
+    folder = Path(folder_path)
+    index = faiss.read_index(str(folder / "index.faiss"), FAISS_MMAP_FLAGS if mmap else 0)
+    if ChunkStore.exists(folder_path):
+        docstore = ChunkStore(folder_path)
+        return FAISS(embeddings, index, docstore, docstore.positional_ids())
+    with open(folder / "index.pkl", "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
 
 class QueryRequest(BaseModel):
     """Query request model"""
@@ -43,6 +80,13 @@ class QueryResponse(BaseModel):
     timestamp: str
 
 
+# Used until a prompt configuration is loaded
+DEFAULT_PROMPT_TEMPLATE = PromptTemplate(
+    template="Please answer the question based on the following information.\n\n{context}\n\nQuestion: {question}\n\nAnswer:",
+    input_variables=["context", "question"]
+)
+
+
 class RAGServer:
     """RAG Server class"""
     
@@ -50,96 +94,184 @@ class RAGServer:
         """Initializer - minimal implementation to pass tests"""
         self.vector_store_path = Config.VECTOR_STORE_PATH
         self.vector_store = None
+        self.lexical_index = None
+        self.vector_store_version = None
+        self._store_version_mtime = None
+        self._reload_lock = asyncio.Lock()
         self.qa_chain = None
         self.streaming_qa_chain = None
-        self.embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
+        # OpenAI APIへの接続はプールして全リクエストで共有する
+        self.http_client, self.http_async_client = self.create_http_clients()
+        self.embeddings = OpenAIEmbeddings(
+            model=Config.EMBEDDING_MODEL,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+            max_retries=Config.LLM_MAX_RETRIES
+        )
+        self.llm = None
+        self.streaming_llm = None
+        # LLM APIへの接続の事前確立（最後に使った時刻でアイドル切断を推定）
+        self._llm_last_used = float("-inf")
+        self._background_tasks = set()
+        self.stream_metrics = StreamMetrics()
+        self.embedding_cache = QueryEmbeddingCache(
+            max_size=Config.EMBEDDING_CACHE_SIZE,
+            ttl_seconds=Config.EMBEDDING_CACHE_TTL,
+            persist_path=Config.EMBEDDING_CACHE_PATH or None
+        )
+        self.answer_cache = SemanticAnswerCache(
+            max_size=Config.ANSWER_CACHE_SIZE,
+            similarity_threshold=Config.ANSWER_CACHE_SIMILARITY,
+            ttl_seconds=Config.ANSWER_CACHE_TTL
+        )
+        # 同時に届いた質問の埋め込みを1回のEmbeddings APIリクエストにまとめる
+        self.embedding_batcher = MicroBatcher(
+            self._embed_micro_batch,
+            max_batch_size=Config.QUERY_EMBEDDING_BATCH_MAX_SIZE,
+            max_wait_ms=Config.QUERY_EMBEDDING_BATCH_WINDOW_MS
+        )
+        # 同時に届いた検索を数ミリ秒まとめて1回のFAISS検索にする
+        self.search_batcher = MicroBatcher(
+            self._search_micro_batch,
+            max_batch_size=Config.SEARCH_BATCH_MAX_SIZE,
+            max_wait_ms=Config.SEARCH_BATCH_WINDOW_MS
+        )
+        # 再ランキング（有効時は多めに候補を取り、RETRIEVAL_K件に絞る）
+        self.reranker = None
+        self.candidate_k = Config.RETRIEVAL_K
+        if Config.RERANK_ENABLED:
+            self.reranker = Reranker(
+                create_scorer(Config.RERANK_MODEL),
+                top_n=Config.RETRIEVAL_K,
+                batch_size=Config.RERANK_BATCH_SIZE,
+                time_budget_ms=Config.RERANK_TIME_BUDGET_MS
+            )
+            self.candidate_k = max(Config.RETRIEVAL_K, Config.RERANK_CANDIDATES)
+        # 検索戦略（similarity / threshold / mmr / adaptive）
+        self.retriever = DocumentRetriever(
+            strategy=Config.RETRIEVAL_STRATEGY,
+            k=self.candidate_k,
+            fetch_k=Config.RETRIEVAL_FETCH_K,
+            score_threshold=Config.RETRIEVAL_SCORE_THRESHOLD,
+            mmr_lambda=Config.RETRIEVAL_MMR_LAMBDA,
+            min_k=Config.RETRIEVAL_MIN_K,
+            adaptive_drop=Config.RETRIEVAL_ADAPTIVE_DROP
+        )
+        # BM25とベクトル検索の融合（キーワードだけで十分なら埋め込みを省略）
+        self.hybrid = HybridSearcher(
+            lexical_k=Config.RETRIEVAL_FETCH_K,
+            rrf_k=Config.HYBRID_RRF_K,
+            confidence=Config.LEXICAL_SKIP_CONFIDENCE
+        )
+        # プロンプトに入れるチャンクをトークン上限内に収める
+        self.context_builder = ContextBuilder(
+            max_tokens=Config.MAX_CONTEXT_LENGTH,
+            counter=TokenCounter(Config.LLM_MODEL),
+            max_overlap=Config.CHUNK_OVERLAP
+        )
         self.prompt_template = None
-        self.prompt_config = None
+        # 検証済みのプロンプト設定（言語別テンプレートを含む）。リロード時は丸ごと差し替える
+        self.prompt: Optional[PromptConfig] = None
+        self._prompt_mtime = None
+        self._prompt_reload_lock = asyncio.Lock()
+        self.language_detector = LanguageDetector()
+        # FAISS検索などCPU処理をイベントループから逃がすためのスレッドプール
+        self.executor = ThreadPoolExecutor(
+            max_workers=Config.QUERY_THREAD_POOL_SIZE,
+            thread_name_prefix="rag-query"
+        )
         
-    def detect_language(self, text: str) -> str:
-        """Detect language of the input text"""
-        try:
-            detected_lang = detect(text)
-            # Map detected language to our supported languages
-            if detected_lang == 'ja':
-                return 'japanese'
-            elif detected_lang == 'en':
-                return 'english'
-            else:
-                return 'english'  # Default to English for other languages
-        except Exception as e:
-            print(f"⚠️ Language detection error: {e}")
-            return 'english'  # Default to English on error
+    def create_http_clients(self):
+        """Create connection-pooled HTTP clients shared by all OpenAI calls"""
+        limits = httpx.Limits(
+            max_connections=Config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=Config.HTTP_KEEPALIVE_EXPIRY
+        )
+        timeout = httpx.Timeout(Config.HTTP_READ_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT)
+        return (
+            httpx.Client(limits=limits, timeout=timeout),
+            httpx.AsyncClient(limits=limits, timeout=timeout)
+        )
     
-    def get_system_prompt(self) -> str:
-        """Get system prompt"""
-        prompt_file_path = Path(Config.PROMPTS_PATH) / Config.PROMPT_FILE
-        
-        if not prompt_file_path.exists():
-            return """You are the "Universal Knowledge Assistant".
-A knowledgeable assistant that provides helpful and contextual answers based on your knowledge base.
-
-## Response Rules
-- Display concrete measures and checklists in bullet points
-- Reference sources and documents when available
-- Mark speculations and best practices with ※Reference
-- Respond in a friendly yet professional tone
-"""
+    def setup_llm_clients(self):
+        """Create long-lived chat clients (non-streaming and streaming)"""
+        self.llm = ChatOpenAI(
+            model=Config.LLM_MODEL,
+            temperature=Config.LLM_TEMPERATURE,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+            max_retries=Config.LLM_MAX_RETRIES
+        )
+        self.streaming_llm = ChatOpenAI(
+            model=Config.LLM_MODEL,
+            temperature=Config.LLM_TEMPERATURE,
+            streaming=True,
+            http_client=self.http_client,
+            http_async_client=self.http_async_client,
+            max_retries=Config.LLM_MAX_RETRIES
+        )
         
+    def prewarm_llm_connection(self) -> Optional[asyncio.Task]:
+        """Open a pooled connection to the LLM API in the background when the pool has likely gone idle"""
+        base_url = getattr(getattr(self.streaming_llm, "root_async_client", None), "base_url", None)
+        if not Config.LLM_PREWARM_CONNECTION or not isinstance(base_url, httpx.URL):
+            return None
+        now = time.monotonic()
+        if now - self._llm_last_used < Config.HTTP_KEEPALIVE_EXPIRY:
+            return None  # a keep-alive connection should still be open
+        self._llm_last_used = now
+        task = asyncio.create_task(self._open_llm_connection(str(base_url)))
+        # Hold a reference so the task is not garbage-collected mid-flight
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+    
+    async def _open_llm_connection(self, url: str):
         try:
-            with open(prompt_file_path, 'r', encoding='utf-8') as f:
-                prompt_config = yaml.safe_load(f)
-            
-            # システムプロンプトの構築
-            system_prompt = f"""あなたは「{prompt_config.get('name', 'Universal Knowledge Assistant')}」です。
-{prompt_config.get('description', '')}
-
-## Operating Policy
-- Language: {prompt_config.get('language', 'ja')}
-- Tone: {prompt_config.get('tone', 'friendly-professional')}
-- Temperature: {prompt_config.get('temperature', 0.3)}
-
-## Response Rules"""
-            
-            response_guidelines = prompt_config.get('response_guidelines', [])
-            for rule in response_guidelines:
-                system_prompt += f"\n- {rule}"
-            
-            system_prompt += "\n\n## Compliance & Ethics"
-            compliance_notes = prompt_config.get('compliance_notes', {})
-            for note in compliance_notes:
-                system_prompt += f"\n- {note}"
-            
-            return system_prompt
-            
-        except Exception as e:
-            print(f"❌ System prompt acquisition error: {e}")
-            return """You are the "Universal Knowledge Assistant".
-A knowledgeable assistant that provides helpful and contextual answers based on your knowledge base.
-"""
+            # Any status (even 401/404) leaves a TLS keep-alive connection in the shared pool
+            await self.http_async_client.head(url, timeout=Config.HTTP_CONNECT_TIMEOUT)
+            self.stream_metrics.record_prewarm()
+        except httpx.HTTPError as e:
+            print(f"⚠️  LLM connection prewarm failed: {e}")
+    
+    def detect_language(self, text: str) -> str:
+        """Detect language of the input text ('japanese' or 'english')"""
+        return self.language_detector.detect(text)
+    
+    @property
+    def prompt_config(self) -> Optional[Mapping[str, Any]]:
+        """Frozen settings parsed from the prompt file"""
+        prompt = self.prompt
+        return prompt.settings if prompt is not None else None
+    
+    @property
+    def prompt_version(self) -> Optional[str]:
+        prompt = self.prompt
+        return prompt.version if prompt is not None else None
+    
+    def get_system_prompt(self) -> str:
+        """Get system prompt (rendered once when the configuration was loaded)"""
+        prompt = self.prompt
+        return prompt.system_prompt if prompt is not None else DEFAULT_SYSTEM_PROMPT
+    
+    def _prompt_file_path(self) -> str:
+        return str(Path(Config.PROMPTS_PATH) / Config.PROMPT_FILE)
     
     def load_prompt_template(self):
         """Load prompt template configuration"""
-        prompt_file_path = Path(Config.PROMPTS_PATH) / Config.PROMPT_FILE
+        prompt_file_path = self._prompt_file_path()
+        self._prompt_mtime = prompt_file_mtime(prompt_file_path)
         
-        if not prompt_file_path.exists():
+        if self._prompt_mtime is None:
             print(f"⚠️  Prompt file not found: {prompt_file_path}")
             # Use default prompt config
-            self.prompt_config = {
-                'name': 'Universal Knowledge Assistant',
-                'description': 'A knowledgeable assistant that provides helpful and contextual answers.',
-                'language': 'auto-detect',
-                'tone': 'friendly',
-                'temperature': 0.3,
-                'system_prompt': 'You are a specialized AI assistant for Japanese cuisine with deep knowledge of authentic Japanese recipes, cooking techniques, and cultural background.',
-                'response_guidelines': []
-            }
+            self.prompt = default_prompt_config()
             print(f"🔍 Using default prompt: True")
             return
         
         try:
-            with open(prompt_file_path, 'r', encoding='utf-8') as f:
-                self.prompt_config = yaml.safe_load(f)
+            self.prompt = load_prompt_config(prompt_file_path)
             
             print("✅ Loaded prompt configuration")
             print(f"🔍 Using default prompt: False")
@@ -147,74 +279,134 @@ A knowledgeable assistant that provides helpful and contextual answers based on
         except Exception as e:
             print(f"❌ プロンプトFile loadingエラー: {e}")
             # Use default prompt config
-            self.prompt_config = {
-                'name': 'Universal Knowledge Assistant',
-                'description': 'A knowledgeable assistant that provides helpful and contextual answers.',
-                'language': 'auto-detect',
-                'tone': 'friendly',
-                'temperature': 0.3,
-                'system_prompt': 'You are a specialized AI assistant for Japanese cuisine with deep knowledge of authentic Japanese recipes, cooking techniques, and cultural background.',
-                'response_guidelines': []
+            self.prompt = default_prompt_config()
+    
+    async def reload_prompt_config(self) -> Dict[str, Any]:
+        """Parse the prompt file off the event loop and swap the snapshot atomically"""
+        async with self._prompt_reload_lock:
+            loop = asyncio.get_running_loop()
+            # Raises on a missing or invalid file; the current prompt stays in place
+            prompt = await loop.run_in_executor(None, load_prompt_config, self._prompt_file_path())
+            
+            previous_version = self.prompt_version
+            self.prompt = prompt
+            self._prompt_mtime = prompt.mtime
+            if prompt.version != previous_version:
+                self.answer_cache.invalidate()
+            
+            print(f"✅ Prompt configuration reloaded ({previous_version} → {prompt.version})")
+            return {
+                "previous_version": previous_version,
+                "version": prompt.version
             }
     
+    async def watch_prompt_config(self, interval: float):
+        """Poll the prompt file and hot-reload it when it is edited"""
+        while True:
+            await asyncio.sleep(interval)
+            mtime = prompt_file_mtime(self._prompt_file_path())
+            if mtime is None or mtime == self._prompt_mtime:
+                continue
+            
+            print("🔄 Prompt configuration changed, reloading...")
+            try:
+                await self.reload_prompt_config()
+            except Exception as e:
+                # Keep serving the previous prompt until the file is fixed
+                self._prompt_mtime = mtime
+                print(f"⚠️  Prompt reload failed, keeping version {self.prompt_version}: {e}")
+    
     def get_dynamic_prompt_template(self, question: str) -> PromptTemplate:
-        """Generate dynamic prompt template based on question language"""
-        if self.prompt_config is None:
+        """Return the precompiled template for the question's language"""
+        prompt = self.prompt
+        if prompt is None:
             # Fallback to default template
-            return PromptTemplate(
-                template="Please answer the question based on the following information.\n\n{context}\n\nQuestion: {question}\n\nAnswer:",
-                input_variables=["context", "question"]
-            )
-        
-        # Detect language of the question
-        detected_lang = self.detect_language(question)
-        
-        # Get system prompt from config
-        system_prompt = self.prompt_config.get('system_prompt', '')
-        
-        # Create language-specific prompt
-        if detected_lang == 'japanese':
-            template = f"""{system_prompt}
-
-以下の情報を基に、質問に日本語で答えてください。
-
-【参考情報】
-{{context}}
-
-【質問】
-{{question}}
-
-【回答】
-"""
-        else:  # English or other languages
-            template = f"""{system_prompt}
-
-Please answer the question in English based on the following information.
-
-**Reference Information**
-{{context}}
-
-**Question**
-{{question}}
-
-**Answer**
-"""
+            return DEFAULT_PROMPT_TEMPLATE
         
-        return PromptTemplate(
-            template=template,
-            input_variables=["context", "question"]
-        )
+        return prompt.templates[self.detect_language(question)]
         
-    def load_vector_store(self):
-        """Load vector store - implementation to pass tests"""
+    def _read_vector_store(self):
+        """Load the index and its version from disk without touching server state"""
         if not Path(self.vector_store_path).exists():
             raise FileNotFoundError(f"Vector store not found: {self.vector_store_path}")
         
-        self.vector_store = FAISS.load_local(
-            self.vector_store_path,
-            self.embeddings,
-            allow_dangerous_deserialization=True
-        )
+        # Read the version first: if the ETL commits in between, the watcher reloads again
+        version = read_store_version(self.vector_store_path)
+        if Config.VECTOR_STORE_MMAP or ChunkStore.exists(self.vector_store_path):
+            vector_store = load_faiss_store(self.vector_store_path, self.embeddings, mmap=Config.VECTOR_STORE_MMAP)
+        else:
+            vector_store = FAISS.load_local(
+                self.vector_store_path,
+                self.embeddings,
+                allow_dangerous_deserialization=True
+            )
+        # nprobe / efSearch are query-time knobs, tunable without rebuilding the index
+        apply_search_params(vector_store.index, Config.FAISS_IVF_NPROBE, Config.FAISS_HNSW_EF_SEARCH)
+        return vector_store, version
+    
+    def load_vector_store(self):
+        """Load vector store - implementation to pass tests"""
+        self.vector_store, self.vector_store_version = self._read_vector_store()
+        self.lexical_index = self._read_lexical_index()
+        self._store_version_mtime = self._version_file_mtime()
+    
+    def _read_lexical_index(self):
+        """BM25 index written by the ETL, if hybrid search is enabled"""
+        if not Config.HYBRID_SEARCH:
+            return None
+        return load_lexical_index(self.vector_store_path)
+    
+    def _version_file_mtime(self):
+        try:
+            return os.stat(os.path.join(self.vector_store_path, STORE_VERSION_FILE)).st_mtime
+        except OSError:
+            return None
+    
+    async def reload_vector_store(self) -> Dict[str, Any]:
+        """Load the new index in the background and swap the reference atomically"""
+        async with self._reload_lock:
+            started = time.perf_counter()
+            mtime = self._version_file_mtime()
+            
+            # Load on the default executor so query threads are not taken
+            loop = asyncio.get_running_loop()
+            vector_store, version = await loop.run_in_executor(None, self._read_vector_store)
+            lexical_index = await loop.run_in_executor(None, self._read_lexical_index)
+            
+            # Requests already running keep their reference to the old store
+            previous_version = self.vector_store_version
+            self.vector_store = vector_store
+            self.lexical_index = lexical_index
+            self.vector_store_version = version
+            self._store_version_mtime = mtime
+            if version != previous_version:
+                self.answer_cache.invalidate()
+            
+            seconds = time.perf_counter() - started
+            print(f"✅ Vector store reloaded ({previous_version} → {version}) in {seconds:.2f}s")
+            return {
+                "previous_version": previous_version,
+                "version": version,
+                "seconds": round(seconds, 3)
+            }
+    
+    async def watch_vector_store(self, interval: float):
+        """Poll the store version file and hot-reload when the ETL commits a new index"""
+        while True:
+            await asyncio.sleep(interval)
+            mtime = self._version_file_mtime()
+            if mtime is None or mtime == self._store_version_mtime:
+                continue
+            if read_store_version(self.vector_store_path) == self.vector_store_version:
+                self._store_version_mtime = mtime
+                continue
+            
+            print("🔄 New vector store detected, reloading...")
+            try:
+                await self.reload_vector_store()
+            except Exception as e:
+                # Keep serving the old index; retry on the next tick
+                print(f"⚠️  Vector store reload failed: {e}")
         
     def setup_qa_chain(self):
         """RetrievalQA setup - implementation to pass tests"""
@@ -231,47 +423,203 @@ Please answer the question in English based on the following information.
         print("✅ Dynamic prompt template setup completed.")
         print("✅ QA chain setup completed.")
         
-    def process_query(self, query: str) -> Dict[str, Any]:
-        """Query processing - implementation to pass tests"""
+    async def embed_query(self, query: str) -> List[float]:
+        """Embed the query, serving repeated questions from the cache"""
+        cached = self.embedding_cache.get(query, Config.EMBEDDING_MODEL)
+        if cached is not None:
+            return cached
+        
+        # Concurrent misses share one embeddings request
+        return await self.embedding_batcher.submit(query)
+    
+    async def _embed_micro_batch(self, queries: List[str]) -> List[List[float]]:
+        """MicroBatcher callback: one embeddings request for the distinct queries in the window"""
+        unique = list(dict.fromkeys(queries))
+        if len(unique) == 1:
+            vectors = [await self.embeddings.aembed_query(unique[0])]
+        else:
+            vectors = await self.embeddings.aembed_documents(unique)
+        embedded = dict(zip(unique, vectors))
+        for query, vector in embedded.items():
+            self.embedding_cache.put(query, Config.EMBEDDING_MODEL, vector)
+        return [embedded[query] for query in queries]
+    
+    async def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """Embed many queries with one embeddings request for the uncached ones"""
+        vectors = [self.embedding_cache.get(query, Config.EMBEDDING_MODEL) for query in queries]
+        missing = list(dict.fromkeys(q for q, v in zip(queries, vectors) if v is None))
+        if missing:
+            embedded = dict(zip(missing, await self.embeddings.aembed_documents(missing)))
+            for query, vector in embedded.items():
+                self.embedding_cache.put(query, Config.EMBEDDING_MODEL, vector)
+            vectors = [v if v is not None else embedded[q] for q, v in zip(queries, vectors)]
+        return vectors
+    
+    def answer_cache_namespace(self) -> tuple:
+        """Cached answers are only valid for the same prompt, index and embedding model"""
+        return (self.prompt_version, self.vector_store_version, Config.EMBEDDING_MODEL)
+    
+    def lookup_cached_answer(self, query_embedding: List[float]):
+        """Return a semantically matching cached answer, if any"""
+        return self.answer_cache.lookup(query_embedding, self.answer_cache_namespace())
+    
+    async def build_context(self, documents: List[Document]) -> ContextResult:
+        """Pack retrieved chunks into the token budget and log what was trimmed (tokenizing runs on the pool)"""
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self.executor, self.context_builder.build, documents)
+        print(f"✂️  Context: {result.tokens}/{self.context_builder.max_tokens} tokens, "
+              f"{result.tokens_saved} saved, {result.dropped} chunks dropped")
+        return result
+    
+    async def search_lexical(self, query: str) -> Optional[LexicalResult]:
+        """BM25 search against the loaded lexical index (None when there is none)"""
+        # The store and its lexical index are swapped together, so read both at once
+        vector_store, lexical_index = self.vector_store, self.lexical_index
+        if vector_store is None or lexical_index is None:
+            return None
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            self.hybrid.search_lexical,
+            lexical_index,
+            vector_store,
+            query
+        )
+    
+    async def search_vectors(self, query_vectors, vector_store=None) -> List[RetrievalResult]:
+        """Search a matrix of query vectors with one native FAISS call (blocking work on the pool)"""
+        vector_store = vector_store or self.vector_store
+        if vector_store is None:
+            raise ValueError("Vector store not loaded")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            self.retriever.search_batch,
+            vector_store,
+            np.asarray(query_vectors, dtype=np.float32)
+        )
+    
+    async def _search_micro_batch(self, items: List[tuple]) -> List[RetrievalResult]:
+        """MicroBatcher callback: items are (vector_store, embedding); a reload may mix stores"""
+        results: List[Optional[RetrievalResult]] = [None] * len(items)
+        groups: Dict[int, List[int]] = {}
+        for i, (vector_store, _) in enumerate(items):
+            groups.setdefault(id(vector_store), []).append(i)
+        for positions in groups.values():
+            vector_store = items[positions[0]][0]
+            found = await self.search_vectors([items[i][1] for i in positions], vector_store)
+            for i, result in zip(positions, found):
+                results[i] = result
+        return results
+    
+    async def retrieve_documents(self, query: str, query_embedding: List[float] = None,
+                                 lexical: Optional[LexicalResult] = None) -> List[Document]:
+        """Retrieve relevant documents without blocking the event loop"""
+        # Take one reference so a concurrent hot reload cannot switch stores mid-request
+        vector_store = self.vector_store
+        if vector_store is None:
+            raise ValueError("Vector store not loaded")
+        
+        if lexical is None:
+            lexical = await self.search_lexical(query)
+        if lexical is not None and lexical.confident and query_embedding is None:
+            print(f"🔤 Lexical match (coverage {lexical.coverage:.2f}): embedding skipped")
+            return await self.rerank_documents(query, lexical.documents[:self.candidate_k])
+        
+        # Embed the query with the async client (cached)
+        if query_embedding is None:
+            query_embedding = await self.embed_query(query)
+        
+        # Concurrent requests are micro-batched into one FAISS search on the thread pool
+        result = await self.search_batcher.submit((vector_store, query_embedding))
+        print(f"🔎 Retrieval ({result.strategy}): {len(result.documents)}/{result.candidates} chunks "
+              f"in {result.seconds * 1000:.1f}ms, {result.dropped} dropped")
+        
+        # Reciprocal rank fusion with the BM25 hits
+        documents = result.documents
+        if lexical is not None:
+            documents = self.hybrid.fuse(documents, lexical, self.candidate_k)
+        return await self.rerank_documents(query, documents)
+    
+    async def rerank_documents(self, query: str, documents: List[Document]) -> List[Document]:
+        """Reorder over-fetched candidates and keep RETRIEVAL_K (no-op when reranking is off)"""
+        if self.reranker is None:
+            return documents
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self.executor, self.reranker.rerank, query, documents)
+        budget_note = " (time budget hit)" if result.timed_out else ""
+        print(f"🏅 Rerank ({self.reranker.scorer.name}): {result.scored}/{result.candidates} scored "
+              f"in {result.seconds * 1000:.1f}ms{budget_note}")
+        return result.documents
+        
+    async def generate_answer(self, query: str, relevant_docs: List[Document]):
+        """Build the prompt from retrieved chunks and call the shared LLM; returns (answer, sources)"""
+        # Get dynamic prompt template based on question language
+        prompt_template = self.get_dynamic_prompt_template(query)
+        
+        # Build context within the token budget
+        context = await self.build_context(relevant_docs)
+        
+        # Extract source information (only chunks that made it into the prompt)
+        sources = []
+        for doc in context.documents:
+            if "source" in doc.metadata:
+                sources.append(doc.metadata["source"])
+        
+        # Generate final query using prompt template
+        final_query = prompt_template.format(
+            context=context.context,
+            question=query
+        )
+        
+        # Execute LLM with the shared client
+        if self.llm is None:
+            self.setup_llm_clients()
+        
+        try:
+            result = await self.llm.ainvoke(final_query)
+        finally:
+            self._llm_last_used = time.monotonic()
+        return result.content, list(set(sources))  # Remove duplicates
+    
+    async def process_query(self, query: str) -> Dict[str, Any]:
+        """Query processing - async end-to-end so the worker keeps serving other requests"""
         if self.vector_store is None:
             raise ValueError("Vector store not loaded")
         
         try:
-            # Get dynamic prompt template based on question language
-            prompt_template = self.get_dynamic_prompt_template(query)
-            
-            # Get relevant documents
-            retriever = self.vector_store.as_retriever(
-                search_kwargs={"k": Config.RETRIEVAL_K}
-            )
-            relevant_docs = retriever.get_relevant_documents(query)
-            
-            # Extract source information
-            sources = []
-            for doc in relevant_docs:
-                if "source" in doc.metadata:
-                    sources.append(doc.metadata["source"])
+            started = time.perf_counter()
             
-            # Build context
-            context = "\n\n".join([doc.page_content for doc in relevant_docs])
+            # Keyword-heavy questions can be answered from the BM25 index without embedding
+            lexical = await self.search_lexical(query)
+            query_embedding, cached = None, None
+            if lexical is None or not lexical.confident:
+                # Serve near-duplicate questions from the semantic answer cache
+                query_embedding = await self.embed_query(query)
+                cached = self.lookup_cached_answer(query_embedding)
+            if cached is not None:
+                return {
+                    "answer": cached.answer,
+                    "sources": cached.sources,
+                    "timestamp": datetime.now().isoformat()
+                }
+            namespace = self.answer_cache_namespace()
             
-            # Generate final query using prompt template
-            final_query = prompt_template.format(
-                context=context,
-                question=query
-            )
+            # Get relevant documents
+            relevant_docs = await self.retrieve_documents(query, query_embedding, lexical)
             
-            # Execute LLM
-            llm = ChatOpenAI(
-                model=Config.LLM_MODEL,
-                temperature=Config.LLM_TEMPERATURE
-            )
+            answer, unique_sources = await self.generate_answer(query, relevant_docs)
             
-            result = llm.invoke(final_query)
+            if query_embedding is not None:
+                self.answer_cache.store(query_embedding, namespace, CachedAnswer(
+                    answer=answer,
+                    sources=unique_sources,
+                    generation_seconds=time.perf_counter() - started
+                ))
             
             return {
-                "answer": result.content,
-                "sources": list(set(sources)),  # Remove duplicates
+                "answer": answer,
+                "sources": unique_sources,
                 "timestamp": datetime.now().isoformat()
             }
             
@@ -281,12 +629,56 @@ Please answer the question in English based on the following information.
                 detail=f"Process queryエラー: {str(e)}"
             )
     
-    async def process_query_streaming(self, query: str) -> AsyncGenerator[str, None]:
-        """ストリーミング用クエリ処理"""
+    async def process_query_streaming(self, query: str, received_at: Optional[float] = None,
+                                      is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None) -> AsyncGenerator[str, None]:
+        """ストリーミング用クエリ処理（クライアント切断時は即座にLLMのストリームを止める）"""
         if self.vector_store is None:
             raise ValueError("Vector store not loaded")
         
+        # TTFB/TTFTはリクエスト受信時刻から計測する
+        started = received_at if received_at is not None else time.perf_counter()
+        self.stream_metrics.start()
+        # トークンはまとめて送信し、時刻は開始からのミリ秒オフセット（"t"）で表す
+        encoder = SSEEncoder(Config.STREAM_FLUSH_INTERVAL_MS, Config.STREAM_FLUSH_CHARS, started)
+        # 中断時の節約トークン推定用（Noneはキャッシュ再生でLLMを使わない場合）
+        tokens: Optional[List[str]] = []
+        completed = False
         try:
+            # 検索を待たずに最初のイベントを返し、クライアントとプロキシに応答開始を伝える
+            # 絶対時刻はこのイベントにだけ付ける
+            self.stream_metrics.record("ttfb", time.perf_counter() - started)
+            yield encoder.event("heartbeat", timestamp=datetime.now().isoformat())
+            
+            # LLMクライアントの準備とAPIへの接続確立を検索と並行して行う
+            if self.streaming_llm is None:
+                self.setup_llm_clients()
+            self.prewarm_llm_connection()
+            
+            # キーワード中心の質問はBM25だけで検索し、埋め込みを省略
+            lexical = await self.search_lexical(query)
+            query_embedding, cached = None, None
+            if lexical is None or not lexical.confident:
+                # キャッシュ済みの回答があればトークンを再生して返す
+                query_embedding = await self.embed_query(query)
+                cached = self.lookup_cached_answer(query_embedding)
+            if cached is not None:
+                tokens = None
+                self.stream_metrics.record("sources", time.perf_counter() - started)
+                yield encoder.event("start", sources=cached.sources, cached=True)
+                for i, token in enumerate(cached.tokens or [cached.answer]):
+                    if i == 0:
+                        self.stream_metrics.record("ttft", time.perf_counter() - started)
+                    frame = encoder.token(token)
+                    if frame is not None:
+                        yield frame
+                frame = encoder.flush()
+                if frame is not None:
+                    yield frame
+                yield encoder.event("complete")
+                completed = True
+                return
+            namespace = self.answer_cache_namespace()
+            
             # Get dynamic prompt template based on question language
             prompt_template = self.get_dynamic_prompt_template(query)
             
@@ -294,64 +686,160 @@ Please answer the question in English based on the following information.
             sources = []
             
             # 先に関連ドキュメントを取得
-            retriever = self.vector_store.as_retriever(
-                search_kwargs={"k": Config.RETRIEVAL_K}
-            )
-            relevant_docs = retriever.get_relevant_documents(query)
+            relevant_docs = await self.retrieve_documents(query, query_embedding, lexical)
             
-            # ソース情報を抽出
-            for doc in relevant_docs:
+            # トークン上限内でコンテキストを構築
+            context = await self.build_context(relevant_docs)
+            
+            # ソース情報を抽出（プロンプトに入ったチャンクのみ）
+            for doc in context.documents:
                 if "source" in doc.metadata:
                     sources.append(doc.metadata["source"])
             
-            # コンテキストを構築
-            context = "\n\n".join([doc.page_content for doc in relevant_docs])
+            # ソースは判明した時点で、LLMの応答を待たずに送る
+            unique_sources = list(set(sources))
+            self.stream_metrics.record("sources", time.perf_counter() - started)
+            yield encoder.event("start", sources=unique_sources)
             
             # プロンプトテンプレートでクエリを構築
             final_query = prompt_template.format(
-                context=context,
+                context=context.context,
                 question=query
             )
             
-            # ストリーミングLLMを直接使用
-            streaming_llm = ChatOpenAI(
-                model=Config.LLM_MODEL,
-                temperature=Config.LLM_TEMPERATURE,
-                streaming=True
-            )
+            # 検索中に切断されていればLLMを呼ばない
+            if is_disconnected is not None and await is_disconnected():
+                raise ClientDisconnected("client disconnected before generation")
             
-            # ストリーミング開始通知
-            start_data = {
-                "type": "start",
-                "sources": list(set(sources)),
-                "timestamp": datetime.now().isoformat()
-            }
-            yield f"data: {json.dumps(start_data, ensure_ascii=False)}\n\n"
-            
-            # ストリーミング実行
-            async for chunk in streaming_llm.astream(final_query):
-                if chunk.content:
-                    token_data = {
-                        "type": "token",
-                        "content": chunk.content,
-                        "timestamp": datetime.now().isoformat()
-                    }
-                    yield f"data: {json.dumps(token_data, ensure_ascii=False)}\n\n"
+            async def llm_tokens(stream):
+                async for chunk in stream:
+                    if chunk.content:
+                        if not tokens:
+                            self.stream_metrics.record("ttft", time.perf_counter() - started)
+                        tokens.append(chunk.content)
+                        yield chunk.content
+            
+            async def read_llm_stream(put):
+                # aclosing: cancelling this task closes the upstream HTTP stream at once
+                try:
+                    async with aclosing(self.streaming_llm.astream(final_query)) as stream:
+                        # 生成が途切れてもバッファ済みトークンはSTREAM_FLUSH_INTERVAL_MS以内に送る
+                        await relay_tokens(llm_tokens(stream), encoder, put)
+                finally:
+                    self._llm_last_used = time.monotonic()
+            
+            # ストリーミング実行（共有のストリーミングLLMクライアントを使用）
+            # LLMの読み出しは別タスクで行い、送信待ちはSTREAM_BUFFER_FRAMESまでに抑える
+            async for frame in relay_frames(
+                read_llm_stream,
+                max_frames=Config.STREAM_BUFFER_FRAMES,
+                send_timeout=Config.STREAM_SEND_TIMEOUT,
+                is_disconnected=is_disconnected,
+                check_interval=Config.STREAM_DISCONNECT_CHECK_MS / 1000
+            ):
+                yield frame
+            
+            # 最後まで生成できた回答のみキャッシュ
+            if query_embedding is not None:
+                self.answer_cache.store(query_embedding, namespace, CachedAnswer(
+                    answer="".join(tokens),
+                    sources=unique_sources,
+                    tokens=tokens,
+                    generation_seconds=time.perf_counter() - started
+                ))
             
             # 完了通知
-            complete_data = {
-                "type": "complete",
-                "timestamp": datetime.now().isoformat()
-            }
-            yield f"data: {json.dumps(complete_data, ensure_ascii=False)}\n\n"
+            yield encoder.event("complete")
+            completed = True
+            self.stream_metrics.record_completed(len(tokens))
             
+        except (ClientDisconnected, StreamStalled) as e:
+            # 読み手がいないのでエラーイベントも送らない
+            print(f"🔌 Stream aborted: {e}")
         except Exception as e:
-            error_data = {
-                "type": "error",
-                "message": str(e),
-                "timestamp": datetime.now().isoformat()
-            }
-            yield f"data: {json.dumps(error_data, ensure_ascii=False)}\n\n"
+            # 送信済みのトークンに続けて、残りのバッファとエラーを送る
+            frame = encoder.flush()
+            if frame is not None:
+                yield frame
+            yield encoder.event("error", message=str(e))
+            completed = True
+        finally:
+            # 切断・停滞・サーバー側のキャンセルはすべて中断として数える
+            if not completed:
+                saved = self.stream_metrics.record_aborted(None if tokens is None else len(tokens))
+                print(f"🔌 Stream abandoned after {encoder.tokens} tokens (~{saved} tokens saved)")
+            self.stream_metrics.record_encoding(encoder)
+    
+    async def process_batch(self, queries: List[str]) -> AsyncGenerator[Dict[str, Any], None]:
+        """Answer many queries: one embeddings call, one FAISS matrix search, bounded LLM fan-out.
+        Yields one result per query as it finishes (not in input order)"""
+        vector_store, lexical_index = self.vector_store, self.lexical_index
+        if vector_store is None:
+            raise ValueError("Vector store not loaded")
+        started = time.perf_counter()
+        namespace = self.answer_cache_namespace()
+        loop = asyncio.get_running_loop()
+        
+        def result(index, **fields):
+            return {"index": index, "query": queries[index], **fields, "timestamp": datetime.now().isoformat()}
+        
+        # Lexical search first: confident keyword queries need no embedding
+        lexical = [None] * len(queries)
+        if lexical_index is not None:
+            lexical = await loop.run_in_executor(
+                self.executor,
+                lambda: [self.hybrid.search_lexical(lexical_index, vector_store, q) for q in queries]
+            )
+        dense = [i for i, lex in enumerate(lexical) if lex is None or not lex.confident]
+        
+        # One embeddings request for every question that needs a vector
+        embeddings = dict(zip(dense, await self.embed_queries([queries[i] for i in dense])))
+        
+        pending = []
+        for i in dense:
+            cached = self.answer_cache.lookup(embeddings[i], namespace)
+            if cached is not None:
+                yield result(i, answer=cached.answer, sources=cached.sources, cached=True)
+            else:
+                pending.append(i)
+        
+        # A single FAISS search with the query matrix
+        searched = await self.search_vectors([embeddings[i] for i in pending], vector_store) if pending else []
+        candidates = {i: r.documents for i, r in zip(pending, searched)}
+        for i in pending:
+            if lexical[i] is not None:
+                candidates[i] = self.hybrid.fuse(candidates[i], lexical[i], self.candidate_k)
+        for i, lex in enumerate(lexical):
+            if lex is not None and lex.confident:
+                candidates[i] = lex.documents[:self.candidate_k]
+        print(f"📦 Batch: {len(queries)} queries, {len(dense)} embedded, "
+              f"{len(dense) - len(pending)} cached, {len(searched)} searched in one matrix")
+        
+        # Fan out LLM calls with bounded concurrency and report each as it finishes
+        semaphore = asyncio.Semaphore(Config.BATCH_LLM_CONCURRENCY)
+        
+        async def answer(i):
+            async with semaphore:
+                try:
+                    docs = await self.rerank_documents(queries[i], candidates[i])
+                    text, sources = await self.generate_answer(queries[i], docs)
+                except Exception as e:
+                    return result(i, error=str(e))
+                if i in embeddings:
+                    self.answer_cache.store(embeddings[i], namespace, CachedAnswer(
+                        answer=text,
+                        sources=sources,
+                        generation_seconds=time.perf_counter() - started
+                    ))
+                return result(i, answer=text, sources=sources)
+        
+        tasks = [asyncio.create_task(answer(i)) for i in candidates]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
     
     def initialize(self):
         """Server initialization"""
@@ -368,6 +856,16 @@ Please answer the question in English based on the following information.
             self.load_vector_store()
             print("✅ Vector store loading completed.")
             
+            # トークナイザー読み込み（初回はエンコーディングのダウンロードが走るので起動時に済ませる）
+            print("🔤 Loading tokenizer...")
+            exact = self.context_builder.counter.exact
+            print(f"✅ Tokenizer ready ({'tiktoken' if exact else 'estimated counts'}).")
+            
+            # LLMクライアント作成（接続プールを共有）
+            print("🤖 Creating LLM clients...")
+            self.setup_llm_clients()
+            print("✅ LLM clients ready.")
+            
             # QAチェーンセットアップ
             print("🔗 Setting up QA chain...")
             self.setup_qa_chain()
@@ -378,6 +876,31 @@ Please answer the question in English based on the following information.
         except Exception as e:
             print(f"❌ Server initializationエラー: {e}")
             raise
+    
+    async def shutdown(self):
+        """Release worker threads and pooled connections"""
+        for task in list(self._background_tasks):
+            task.cancel()
+        self.executor.shutdown(wait=False)
+        await self.http_async_client.aclose()
+        self.http_client.close()
+        self.embedding_cache.close()
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Runtime metrics for caches and pools"""
+        return {
+            "prompt_version": self.prompt_version,
+            "embedding_cache": self.embedding_cache.stats(),
+            "embedding_batching": self.embedding_batcher.stats(),
+            "language_detection": self.language_detector.stats(),
+            "answer_cache": self.answer_cache.stats(),
+            "retrieval": self.retriever.stats(),
+            "search_batching": self.search_batcher.stats(),
+            "hybrid": self.hybrid.stats(),
+            "rerank": self.reranker.stats() if self.reranker else None,
+            "context": self.context_builder.stats(),
+            "streaming": self.stream_metrics.stats()
+        }
 
 
 # RAG server instance
@@ -388,15 +911,27 @@ rag_server = RAGServer()
 async def lifespan(app: FastAPI):
     """Application lifecycle management"""
     # Startup processing
+    watchers = []
     try:
         rag_server.initialize()
+        if Config.VECTOR_STORE_WATCH_INTERVAL > 0:
+            watchers.append(asyncio.create_task(
+                rag_server.watch_vector_store(Config.VECTOR_STORE_WATCH_INTERVAL)
+            ))
+        if Config.PROMPT_WATCH_INTERVAL > 0:
+            watchers.append(asyncio.create_task(
+                rag_server.watch_prompt_config(Config.PROMPT_WATCH_INTERVAL)
+            ))
         yield
     except Exception as e:
         print(f"❌ Server startup error: {e}")
         raise
     finally:
-        # Shutdown processing (if needed)
+        # Shutdown processing
         print("🛑 Shutting down server...")
+        for watcher in watchers:
+            watcher.cancel()
+        await rag_server.shutdown()
 
 
 # FastAPIアプリケーション
@@ -467,6 +1002,15 @@ async def health_check():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics (cache hit rates etc.)"""
+    return {
+        "timestamp": datetime.now().isoformat(),
+        **rag_server.get_metrics()
+    }
+
+
 @app.post("/query", response_model=QueryResponse)
 async def query_endpoint(
     request: QueryRequest,
@@ -475,7 +1019,7 @@ async def query_endpoint(
     """Query endpoint - actual RAG inquiry processing"""
     try:
         # Process query
-        result = rag_server.process_query(request.query)
+        result = await rag_server.process_query(request.query)
         
         return QueryResponse(
             answer=result["answer"],
@@ -493,13 +1037,15 @@ async def query_endpoint(
 @app.post("/query/stream")
 async def query_stream_endpoint(
     request: QueryRequest,
+    raw_request: Request,
     token_payload: dict = Depends(verify_token)
 ):
     """ストリーミング用クエリエンドポイント"""
+    received_at = time.perf_counter()
     try:
         # ストリーミング処理を開始
         return StreamingResponse(
-            rag_server.process_query_streaming(request.query),
+            rag_server.process_query_streaming(request.query, received_at, raw_request.is_disconnected),
             media_type="text/event-stream",
             headers={
                 "Cache-Control": "no-cache",
@@ -515,6 +1061,71 @@ async def query_stream_endpoint(
         )
 
 
+@app.post("/query/batch")
+async def query_batch_endpoint(
+    requests: List[QueryRequest],
+    token_payload: dict = Depends(verify_token)
+):
+    """Batch query endpoint for bulk evaluation - one NDJSON line per query as it finishes"""
+    if not requests:
+        raise HTTPException(status_code=400, detail="No queries given")
+    if len(requests) > Config.BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many queries: {len(requests)} (max {Config.BATCH_MAX_QUERIES})"
+        )
+    
+    async def generate():
+        try:
+            async for item in rag_server.process_batch([r.query for r in requests]):
+                yield json.dumps(item, ensure_ascii=False) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": f"Batch query error: {str(e)}",
+                              "timestamp": datetime.now().isoformat()}, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"}  # nginx用のバッファリング無効化
+    )
+
+
+@app.post("/admin/reload")
+async def reload_endpoint(token_payload: dict = Depends(verify_token)):
+    """Hot-reload the vector store without restarting the worker"""
+    try:
+        result = await rag_server.reload_vector_store()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Vector store reload error: {str(e)}"
+        )
+    
+    return {
+        "status": "reloaded",
+        **result,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+@app.post("/admin/reload-prompt")
+async def reload_prompt_endpoint(token_payload: dict = Depends(verify_token)):
+    """Re-read the prompt configuration without restarting the worker"""
+    try:
+        result = await rag_server.reload_prompt_config()
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Prompt reload error: {str(e)}"
+        )
+    
+    return {
+        "status": "reloaded",
+        **result,
+        "timestamp": datetime.now().isoformat()
+    }
+
+
 @app.post("/login")
 async def login(username: str = Form(...), password: str = Form(...)):
     """Login endpoint (authentication via environment variables)"""
@@ -0,0 +1,257 @@
+"""
+/query/stream encoding, flow control and instrumentation
+- SSEEncoder: server-sent event frames; answer tokens are coalesced into
+  fewer, larger frames and stamped with a millisecond offset from the start
+  of the stream instead of a wall-clock timestamp
+- relay_tokens: feeds LLM tokens through the encoder and flushes a partly
+  filled frame when the flush interval is up, even if the LLM pauses
+- relay_frames: runs the LLM reader in its own task behind a bounded buffer
+  and cancels it as soon as the client goes away or stops reading
+- StreamMetrics: server-side latency of the first bytes a client sees
+  - ttfb: request received -> first SSE event written
+  - sources: request received -> sources event (retrieval finished)
+  - ttft: request received -> first answer token
+"""
+
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+try:
+    # Optional: several times faster than json.dumps for small payloads
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(payload: Dict[str, Any]) -> str:
+    """Compact JSON with non-ASCII text kept as-is"""
+    if orjson is not None:
+        return orjson.dumps(payload).decode("utf-8")
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+class SSEEncoder:
+    """Encode one stream's events; tokens are buffered until a flush is due.
+    The first token is always sent at once so time-to-first-token is unaffected"""
+
+    def __init__(self, flush_interval_ms: float = 20, flush_chars: int = 256,
+                 started: Optional[float] = None):
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_chars = flush_chars
+        self.started = started if started is not None else time.perf_counter()
+        self._buffer: List[str] = []
+        self._buffered_chars = 0
+        self._last_flush: Optional[float] = None
+        self.tokens = 0
+        self.frames = 0
+
+    def _offset_ms(self, now: float) -> float:
+        return round((now - self.started) * 1000, 1)
+
+    def event(self, event_type: str, **fields) -> str:
+        """A control event (heartbeat/start/complete/error) as one SSE frame"""
+        self.frames += 1
+        return f"data: {dumps({'type': event_type, **fields, 't': self._offset_ms(time.perf_counter())})}\n\n"
+
+    def token(self, content: str) -> Optional[str]:
+        """Buffer a token; returns a frame when the buffer is due, else None"""
+        self.tokens += 1
+        self._buffer.append(content)
+        self._buffered_chars += len(content)
+        now = time.perf_counter()
+        if (self._last_flush is None
+                or self._buffered_chars >= self.flush_chars
+                or now - self._last_flush >= self.flush_interval):
+            return self._frame(now)
+        return None
+
+    def flush(self) -> Optional[str]:
+        """Frame for whatever is still buffered (call before complete/error)"""
+        return self._frame(time.perf_counter()) if self._buffer else None
+
+    def flush_due_in(self) -> Optional[float]:
+        """Seconds until buffered tokens are due, or None when nothing is buffered"""
+        if not self._buffer or self._last_flush is None:
+            return None
+        return max(0.0, self._last_flush + self.flush_interval - time.perf_counter())
+
+    def _frame(self, now: float) -> str:
+        content = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered_chars = 0
+        self._last_flush = now
+        self.frames += 1
+        return f"data: {dumps({'type': 'token', 'content': content, 't': self._offset_ms(now)})}\n\n"
+
+
+async def relay_tokens(tokens: AsyncIterator[str], encoder: SSEEncoder,
+                       put: Callable[[str], Awaitable[None]]):
+    """Encode tokens as they arrive and put the frames. Buffered tokens go out once
+    their flush interval is up even while the source is silent (an LLM pause)"""
+    iterator = tokens.__aiter__()
+    pending: Optional[asyncio.Future] = None
+    try:
+        while True:
+            if pending is None:
+                # Kept across timeouts: cancelling a half-read chunk would break the stream
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=encoder.flush_due_in())
+            if not done:
+                frame = encoder.flush()
+                if frame is not None:
+                    await put(frame)
+                continue
+            try:
+                token = pending.result()
+            except StopAsyncIteration:
+                pending = None
+                break
+            pending = None
+            frame = encoder.token(token)
+            if frame is not None:
+                await put(frame)
+        frame = encoder.flush()
+        if frame is not None:
+            await put(frame)
+    finally:
+        if pending is not None:
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, StopAsyncIteration):
+                pass
+        if hasattr(iterator, "aclose"):
+            await iterator.aclose()
+
+
+class ClientDisconnected(Exception):
+    """The client closed the connection mid-stream"""
+
+
+class StreamStalled(Exception):
+    """The client stopped reading while the buffer was full"""
+
+
+async def relay_frames(produce: Callable[[Callable[[str], Awaitable[None]]], Awaitable[None]],
+                       max_frames: int = 16, send_timeout: float = 30.0,
+                       is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+                       check_interval: float = 0.25) -> AsyncGenerator[str, None]:
+    """Run produce(put) in its own task and yield the frames it puts.
+    At most max_frames wait in the buffer, so a slow reader pauses the producer
+    (and with it the upstream read). Closing this generator, a disconnect or a
+    reader stalled for send_timeout cancels the producer at once"""
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_frames))
+    check_interval = max(check_interval, 0.01)
+
+    async def put(frame: str):
+        try:
+            await asyncio.wait_for(queue.put(frame), send_timeout)
+        except asyncio.TimeoutError:
+            raise StreamStalled(f"client read nothing for {send_timeout:.0f}s")
+
+    producer = asyncio.ensure_future(produce(put))
+    last_check = time.monotonic()
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({getter, producer}, timeout=check_interval,
+                               return_when=asyncio.FIRST_COMPLETED)
+            if is_disconnected is not None and time.monotonic() - last_check >= check_interval:
+                last_check = time.monotonic()
+                if await is_disconnected():
+                    getter.cancel()
+                    raise ClientDisconnected("client disconnected")
+            if getter.done():
+                yield getter.result()
+                continue
+            getter.cancel()
+            if producer.done():
+                # Drain what the producer left behind, then surface its error if any
+                while not queue.empty():
+                    yield queue.get_nowait()
+                producer.result()
+                return
+    finally:
+        producer.cancel()
+
+
+class StreamMetrics:
+    """Rolling-window percentiles for streaming responses"""
+
+    STAGES = ("ttfb", "sources", "ttft")
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._samples = {stage: deque(maxlen=window) for stage in self.STAGES}
+        self.streams = 0
+        self.connections_prewarmed = 0
+        self.tokens = 0
+        self.frames = 0
+        self.aborted = 0
+        self.tokens_saved = 0
+        self._completed_streams = 0
+        self._completed_tokens = 0
+
+    def start(self):
+        with self._lock:
+            self.streams += 1
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self._samples[stage].append(seconds)
+
+    def record_encoding(self, encoder: SSEEncoder):
+        with self._lock:
+            self.tokens += encoder.tokens
+            self.frames += encoder.frames
+
+    def record_completed(self, tokens: int):
+        with self._lock:
+            self._completed_streams += 1
+            self._completed_tokens += tokens
+
+    def record_aborted(self, tokens_received: Optional[int]) -> int:
+        """Count an abandoned stream; tokens_received is None when no LLM call was involved
+        (cached answer). Returns the estimated tokens not generated"""
+        with self._lock:
+            self.aborted += 1
+            if tokens_received is None or not self._completed_streams:
+                return 0
+            # Estimate the rest of the answer from the average completed answer
+            saved = max(0, round(self._completed_tokens / self._completed_streams) - tokens_received)
+            self.tokens_saved += saved
+            return saved
+
+    def record_prewarm(self):
+        with self._lock:
+            self.connections_prewarmed += 1
+
+    @staticmethod
+    def _summary(samples) -> Dict[str, float]:
+        if not samples:
+            return {"avg": 0.0, "p50": 0.0, "p95": 0.0}
+        ordered = sorted(samples)
+        return {
+            "avg": round(sum(ordered) / len(ordered) * 1000, 2),
+            "p50": round(ordered[len(ordered) // 2] * 1000, 2),
+            "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 2)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = {stage: list(samples) for stage, samples in self._samples.items()}
+            stats = {
+                "streams": self.streams,
+                "connections_prewarmed": self.connections_prewarmed,
+                "tokens": self.tokens,
+                "frames": self.frames,
+                "aborted": self.aborted,
+                "tokens_saved": self.tokens_saved,
+                "json_encoder": "orjson" if orjson is not None else "json"
+            }
+        stats.update({f"{stage}_ms": self._summary(samples) for stage, samples in snapshot.items()})
+        return stats
@@ -0,0 +1,54 @@
+import pytest
+from answer_cache import SemanticAnswerCache, CachedAnswer
+
+NAMESPACE = ("prompt-v1", "store-v1", "text-embedding-3-small")
+
+
+class TestSemanticAnswerCache:
+    
+    def test_similar_query_hits(self):
+        """🔴 Red: 類似クエリがヒットすることのテスト"""
+        cache = SemanticAnswerCache(max_size=10, similarity_threshold=0.95)
+        cache.store([1.0, 0.0, 0.0], NAMESPACE, CachedAnswer(answer="回答", sources=["a.md"], generation_seconds=2.0))
+        
+        hit = cache.lookup([0.99, 0.05, 0.0], NAMESPACE)
+        assert hit is not None
+        assert hit.answer == "回答"
+        assert cache.stats()["latency_saved_seconds"] == 2.0
+    
+    def test_dissimilar_query_misses(self):
+        """🔴 Red: 類似度がしきい値未満ならミスになることのテスト"""
+        cache = SemanticAnswerCache(max_size=10, similarity_threshold=0.95)
+        cache.store([1.0, 0.0], NAMESPACE, CachedAnswer(answer="回答", sources=[]))
+        
+        assert cache.lookup([0.0, 1.0], NAMESPACE) is None
+        assert cache.stats()["misses"] == 1
+    
+    def test_namespace_isolation(self):
+        """🔴 Red: プロンプト・インデックスの版数が違えばヒットしないことのテスト"""
+        cache = SemanticAnswerCache(max_size=10)
+        cache.store([1.0, 0.0], NAMESPACE, CachedAnswer(answer="回答", sources=[]))
+        
+        assert cache.lookup([1.0, 0.0], ("prompt-v1", "store-v2", "text-embedding-3-small")) is None
+        assert cache.lookup([1.0, 0.0], NAMESPACE) is not None
+    
+    def test_lru_eviction(self):
+        """🔴 Red: 上限到達時にLRUで退避されることのテスト"""
+        cache = SemanticAnswerCache(max_size=2, similarity_threshold=0.99)
+        cache.store([1.0, 0.0, 0.0], NAMESPACE, CachedAnswer(answer="a", sources=[]))
+        cache.store([0.0, 1.0, 0.0], NAMESPACE, CachedAnswer(answer="b", sources=[]))
+        cache.lookup([1.0, 0.0, 0.0], NAMESPACE)  # aを最近使用に
+        cache.store([0.0, 0.0, 1.0], NAMESPACE, CachedAnswer(answer="c", sources=[]))
+        
+        assert cache.lookup([1.0, 0.0, 0.0], NAMESPACE).answer == "a"
+        assert cache.lookup([0.0, 1.0, 0.0], NAMESPACE) is None
+        assert cache.lookup([0.0, 0.0, 1.0], NAMESPACE).answer == "c"
+    
+    def test_invalidate(self):
+        """🔴 Red: 無効化で全エントリが消えることのテスト"""
+        cache = SemanticAnswerCache(max_size=10)
+        cache.store([1.0, 0.0], NAMESPACE, CachedAnswer(answer="回答", sources=[]))
+        cache.invalidate()
+        
+        assert cache.lookup([1.0, 0.0], NAMESPACE) is None
+        assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,76 @@
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from chunk_store import ChunkStore, PositionalIds, write_chunk_store, CHUNKS_FILE
+
+
+class TestChunkStore:
+
+    def make_store(self, tmp_path, texts):
+        embeddings = DeterministicFakeEmbedding(size=8)
+        metadatas = [{"source": f"doc{i}.md", "chunk_index": i} for i in range(len(texts))]
+        store = FAISS.from_texts(texts, embeddings, metadatas=metadatas)
+        write_chunk_store(str(tmp_path), store)
+        return store
+
+    def test_roundtrip_by_position(self, tmp_path):
+        """🔴 Red: ベクトル位置ごとにチャンクを復元できることのテスト"""
+        texts = ["セクターローテーション", "CPPI戦略", "リスクパリティ"]
+        self.make_store(tmp_path, texts)
+
+        chunks = ChunkStore(str(tmp_path))
+        assert len(chunks) == 3
+        for i, text in enumerate(texts):
+            doc = chunks.search(i)
+            assert doc.page_content == text
+            assert doc.metadata == {"source": f"doc{i}.md", "chunk_index": i}
+        chunks.close()
+
+    def test_missing_position(self, tmp_path):
+        """🔴 Red: 範囲外の位置は見つからない扱いになることのテスト"""
+        self.make_store(tmp_path, ["a"])
+        chunks = ChunkStore(str(tmp_path))
+        assert chunks.search(5) == "ID 5 not found."
+        chunks.close()
+
+    def test_rewrite_keeps_open_store_readable(self, tmp_path):
+        """🔴 Red: 書き直しても開いているストア（mmap）が読み続けられることのテスト"""
+        self.make_store(tmp_path, ["old chunk " * 50, "second"])
+        chunks = ChunkStore(str(tmp_path))
+        inode = (tmp_path / CHUNKS_FILE).stat().st_ino
+
+        self.make_store(tmp_path, ["new"])
+        assert (tmp_path / CHUNKS_FILE).stat().st_ino != inode
+        assert not list(tmp_path.glob(".*.tmp"))
+        assert chunks.search(1).page_content == "second"
+        chunks.close()
+
+        reopened = ChunkStore(str(tmp_path))
+        assert len(reopened) == 1
+        assert reopened.search(0).page_content == "new"
+        reopened.close()
+
+    def test_empty_store(self, tmp_path):
+        """🔴 Red: 空のチャンクストアも開けることのテスト"""
+        (tmp_path / CHUNKS_FILE).write_bytes(b"")
+        import numpy as np
+        np.save(tmp_path / "chunks.offsets.npy", np.zeros(1, dtype=np.int64))
+
+        chunks = ChunkStore(str(tmp_path))
+        assert len(chunks) == 0
+        assert len(chunks.positional_ids()) == 0
+        chunks.close()
+
+    def test_positional_ids(self):
+        """🔴 Red: 位置IDマッピングのテスト"""
+        ids = PositionalIds(3)
+        assert ids[2] == 2
+        assert list(ids) == [0, 1, 2]
+        with pytest.raises(KeyError):
+            ids[3]
+
+    def test_exists(self, tmp_path):
+        """🔴 Red: チャンクストアの存在確認のテスト"""
+        assert not ChunkStore.exists(str(tmp_path))
+        self.make_store(tmp_path, ["a"])
+        assert ChunkStore.exists(str(tmp_path))
@@ -0,0 +1,75 @@
+import pytest
+from langchain.schema import Document
+from context_builder import ContextBuilder, TokenCounter, estimate_tokens, strip_overlap
+
+
+class WordCounter(TokenCounter):
+    """1単語 = 1トークンの決定的なカウンタ（tiktokenのダウンロード不要）"""
+
+    def __init__(self):
+        super().__init__("test")
+        self._loaded = True
+
+    def count(self, text):
+        return len(text.split())
+
+    def truncate(self, text, max_tokens):
+        return " ".join(text.split()[:max_tokens])
+
+
+def chunk(text, source="a.md", chunk_id=0):
+    return Document(page_content=text, metadata={"source": source, "chunk_id": chunk_id})
+
+
+class TestContextBuilder:
+
+    def test_estimate_tokens(self):
+        """🔴 Red: tiktokenが使えない場合のトークン推定のテスト"""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("リスク管理") == 5
+        assert estimate_tokens("abcdefgh") == 2
+
+    def test_strip_overlap(self):
+        """🔴 Red: 隣接チャンクの重複部分除去のテスト"""
+        assert strip_overlap("alpha beta gamma", "beta gamma delta", 50) == "delta"
+        assert strip_overlap("alpha", "delta", 50) == "delta"
+
+    def test_packs_within_budget(self):
+        """🔴 Red: 上位のチャンクからトークン上限まで詰めることのテスト"""
+        builder = ContextBuilder(max_tokens=6, counter=WordCounter())
+        docs = [
+            chunk("one two three", "a.md", 0),
+            chunk("four five six seven", "b.md", 0),
+            chunk("eight nine", "c.md", 0),
+        ]
+        result = builder.build(docs)
+
+        # 2番目は入らないが、より短い3番目は入る
+        assert result.context == "one two three\n\neight nine"
+        assert [d.metadata["source"] for d in result.documents] == ["a.md", "c.md"]
+        assert result.tokens == 5
+        assert result.dropped == 1
+        assert result.tokens_saved == 4
+
+    def test_dedupes_and_merges_adjacent_chunks(self):
+        """🔴 Red: 重複チャンクの除外と隣接チャンクの結合のテスト"""
+        builder = ContextBuilder(max_tokens=100, counter=WordCounter(), max_overlap=50)
+        docs = [
+            chunk("beta gamma delta", "a.md", 1),
+            chunk("other text", "b.md", 0),
+            chunk("alpha beta gamma", "a.md", 0),
+            chunk("beta gamma delta", "a.md", 1),
+        ]
+        result = builder.build(docs)
+
+        # a.mdの0と1は順番に並び、重複部分は1度だけ
+        assert result.context == "alpha beta gamma\n\ndelta\n\nother text"
+        assert result.dropped == 1
+        assert builder.stats()["tokens_saved"] == result.tokens_saved > 0
+
+    def test_oversized_top_chunk_is_truncated(self):
+        """🔴 Red: 上限を超える最上位チャンクは切り詰めて使うことのテスト"""
+        builder = ContextBuilder(max_tokens=3, counter=WordCounter())
+        result = builder.build([chunk("a b c d e f")])
+        assert result.context == "a b c"
+        assert result.tokens == 3
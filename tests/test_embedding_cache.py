@@ -0,0 +1,122 @@
+import pytest
+import time
+import sqlite3
+from embedding_cache import QueryEmbeddingCache, ChunkEmbeddingCache, normalize_query
+
+
+class TestQueryEmbeddingCache:
+    
+    def test_normalize_query(self):
+        """🔴 Red: クエリ正規化のテスト"""
+        assert normalize_query("  What is  Sector Rotation? ") == "what is sector rotation?"
+        # 全角英数字は半角に揃える
+        assert normalize_query("ＣＰＰＩとは") == "cppiとは"
+    
+    def test_hit_and_miss_counters(self):
+        """🔴 Red: ヒット・ミスカウンタのテスト"""
+        cache = QueryEmbeddingCache(max_size=10)
+        assert cache.get("question", "model-a") is None
+        cache.put("question", "model-a", [0.1, 0.2])
+        
+        assert cache.get("  QUESTION ", "model-a") == [0.1, 0.2]
+        # モデルが違えば別エントリ
+        assert cache.get("question", "model-b") is None
+        
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+    
+    def test_lru_eviction(self):
+        """🔴 Red: LRU退避のテスト"""
+        cache = QueryEmbeddingCache(max_size=2)
+        cache.put("a", "m", [1.0])
+        cache.put("b", "m", [2.0])
+        cache.get("a", "m")  # aを最近使用に
+        cache.put("c", "m", [3.0])
+        
+        assert cache.get("a", "m") == [1.0]
+        assert cache.get("b", "m") is None
+        assert cache.get("c", "m") == [3.0]
+    
+    def test_ttl_expiry(self):
+        """🔴 Red: TTL失効のテスト"""
+        cache = QueryEmbeddingCache(max_size=10, ttl_seconds=0.05)
+        cache.put("a", "m", [1.0])
+        time.sleep(0.1)
+        assert cache.get("a", "m") is None
+    
+    def test_persistent_store_survives_restart(self, tmp_path):
+        """🔴 Red: ディスク永続化で再起動後もヒットすることのテスト"""
+        db_path = str(tmp_path / "query_embeddings.sqlite")
+        cache = QueryEmbeddingCache(max_size=10, persist_path=db_path)
+        cache.put("sector rotation", "m", [0.5, -0.25])
+        cache.close()
+        
+        restarted = QueryEmbeddingCache(max_size=10, persist_path=db_path)
+        assert restarted.get("sector rotation", "m") == [0.5, -0.25]
+        restarted.close()
+    
+    def test_put_writes_behind(self, tmp_path):
+        """🔴 Red: putはディスクに書かず、書き込みはバックグラウンドでまとめて行うことのテスト"""
+        db_path = str(tmp_path / "query_embeddings.sqlite")
+        
+        def stored_rows():
+            with sqlite3.connect(db_path) as db:
+                return db.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()[0]
+        
+        cache = QueryEmbeddingCache(max_size=10, persist_path=db_path, flush_interval=60)
+        cache.put("a", "m", [1.0])
+        cache.put("b", "m", [2.0])
+        assert cache.get("a", "m") == [1.0]
+        assert stored_rows() == 0
+        cache.close()
+        assert stored_rows() == 2
+        
+        cache = QueryEmbeddingCache(max_size=10, persist_path=db_path, flush_interval=0.01)
+        cache.put("c", "m", [3.0])
+        deadline = time.time() + 5
+        while stored_rows() < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        assert stored_rows() == 3
+        cache.close()
+
+
+
+class TestChunkEmbeddingCache:
+    
+    def test_put_and_get(self, tmp_path):
+        """🔴 Red: チャンク埋め込みの保存・取得のテスト"""
+        cache = ChunkEmbeddingCache(str(tmp_path), "text-embedding-3-small")
+        cache.put_many(["chunk a", "chunk b"], [[1.0, 2.0], [3.0, 4.0]])
+        
+        assert cache.get_many(["chunk b", "chunk c", "chunk a"]) == [[3.0, 4.0], None, [1.0, 2.0]]
+        assert cache.stats()["hits"] == 2
+        assert cache.stats()["misses"] == 1
+    
+    def test_persisted_across_instances(self, tmp_path):
+        """🔴 Red: 再読み込み後も埋め込みが再利用できることのテスト"""
+        ChunkEmbeddingCache(str(tmp_path), "m").put_many(["chunk a"], [[0.5, 0.25]])
+        ChunkEmbeddingCache(str(tmp_path), "m").put_many(["chunk b"], [[0.75, 1.0]])
+        
+        reopened = ChunkEmbeddingCache(str(tmp_path), "m")
+        assert reopened.get_many(["chunk a", "chunk b"]) == [[0.5, 0.25], [0.75, 1.0]]
+    
+    def test_model_is_part_of_key(self, tmp_path):
+        """🔴 Red: 埋め込みモデルが違えば再利用しないことのテスト"""
+        ChunkEmbeddingCache(str(tmp_path), "model-a").put_many(["chunk"], [[1.0]])
+        assert ChunkEmbeddingCache(str(tmp_path), "model-b").get_many(["chunk"]) == [None]
+    
+    def test_torn_append_is_recovered(self, tmp_path):
+        """🔴 Red: 書き込み途中でクラッシュした残骸があっても読み書きできることのテスト"""
+        cache = ChunkEmbeddingCache(str(tmp_path), "m")
+        cache.put_many(["chunk a"], [[0.5, 0.25]])
+        # Crash mid-append: a full unindexed row plus a partial row
+        with open(cache.vectors_path, 'ab') as f:
+            f.write(b"\x00" * 8 + b"\x01" * 6)
+        
+        reopened = ChunkEmbeddingCache(str(tmp_path), "m")
+        assert reopened.get_many(["chunk a"]) == [[0.5, 0.25]]
+        reopened.put_many(["chunk b"], [[0.75, 1.0]])
+        assert reopened.get_many(["chunk a", "chunk b"]) == [[0.5, 0.25], [0.75, 1.0]]
+        assert reopened.vectors_path.stat().st_size == 2 * 2 * 4
+        assert ChunkEmbeddingCache(str(tmp_path), "m").get_many(["chunk b"]) == [[0.75, 1.0]]
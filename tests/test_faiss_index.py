@@ -0,0 +1,77 @@
+import pytest
+import numpy as np
+from faiss_index import (
+    build_index, apply_search_params, index_factory_string, auto_nlist,
+    pq_subquantizers, supports_removal, remove_positions
+)
+
+
+def random_vectors(n, dim=16, seed=0):
+    return np.random.default_rng(seed).random((n, dim), dtype=np.float32)
+
+
+class TestFaissIndex:
+
+    def test_factory_strings(self):
+        """🔴 Red: インデックス種類ごとのfactory文字列のテスト"""
+        assert index_factory_string("flat", 16, 1000) == "Flat"
+        assert index_factory_string("ivf", 16, 1000, nlist=8) == "IVF8,Flat"
+        assert index_factory_string("hnsw", 16, 1000, hnsw_m=16) == "HNSW16"
+        assert index_factory_string("ivfpq", 16, 1000, nlist=8, pq_m=4) == "IVF8,PQ4x8"
+        with pytest.raises(ValueError):
+            index_factory_string("annoy", 16, 1000)
+
+    def test_auto_parameters(self):
+        """🔴 Red: nlist自動決定とPQ分割数調整のテスト"""
+        assert auto_nlist(10000) == 256
+        assert auto_nlist(10) == 1
+        # 1536次元は16で割り切れるがPQ数は次元の約数に揃える
+        assert pq_subquantizers(1536, 16) == 16
+        assert pq_subquantizers(100, 16) == 10
+
+    @pytest.mark.parametrize("index_type", ["ivf", "hnsw", "pq", "ivfpq"])
+    def test_build_and_search(self, index_type):
+        """🔴 Red: 各インデックスが学習・検索できることのテスト"""
+        vectors = random_vectors(1000)
+        index = build_index(vectors, index_type, nlist=8, hnsw_m=16, pq_m=4, pq_nbits=4)
+        apply_search_params(index, nprobe=8, ef_search=64)
+        index.add(vectors)
+
+        _, ids = index.search(vectors[:5], 1)
+        # PQは近似なので完全一致ではなく大半が自分自身を返せばよい
+        assert (ids[:, 0] == np.arange(5)).sum() >= 3
+
+    def test_small_corpus_falls_back_to_flat(self):
+        """🔴 Red: 学習データが足りない場合はフラットになることのテスト"""
+        index = build_index(random_vectors(50), "pq", pq_m=4)
+        assert index.is_trained
+        assert supports_removal(index)
+        assert type(index).__name__ == "IndexFlat"
+
+    def test_apply_search_params(self):
+        """🔴 Red: nprobe / efSearch 設定のテスト"""
+        vectors = random_vectors(500)
+        ivf = build_index(vectors, "ivf", nlist=4)
+        apply_search_params(ivf, nprobe=3)
+        assert ivf.nprobe == 3
+
+        hnsw = build_index(vectors, "hnsw", hnsw_m=8)
+        apply_search_params(hnsw, ef_search=99)
+        assert hnsw.hnsw.efSearch == 99
+        assert not supports_removal(hnsw)
+
+    @pytest.mark.parametrize("index_type", ["flat", "ivf", "ivfpq"])
+    def test_remove_positions_renumbers(self, index_type):
+        """🔴 Red: 削除後に残りのベクトルが0..n-1へ詰め直されることのテスト"""
+        vectors = random_vectors(1000)
+        index = build_index(vectors, index_type, nlist=8, pq_m=4, pq_nbits=4)
+        apply_search_params(index, nprobe=8)
+        index.add(vectors)
+
+        remove_positions(index, [0, 1, 2, 500])
+        assert index.ntotal == 996
+        remaining = np.delete(vectors, [0, 1, 2, 500], axis=0)
+        _, ids = index.search(remaining[[0, 497, 995]], 1)
+        assert ids.max() < index.ntotal
+        if index_type != "ivfpq":
+            assert list(ids[:, 0]) == [0, 497, 995]
@@ -1,7 +1,12 @@
 import pytest
+import time
+import httpx
 from pathlib import Path
 from unittest.mock import Mock, patch
-from ingest import KnowledgeIngester
+from openai import RateLimitError
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from ingest import KnowledgeIngester, IncrementalIngester, ParallelBatchEmbeddings, write_store_version, read_store_version
+from embedding_cache import ChunkEmbeddingCache
 
 class TestKnowledgeIngester:
     
@@ -97,4 +102,284 @@ class TestKnowledgeIngester:
                     # 結果がリストであることを確認
                     assert isinstance(result, list)
                     mock_load.assert_called_once()
-                    mock_save.assert_called_once() 
\ No newline at end of file
+                    mock_save.assert_called_once() 
+    
+    def test_store_version_roundtrip(self, tmp_path):
+        """🔴 Red: ベクトルストア版数の書き込み・読み込みのテスト"""
+        assert read_store_version(str(tmp_path)) == "unversioned"
+        first = write_store_version(str(tmp_path))
+        assert read_store_version(str(tmp_path)) == first
+        second = write_store_version(str(tmp_path))
+        assert second != first
+        assert read_store_version(str(tmp_path)) == second
+
+
+
+class TestParallelBatchEmbeddings:
+    
+    def test_batches_preserve_order(self):
+        """🔴 Red: 並列バッチ埋め込みで順序が保たれることのテスト"""
+        inner = Mock()
+        inner.embed_documents.side_effect = lambda batch: [[float(text)] for text in batch]
+        embeddings = ParallelBatchEmbeddings(inner, batch_size=3, max_concurrency=4)
+        
+        texts = [str(i) for i in range(10)]
+        vectors = embeddings.embed_documents(texts)
+        
+        assert vectors == [[float(i)] for i in range(10)]
+        assert inner.embed_documents.call_count == 4
+        assert embeddings.stats["chunks"] == 10
+        assert embeddings.stats["batches"] == 4
+    
+    def test_batches_run_concurrently(self):
+        """🔴 Red: バッチが同時実行されることのテスト"""
+        def slow_embed(batch):
+            time.sleep(0.1)
+            return [[0.0] for _ in batch]
+        
+        inner = Mock()
+        inner.embed_documents.side_effect = slow_embed
+        embeddings = ParallelBatchEmbeddings(inner, batch_size=1, max_concurrency=8)
+        
+        start = time.perf_counter()
+        embeddings.embed_documents(["t"] * 8)
+        # 直列なら0.8秒かかる
+        assert time.perf_counter() - start < 0.4
+    
+    def test_retry_on_rate_limit(self):
+        """🔴 Red: レート制限時にリトライすることのテスト"""
+        response = httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com/v1/embeddings"))
+        rate_limit = RateLimitError("rate limited", response=response, body=None)
+        
+        inner = Mock()
+        inner.embed_documents.side_effect = [rate_limit, [[1.0]]]
+        embeddings = ParallelBatchEmbeddings(inner, batch_size=10, max_retries=3, backoff_base=0)
+        
+        assert embeddings.embed_documents(["text"]) == [[1.0]]
+        assert embeddings.stats["retries"] == 1
+
+    
+    def test_unchanged_chunks_skip_api(self, tmp_path):
+        """🔴 Red: キャッシュ済みチャンクでは埋め込みAPIを呼ばないことのテスト"""
+        inner = Mock()
+        inner.embed_documents.side_effect = lambda batch: [[float(len(text))] for text in batch]
+        
+        first = ParallelBatchEmbeddings(inner, cache=ChunkEmbeddingCache(str(tmp_path), "m"))
+        first.embed_documents(["a", "bb", "a"])
+        # 同じテキストは1回だけ埋め込む
+        assert inner.embed_documents.call_args.args[0] == ["a", "bb"]
+        
+        inner.embed_documents.reset_mock()
+        rebuilt = ParallelBatchEmbeddings(inner, cache=ChunkEmbeddingCache(str(tmp_path), "m"))
+        vectors = rebuilt.embed_documents(["a", "bb", "a"])
+        
+        assert vectors == [[1.0], [2.0], [1.0]]
+        inner.embed_documents.assert_not_called()
+        assert rebuilt.stats["cached"] == 3
+
+
+
+class TestIncrementalIngester:
+    
+    def make_ingester(self, tmp_path):
+        """tmp_path配下に閉じたIncrementalIngesterを作成"""
+        with patch('ingest.OpenAIEmbeddings'):
+            ingester = IncrementalIngester()
+        ingester.knowledge_path = str(tmp_path / "knowledge")
+        ingester.vector_store_path = str(tmp_path / "vector_store")
+        ingester.metadata_file = tmp_path / "vector_store" / "file_metadata.json"
+        ingester.embeddings = ParallelBatchEmbeddings(DeterministicFakeEmbedding(size=8))
+        (tmp_path / "knowledge").mkdir()
+        return ingester
+    
+    def write_file(self, tmp_path, name, paragraphs):
+        path = tmp_path / "knowledge" / name
+        path.write_text("\n\n".join(paragraphs), encoding="utf-8")
+        return str(path)
+    
+    def test_update_replaces_chunks(self, tmp_path):
+        """🔴 Red: 更新時に古いチャンクが置き換えられ重複しないことのテスト"""
+        ingester = self.make_ingester(tmp_path)
+        ingester.text_splitter._chunk_size = 20
+        ingester.text_splitter._chunk_overlap = 0
+        path = self.write_file(tmp_path, "a.md", ["first paragraph", "second paragraph"])
+        
+        assert ingester.add_knowledge_file(path)
+        size_before = ingester._load_existing_vector_store().index.ntotal
+        
+        self.write_file(tmp_path, "a.md", ["first paragraph", "changed paragraph"])
+        assert ingester.update_knowledge_file(path)
+        
+        store = ingester._load_existing_vector_store()
+        assert store.index.ntotal == size_before
+        contents = [store.docstore.search(i).page_content for i in store.index_to_docstore_id.values()]
+        assert "changed paragraph" in contents
+        assert "second paragraph" not in contents
+        assert ingester._load_metadata()[path]["chunk_ids"] == ["a.md::0", "a.md::1"]
+    
+    def test_failed_embedding_keeps_old_chunks(self, tmp_path):
+        """🔴 Red: 埋め込みに失敗しても既存チャンクが消えないことのテスト"""
+        ingester = self.make_ingester(tmp_path)
+        path = self.write_file(tmp_path, "a.md", ["first paragraph"])
+        ingester.incremental_update()
+        
+        self.write_file(tmp_path, "a.md", ["changed paragraph"])
+        with patch.object(ingester.embeddings, 'embed_documents', side_effect=RuntimeError("rate limited")):
+            stats = ingester.incremental_update()
+        assert stats["updated"] == 0
+        
+        store = ingester._load_existing_vector_store()
+        contents = [store.docstore.search(i).page_content for i in store.index_to_docstore_id.values()]
+        assert contents == ["first paragraph"]
+        
+        # The file is still seen as changed, so the next run retries it
+        assert ingester.incremental_update()["updated"] == 1
+    
+    def test_remove_deletes_vectors(self, tmp_path):
+        """🔴 Red: ファイル削除でベクトルも削除されることのテスト"""
+        ingester = self.make_ingester(tmp_path)
+        keep = self.write_file(tmp_path, "keep.md", ["keep me"])
+        drop = self.write_file(tmp_path, "drop.md", ["drop me"])
+        ingester.add_knowledge_file(keep)
+        ingester.add_knowledge_file(drop)
+        
+        assert ingester.remove_knowledge_file(drop)
+        
+        store = ingester._load_existing_vector_store()
+        sources = [store.docstore.search(i).metadata["source"] for i in store.index_to_docstore_id.values()]
+        assert sources == [keep]
+        assert drop not in ingester._load_metadata()
+    
+    def test_compact_removes_orphans_and_duplicates(self, tmp_path):
+        """🔴 Red: コンパクションで孤立・重複ベクトルが除去されることのテスト"""
+        from langchain.schema import Document
+        
+        ingester = self.make_ingester(tmp_path)
+        path = self.write_file(tmp_path, "a.md", ["content"])
+        ingester.add_knowledge_file(path)
+        
+        # 旧方式で追加された重複チャンクと、削除済みファイルのチャンクを混入
+        store = ingester._load_existing_vector_store()
+        store.add_documents([
+            Document(page_content="content", metadata={"source": path, "chunk_id": 0}),
+            Document(page_content="gone", metadata={"source": "deleted.md", "chunk_id": 0}),
+        ])
+        ingester.save_vector_store(store)
+        
+        stats = ingester.compact()
+        
+        assert stats == {"removed": 2, "remaining": 1}
+        store = ingester._load_existing_vector_store()
+        assert list(store.index_to_docstore_id.values()) == ["a.md::0"]
+
+    
+    def test_incremental_update_loads_and_saves_once(self, tmp_path):
+        """🔴 Red: インクリメンタル更新でストアの読み書きが1回ずつであることのテスト"""
+        ingester = self.make_ingester(tmp_path)
+        first = self.write_file(tmp_path, "a.md", ["alpha"])
+        removed = self.write_file(tmp_path, "b.md", ["beta"])
+        ingester.incremental_update()
+        
+        self.write_file(tmp_path, "a.md", ["alpha changed"])
+        Path(removed).unlink()
+        for name in ["c.md", "d.md", "e.md"]:
+            self.write_file(tmp_path, name, [name])
+        
+        with patch.object(ingester, '_load_existing_vector_store', wraps=ingester._load_existing_vector_store) as mock_load, \
+             patch.object(ingester, 'save_vector_store', wraps=ingester.save_vector_store) as mock_save:
+            stats = ingester.incremental_update()
+        
+        assert (stats["added"], stats["updated"], stats["removed"]) == (3, 1, 1)
+        assert mock_load.call_count == 1
+        assert mock_save.call_count == 1
+        assert "io_seconds" in stats and "embedding_seconds" in stats
+        
+        store = ingester._load_existing_vector_store()
+        assert store.index.ntotal == 4
+        assert sorted(Path(p).name for p in ingester._load_metadata()) == ["a.md", "c.md", "d.md", "e.md"]
+        # 一時ディレクトリが残っていないこと
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["knowledge", "vector_store"]
+
+    
+    def test_edit_during_embedding_is_picked_up(self, tmp_path):
+        """🔴 Red: 埋め込み中にファイルが編集されても次回の実行で取り込まれることのテスト"""
+        import os
+        ingester = self.make_ingester(tmp_path)
+        path = self.write_file(tmp_path, "a.md", ["first version"])
+        embed = ingester.embeddings.embed_documents
+        
+        def edit_while_embedding(texts):
+            self.write_file(tmp_path, "a.md", ["second version!"])
+            stat = os.stat(path)
+            os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+            return embed(texts)
+        
+        with patch.object(ingester.embeddings, 'embed_documents', side_effect=edit_while_embedding):
+            ingester.incremental_update()
+        
+        assert ingester.incremental_update()["updated"] == 1
+        store = ingester._load_existing_vector_store()
+        contents = [store.docstore.search(i).page_content for i in store.index_to_docstore_id.values()]
+        assert contents == ["second version!"]
+    
+    def test_noop_run_skips_hashing(self, tmp_path):
+        """🔴 Red: サイズ・mtimeが同じならハッシュ計算しないことのテスト"""
+        import os
+        ingester = self.make_ingester(tmp_path)
+        path = self.write_file(tmp_path, "a.md", ["alpha"])
+        ingester.incremental_update()
+        
+        with patch.object(ingester, '_calculate_file_hash') as mock_hash:
+            stats = ingester.incremental_update()
+        assert stats["unchanged"] == 1
+        mock_hash.assert_not_called()
+        
+        # 内容は同じでmtimeだけ変わった場合は一度だけハッシュを確認する
+        stat = os.stat(path)
+        os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+        with patch.object(ingester, '_calculate_file_hash', wraps=ingester._calculate_file_hash) as mock_hash:
+            stats = ingester.incremental_update()
+            assert stats["unchanged"] == 1
+            assert mock_hash.call_count == 1
+            ingester.incremental_update()
+            assert mock_hash.call_count == 1
+    
+    def test_ann_index_type(self, tmp_path):
+        """🔴 Red: HNSWインデックスで構築でき、削除は明示的に拒否されることのテスト"""
+        ingester = self.make_ingester(tmp_path)
+        ingester.index_type = "hnsw"
+        documents = [
+            {"page_content": f"chunk {i}", "metadata": {"source": "a.md", "document_id": f"id-{i}"}}
+            for i in range(30)
+        ]
+        
+        vector_store = ingester.create_vector_store(documents)
+        assert hasattr(vector_store.index, "hnsw")
+        assert vector_store.index.ntotal == 30
+        docs = vector_store.similarity_search("chunk 7", k=1)
+        assert docs[0].page_content == "chunk 7"
+        
+        with pytest.raises(ValueError):
+            ingester._delete_chunks(vector_store, ["id-0"])
+    
+    def test_ivf_delete_then_search(self, tmp_path):
+        """🔴 Red: IVFストアから削除した後も検索が正しいチャンクを返すことのテスト"""
+        ingester = self.make_ingester(tmp_path)
+        ingester.index_type = "ivf"
+        documents = [
+            {"page_content": f"chunk {i}", "metadata": {"source": "a.md", "document_id": f"id-{i}"}}
+            for i in range(40)
+        ]
+        
+        with patch('ingest.Config.FAISS_IVF_NLIST', 4), patch('ingest.Config.FAISS_IVF_NPROBE', 4):
+            vector_store = ingester.create_vector_store(documents)
+        assert type(vector_store.index).__name__ == "IndexIVFFlat"
+        ingester._delete_chunks(vector_store, [f"id-{i}" for i in range(0, 40, 3)])
+        
+        assert vector_store.index.ntotal == 26
+        assert sorted(vector_store.index_to_docstore_id) == list(range(26))
+        for i in (1, 20, 38):
+            docs = vector_store.similarity_search(f"chunk {i}", k=1)
+            assert docs[0].page_content == f"chunk {i}"
+        docs = vector_store.similarity_search("chunk 3", k=26)
+        assert "chunk 3" not in [doc.page_content for doc in docs]
@@ -0,0 +1,41 @@
+import pytest
+from unittest.mock import patch
+from language_detection import LanguageDetector, detect_by_script
+
+
+class TestLanguageDetection:
+
+    def test_script_fast_path(self):
+        """🔴 Red: 文字種だけで判定できる質問の高速判定のテスト"""
+        assert detect_by_script("What is CPPI?") == "english"
+        assert detect_by_script("CPPIとは何ですか") == "japanese"
+        # 英文中の日本語の用語や漢字だけの文は統計的判定に回す
+        assert detect_by_script("What does リスク mean in this context?") is None
+        assert detect_by_script("資産配分") is None
+
+    def test_fast_path_skips_detector(self):
+        """🔴 Red: 高速判定できる場合はlangdetectを呼ばないことのテスト"""
+        detector = LanguageDetector()
+        with patch('language_detection.detect') as mock_detect:
+            assert detector.detect("ポートフォリオの分散とは？") == "japanese"
+            assert detector.detect("How do I rebalance?") == "english"
+            mock_detect.assert_not_called()
+        assert detector.stats()["fast_path"] == 2
+
+    def test_detector_results_are_memoized(self):
+        """🔴 Red: langdetectの結果がキャッシュされることのテスト"""
+        detector = LanguageDetector()
+        with patch('language_detection.detect', return_value="ja") as mock_detect:
+            assert detector.detect("資産配分") == "japanese"
+            assert detector.detect("資産配分") == "japanese"
+            mock_detect.assert_called_once()
+        assert detector.stats()["cache_hits"] == 1
+
+    def test_unsupported_languages_and_errors_fall_back_to_english(self):
+        """🔴 Red: 未対応言語や判定エラー時は英語になることのテスト"""
+        detector = LanguageDetector(cache_size=1)
+        with patch('language_detection.detect', return_value="zh-cn"):
+            assert detector.detect("资产配置") == "english"
+        with patch('language_detection.detect', side_effect=Exception("no features")):
+            assert detector.detect("¿¡") == "english"
+        assert detector.stats()["cached"] == 1
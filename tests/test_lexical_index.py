@@ -0,0 +1,68 @@
+import pytest
+from langchain.schema import Document
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from lexical_index import (
+    BM25Index, HybridSearcher, tokenize, reciprocal_rank_fusion,
+    write_lexical_index, load_lexical_index
+)
+
+TEXTS = [
+    "CPPI戦略はフロアを守りながらリスク資産の比率を調整する",
+    "ミネルヴィニのトレンドテンプレートは株価が移動平均線の上にあることを求める",
+    "EP six conditions are checked before entering a position",
+    "セクターローテーションは景気循環に応じて業種を入れ替える",
+]
+
+
+class TestLexicalIndex:
+
+    def test_tokenize(self):
+        """🔴 Red: 英単語はそのまま、日本語は2文字ずつに分割するテスト"""
+        assert tokenize("ＣＰＰＩ戦略") == ["cppi", "戦略"]
+        assert tokenize("EP six") == ["ep", "six"]
+        assert tokenize("景気循環") == ["景気", "気循", "循環"]
+
+    def test_exact_term_ranks_first(self):
+        """🔴 Red: 完全一致する専門用語のチャンクが最上位になるテスト"""
+        index = BM25Index.build(TEXTS)
+        positions, scores, coverage = index.search("CPPI", 3)
+        assert positions == [0]
+        assert coverage == 1.0
+
+        positions, _, _ = index.search("ミネルヴィニ", 3)
+        assert positions[0] == 1
+
+        # 知らない語が多い質問は確信度が低い
+        _, _, coverage = index.search("what is the EP rule", 3)
+        assert coverage < 0.9
+
+    def test_save_and_load(self, tmp_path):
+        """🔴 Red: 永続化したインデックスが同じ結果を返すテスト"""
+        store = FAISS.from_texts(TEXTS, DeterministicFakeEmbedding(size=8))
+        built = write_lexical_index(str(tmp_path), store)
+        loaded = load_lexical_index(str(tmp_path))
+
+        assert len(loaded) == len(TEXTS)
+        assert loaded.search("景気循環", 2) == built.search("景気循環", 2)
+        assert load_lexical_index(str(tmp_path / "missing")) is None
+
+    def test_reciprocal_rank_fusion(self):
+        """🔴 Red: 両方の順位で上位の文書が先頭に来るRRFのテスト"""
+        a, b, c = (Document(page_content=t) for t in "abc")
+        fused = reciprocal_rank_fusion([[a, b, c], [b, c]], k=60)
+        assert [d.page_content for d in fused] == ["b", "c", "a"]
+
+    def test_hybrid_searcher_confidence(self):
+        """🔴 Red: キーワードが十分一致した場合のみ埋め込み省略と判定するテスト"""
+        store = FAISS.from_texts(TEXTS, DeterministicFakeEmbedding(size=8))
+        index = BM25Index.build(TEXTS)
+        searcher = HybridSearcher(lexical_k=3, confidence=0.9)
+
+        result = searcher.search_lexical(index, store, "EP six conditions")
+        assert result.confident
+        assert result.documents[0].page_content == TEXTS[2]
+
+        result = searcher.search_lexical(index, store, "how do I pick sectors")
+        assert not result.confident
+        assert searcher.stats()["embeddings_skipped"] == 1
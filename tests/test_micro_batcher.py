@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from micro_batcher import MicroBatcher
+
+
+class TestMicroBatcher:
+
+    def test_concurrent_items_share_a_batch(self):
+        """🔴 Red: 待ち時間内に届いた要求が1回のバッチ処理にまとめられるテスト"""
+        batches = []
+
+        async def process(items):
+            batches.append(list(items))
+            return [item * 2 for item in items]
+
+        batcher = MicroBatcher(process, max_batch_size=10, max_wait_ms=5)
+
+        async def run():
+            return await asyncio.gather(*[batcher.submit(i) for i in range(4)])
+
+        assert asyncio.run(run()) == [0, 2, 4, 6]
+        assert batches == [[0, 1, 2, 3]]
+        stats = batcher.stats()
+        assert stats["batches"] == 1
+        assert stats["avg_batch_size"] == 4
+        assert stats["avg_queue_ms"] > 0
+
+    def test_idle_submission_does_not_wait(self):
+        """🔴 Red: 実行中のバッチがなければ待ち時間なしで処理するテスト"""
+        async def process(items):
+            return items
+
+        batcher = MicroBatcher(process, max_batch_size=10, max_wait_ms=10000)
+
+        async def run():
+            return await asyncio.wait_for(batcher.submit(1), 1)
+
+        assert asyncio.run(run()) == 1
+
+    def test_items_queue_behind_running_batch(self):
+        """🔴 Red: 実行中のバッチの間に届いた要求は次のバッチにまとめられるテスト"""
+        batches = []
+
+        async def process(items):
+            batches.append(list(items))
+            await asyncio.sleep(0.05)
+            return items
+
+        batcher = MicroBatcher(process, max_batch_size=10, max_wait_ms=10000)
+
+        async def run():
+            first = asyncio.ensure_future(batcher.submit(0))
+            await asyncio.sleep(0.01)
+            rest = [batcher.submit(i) for i in range(1, 4)]
+            return await asyncio.wait_for(asyncio.gather(first, *rest), 1)
+
+        assert asyncio.run(run()) == [0, 1, 2, 3]
+        assert batches == [[0], [1, 2, 3]]
+
+    def test_full_batch_flushes_immediately(self):
+        """🔴 Red: 最大バッチサイズに達したら待たずに処理するテスト"""
+        sizes = []
+
+        async def process(items):
+            sizes.append(len(items))
+            return items
+
+        batcher = MicroBatcher(process, max_batch_size=2, max_wait_ms=10000)
+
+        async def run():
+            return await asyncio.wait_for(asyncio.gather(*[batcher.submit(i) for i in range(4)]), 1)
+
+        assert asyncio.run(run()) == [0, 1, 2, 3]
+        assert sizes == [2, 2]
+
+    def test_errors_reach_every_caller(self):
+        """🔴 Red: バッチ処理の例外が全ての呼び出し元に伝わるテスト"""
+        async def process(items):
+            raise RuntimeError("boom")
+
+        batcher = MicroBatcher(process, max_wait_ms=1)
+
+        async def run():
+            return await asyncio.gather(batcher.submit(1), batcher.submit(2), return_exceptions=True)
+
+        results = asyncio.run(run())
+        assert all(isinstance(r, RuntimeError) for r in results)
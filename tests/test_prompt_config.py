@@ -0,0 +1,53 @@
+import pytest
+from prompt_config import load_prompt_config, default_prompt_config, validate_settings
+
+
+PROMPT_YAML = """name: Test Advisor
+description: テスト用のアシスタント
+temperature: 0.2
+system_prompt: |
+  You are a test advisor.
+response_guidelines:
+  - Use bullet points
+"""
+
+
+class TestPromptConfig:
+
+    def test_load_renders_once_and_freezes(self, tmp_path):
+        """🔴 Red: 設定を1度だけ解析し、変更不可の構造で保持することのテスト"""
+        path = tmp_path / "prompt.yaml"
+        path.write_text(PROMPT_YAML, encoding="utf-8")
+        prompt = load_prompt_config(str(path))
+
+        assert "「Test Advisor」" in prompt.system_prompt
+        assert "- Use bullet points" in prompt.system_prompt
+        assert prompt.templates["english"].template.startswith("You are a test advisor.")
+        assert prompt.mtime is not None and not prompt.is_default
+        with pytest.raises(TypeError):
+            prompt.settings["name"] = "changed"
+        assert isinstance(prompt.settings["response_guidelines"], tuple)
+
+    def test_version_follows_content(self, tmp_path):
+        """🔴 Red: バージョンハッシュが内容が変わった時だけ変わることのテスト"""
+        path = tmp_path / "prompt.yaml"
+        path.write_text(PROMPT_YAML, encoding="utf-8")
+        first = load_prompt_config(str(path)).version
+        assert load_prompt_config(str(path)).version == first
+
+        path.write_text(PROMPT_YAML.replace("0.2", "0.5"), encoding="utf-8")
+        assert load_prompt_config(str(path)).version != first
+        assert default_prompt_config().is_default
+
+    def test_invalid_settings_are_rejected(self, tmp_path):
+        """🔴 Red: 不正な設定は読み込み時にエラーになることのテスト"""
+        with pytest.raises(ValueError):
+            validate_settings(["not", "a", "mapping"])
+        with pytest.raises(ValueError):
+            validate_settings({"temperature": "hot"})
+
+        # system_prompt中の波括弧はリクエスト時ではなく読み込み時に検出する
+        path = tmp_path / "prompt.yaml"
+        path.write_text("system_prompt: 'Reply as {persona}'\n", encoding="utf-8")
+        with pytest.raises(ValueError):
+            load_prompt_config(str(path))
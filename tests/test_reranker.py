@@ -0,0 +1,61 @@
+import time
+import pytest
+from langchain.schema import Document
+from reranker import Reranker, LexicalOverlapScorer, create_scorer
+
+
+def docs(*texts):
+    return [Document(page_content=t) for t in texts]
+
+
+class SlowScorer:
+    """バッチごとに時間がかかるスコアラー"""
+    name = "slow"
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.batches = []
+
+    def score(self, query, texts):
+        self.batches.append(len(texts))
+        time.sleep(self.delay)
+        return [float(len(t)) for t in texts]
+
+
+class TestReranker:
+
+    def test_lexical_overlap_scorer(self):
+        """🔴 Red: クエリ語の一致割合でスコアを付けるテスト"""
+        scorer = LexicalOverlapScorer()
+        assert scorer.score("CPPI floor", ["CPPI keeps a floor", "CPPI only", "other"]) == [1.0, 0.5, 0.0]
+
+    def test_reorders_and_truncates(self):
+        """🔴 Red: スコア順に並べ替えてtop_n件に絞るテスト"""
+        reranker = Reranker(LexicalOverlapScorer(), top_n=2, batch_size=2)
+        result = reranker.rerank("CPPI floor", docs("unrelated", "CPPI only", "CPPI keeps a floor"))
+        assert [d.page_content for d in result.documents] == ["CPPI keeps a floor", "CPPI only"]
+        assert result.scored == 3
+        assert not result.timed_out
+
+    def test_ties_keep_retrieval_order(self):
+        """🔴 Red: 同点の場合は検索結果の順位を保つテスト"""
+        reranker = Reranker(LexicalOverlapScorer(), top_n=3)
+        result = reranker.rerank("CPPI", docs("a CPPI", "b", "c CPPI"))
+        assert [d.page_content for d in result.documents] == ["a CPPI", "c CPPI", "b"]
+
+    def test_time_budget(self):
+        """🔴 Red: 時間予算を超えたら残りを元の順位のまま返すテスト"""
+        scorer = SlowScorer(delay=0.05)
+        reranker = Reranker(scorer, top_n=4, batch_size=2, time_budget_ms=10)
+        result = reranker.rerank("q", docs("a", "bbb", "cc", "dddd"))
+
+        # 最初のバッチだけスコア計算される
+        assert scorer.batches == [2]
+        assert result.timed_out
+        assert [d.page_content for d in result.documents] == ["bbb", "a", "cc", "dddd"]
+        assert reranker.stats()["timeouts"] == 1
+
+    def test_unknown_model_falls_back(self):
+        """🔴 Red: モデルが使えない場合は語の重なりスコアにフォールバックするテスト"""
+        assert create_scorer("lexical").name == "lexical"
+        assert create_scorer("no-such/cross-encoder").name == "lexical"
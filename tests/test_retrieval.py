@@ -0,0 +1,114 @@
+import pytest
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.embeddings import Embeddings
+from retrieval import DocumentRetriever, distance_to_similarity
+from faiss_index import build_index, apply_search_params
+
+
+class TableEmbeddings(Embeddings):
+    """テキストごとに決めた単位ベクトルを返す埋め込み"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        vec = np.asarray(self.table[text], dtype=np.float32)
+        return (vec / np.linalg.norm(vec)).tolist()
+
+
+@pytest.fixture
+def store():
+    table = {
+        "query": [1, 0, 0],
+        "exact": [1, 0, 0],
+        "close": [0.95, 0.3, 0],
+        "near-duplicate": [0.95, 0.31, 0],
+        "weak": [0.2, 1, 0],
+        "unrelated": [0, 0, 1],
+    }
+    embeddings = TableEmbeddings(table)
+    texts = [t for t in table if t != "query"]
+    return FAISS.from_texts(texts, embeddings), embeddings.embed_query("query")
+
+
+def contents(result):
+    return [d.page_content for d in result.documents]
+
+
+class TestDocumentRetriever:
+
+    def test_distance_to_similarity(self):
+        """🔴 Red: 二乗L2距離からコサイン類似度への変換のテスト"""
+        assert distance_to_similarity(0.0) == 1.0
+        assert distance_to_similarity(2.0) == 0.0
+
+    def test_similarity(self, store):
+        """🔴 Red: 従来どおりのtop-k検索のテスト"""
+        vector_store, query = store
+        result = DocumentRetriever("similarity", k=3).search(vector_store, query)
+        assert contents(result)[0] == "exact"
+        assert len(result.documents) == 3
+        assert result.dropped == 0
+
+    def test_threshold_drops_weak_matches(self, store):
+        """🔴 Red: 類似度しきい値未満のチャンクを除外することのテスト"""
+        vector_store, query = store
+        retriever = DocumentRetriever("threshold", k=5, score_threshold=0.5)
+        result = retriever.search(vector_store, query)
+        assert contents(result) == ["exact", "close", "near-duplicate"]
+        assert result.dropped == 2
+        assert all(score >= 0.5 for score in result.scores)
+        assert retriever.stats()["chunks_dropped"] == 2
+
+    def test_mmr_prefers_diverse_chunks(self, store):
+        """🔴 Red: MMRがほぼ重複したチャンクを避けることのテスト"""
+        vector_store, query = store
+        result = DocumentRetriever("mmr", k=2, fetch_k=5, mmr_lambda=0.3).search(vector_store, query)
+        assert contents(result)[0] == "exact"
+        assert "near-duplicate" not in contents(result)
+        assert result.candidates == 5
+
+    def test_mmr_on_ivf_index(self, store):
+        """🔴 Red: IVFインデックスでもMMR検索できることのテスト"""
+        flat_store, query = store
+        texts = [flat_store.docstore.search(i).page_content for i in flat_store.index_to_docstore_id.values()]
+        embeddings = flat_store.embedding_function
+        vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+        index = build_index(vectors, "ivf", nlist=2)
+        apply_search_params(index, nprobe=2)
+        vector_store = FAISS(embeddings, index, InMemoryDocstore(), {})
+        vector_store.add_texts(texts)
+
+        result = DocumentRetriever("mmr", k=2, fetch_k=5, mmr_lambda=0.3).search(vector_store, query)
+        assert contents(result)[0] == "exact"
+        assert "near-duplicate" not in contents(result)
+
+    def test_adaptive_stops_when_scores_fall(self, store):
+        """🔴 Red: 類似度が大きく下がった時点で打ち切ることのテスト"""
+        vector_store, query = store
+        result = DocumentRetriever("adaptive", k=5, min_k=1, adaptive_drop=0.1).search(vector_store, query)
+        assert contents(result) == ["exact", "close", "near-duplicate"]
+
+        # min_kまでは必ず残す
+        result = DocumentRetriever("adaptive", k=5, min_k=4, adaptive_drop=0.0).search(vector_store, query)
+        assert len(result.documents) == 4
+
+    def test_unknown_strategy(self):
+        """🔴 Red: 未知の検索戦略はエラーになることのテスト"""
+        with pytest.raises(ValueError):
+            DocumentRetriever("random")
+
+    def test_search_batch_matches_single_queries(self, store):
+        """🔴 Red: 行列による一括検索が1件ずつの検索と同じ結果になるテスト"""
+        vector_store, query = store
+        other = [0.0, 0.0, 1.0]
+        for strategy in ("similarity", "threshold", "adaptive"):
+            retriever = DocumentRetriever(strategy, k=3, score_threshold=0.5, min_k=1)
+            batch = retriever.search_batch(vector_store, [query, other])
+            single = [retriever.search(vector_store, q) for q in (query, other)]
+            assert [contents(r) for r in batch] == [contents(r) for r in single]
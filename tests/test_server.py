@@ -1,8 +1,12 @@
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import json
-from server import app, RAGServer
+import time
+import asyncio
+import threading
+from server import app, RAGServer, load_faiss_store
+from config import Config
 
 class TestRAGServer:
     
@@ -39,6 +43,65 @@ class TestRAGServer:
             mock_faiss.load_local.assert_called_once()
             assert rag_server.vector_store == mock_vector_store
     
+    def test_load_faiss_mmap(self, tmp_path):
+        """🔴 Red: mmap読み込みが通常の読み込みと同じ検索結果を返すことのテスト"""
+        from langchain_community.vectorstores import FAISS
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        
+        embeddings = DeterministicFakeEmbedding(size=16)
+        texts = [f"チャンク{i}" for i in range(20)]
+        FAISS.from_texts(texts, embeddings).save_local(str(tmp_path))
+        
+        regular = FAISS.load_local(str(tmp_path), embeddings, allow_dangerous_deserialization=True)
+        mapped = load_faiss_store(str(tmp_path), embeddings, mmap=True)
+        
+        query = embeddings.embed_query("チャンク3")
+        expected = [d.page_content for d in regular.similarity_search_by_vector(query, k=5)]
+        actual = [d.page_content for d in mapped.similarity_search_by_vector(query, k=5)]
+        assert actual == expected
+        assert actual[0] == "チャンク3"
+    
+    def test_rewrite_while_mmapped(self, tmp_path):
+        """🔴 Red: mmap中のストアをETLで書き直してもサーバーが落ちないことのテスト"""
+        from langchain_community.vectorstores import FAISS
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from ingest import KnowledgeIngester
+        
+        embeddings = DeterministicFakeEmbedding(size=16)
+        with patch('ingest.OpenAIEmbeddings'):
+            ingester = KnowledgeIngester()
+        texts = [f"チャンク{i}" for i in range(200)]
+        ingester.save_vector_store(FAISS.from_texts(texts, embeddings), str(tmp_path))
+        mapped = load_faiss_store(str(tmp_path), embeddings, mmap=True)
+        
+        # A much smaller store replaces every file the server has mapped
+        ingester.save_vector_store(FAISS.from_texts(["新チャンク"], embeddings), str(tmp_path))
+        assert not list(tmp_path.glob(".staging-*"))
+        
+        query = embeddings.embed_query("チャンク150")
+        assert mapped.similarity_search_by_vector(query, k=1)[0].page_content == "チャンク150"
+        reloaded = load_faiss_store(str(tmp_path), embeddings, mmap=True)
+        assert reloaded.index.ntotal == 1
+    
+    def test_load_faiss_store_uses_chunk_store(self, tmp_path):
+        """🔴 Red: chunks.binがあればindex.pklを読まずに検索できることのテスト"""
+        from langchain_community.vectorstores import FAISS
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from chunk_store import ChunkStore, write_chunk_store
+        
+        embeddings = DeterministicFakeEmbedding(size=16)
+        store = FAISS.from_texts([f"チャンク{i}" for i in range(10)], embeddings,
+                                 metadatas=[{"source": f"doc{i}.md"} for i in range(10)])
+        store.save_local(str(tmp_path))
+        write_chunk_store(str(tmp_path), store)
+        (tmp_path / "index.pkl").unlink()
+        
+        loaded = load_faiss_store(str(tmp_path), embeddings)
+        assert isinstance(loaded.docstore, ChunkStore)
+        docs = loaded.similarity_search_by_vector(embeddings.embed_query("チャンク7"), k=2)
+        assert docs[0].page_content == "チャンク7"
+        assert docs[0].metadata == {"source": "doc7.md"}
+    
     def test_setup_qa_chain(self):
         """🔴 Red: RetrievalQAセットアップのテスト"""
         with patch('server.FAISS') as mock_faiss, \
@@ -67,32 +130,480 @@ class TestRAGServer:
     def test_query_processing(self):
         """🔴 Red: Process queryのテスト"""
         with patch('server.OpenAIEmbeddings'), \
-             patch.object(RAGServer, 'get_system_prompt') as mock_get_prompt:
+             patch('server.ChatOpenAI') as mock_llm:
             
             # RAGサーバーのセットアップ
             rag_server = RAGServer()
+            rag_server.embeddings.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+            rag_server.vector_store = Mock()
+            rag_server.vector_store.similarity_search_by_vector.return_value = [
+                Mock(page_content="テスト文書", metadata={"source": "test.md"})
+            ]
             
-            # QAチェーンのモック
-            mock_qa_chain = Mock()
-            mock_qa_chain.invoke.return_value = {
-                "result": "テスト回答",
-                "source_documents": [
-                    Mock(metadata={"source": "test.md"})
-                ]
-            }
-            rag_server.qa_chain = mock_qa_chain
-            mock_get_prompt.return_value = "System prompt"
+            # LLMの非同期応答をモック
+            mock_llm.return_value.ainvoke = AsyncMock(return_value=Mock(content="テスト回答"))
             
             # Process queryの実行
-            result = rag_server.process_query("テスト質問")
+            result = asyncio.run(rag_server.process_query("テスト質問"))
             
             # 結果の確認
             assert "answer" in result
             assert "sources" in result
             assert "timestamp" in result
             assert result["answer"] == "テスト回答"
-            mock_qa_chain.invoke.assert_called_once()
+            assert result["sources"] == ["test.md"]
+            mock_llm.return_value.ainvoke.assert_awaited_once()
+    
+    def test_context_is_built_off_the_event_loop(self):
+        """🔴 Red: トークン数計算がイベントループ外のスレッドで行われることのテスト"""
+        with patch('server.OpenAIEmbeddings'):
+            rag_server = RAGServer()
+            build = rag_server.context_builder.build
+            threads = []
+            
+            def record_thread(documents):
+                threads.append(threading.current_thread().name)
+                return build(documents)
+            
+            rag_server.context_builder.build = record_thread
+            docs = [Mock(page_content="テスト文書", metadata={"source": "test.md"})]
+            result = asyncio.run(rag_server.build_context(docs))
+            
+            assert result.documents
+            assert threads[0].startswith("rag-query")
+    
+    def test_query_processing_runs_concurrently(self):
+        """🔴 Red: 複数クエリが並行処理されることのテスト"""
+        async def slow_llm_call(prompt):
+            await asyncio.sleep(0.2)
+            return Mock(content="回答")
+        
+        with patch('server.OpenAIEmbeddings'), \
+             patch('server.ChatOpenAI') as mock_llm:
+            
+            rag_server = RAGServer()
+            rag_server.embeddings.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+            # 同時の質問は1回の埋め込みリクエストにまとめられる
+            rag_server.embeddings.aembed_documents = AsyncMock(side_effect=lambda qs: [[0.1, 0.2] for _ in qs])
+            rag_server.vector_store = Mock()
+            rag_server.vector_store.similarity_search_by_vector.return_value = []
+            mock_llm.return_value.ainvoke = slow_llm_call
+            
+            async def run_batch():
+                return await asyncio.gather(
+                    *[rag_server.process_query(f"質問{i}") for i in range(5)]
+                )
+            
+            start = time.perf_counter()
+            results = asyncio.run(run_batch())
+            elapsed = time.perf_counter() - start
+            
+            # 5件のLLM呼び出しが直列なら1秒以上かかる
+            assert len(results) == 5
+            assert elapsed < 0.6
+
 
+    def test_llm_client_reused_across_queries(self):
+        """🔴 Red: LLMクライアントがリクエスト間で再利用されることのテスト"""
+        with patch('server.OpenAIEmbeddings'), \
+             patch('server.ChatOpenAI') as mock_llm:
+            
+            rag_server = RAGServer()
+            rag_server.embeddings.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+            rag_server.vector_store = Mock()
+            rag_server.vector_store.similarity_search_by_vector.return_value = []
+            mock_llm.return_value.ainvoke = AsyncMock(return_value=Mock(content="回答"))
+            rag_server.setup_llm_clients()
+            
+            async def run_queries():
+                await rag_server.process_query("質問1")
+                await rag_server.process_query("質問2")
+            
+            asyncio.run(run_queries())
+            
+            # 通常用とストリーミング用の2つだけが作成される
+            assert mock_llm.call_count == 2
+            for call in mock_llm.call_args_list:
+                assert call.kwargs["http_async_client"] is rag_server.http_async_client
+
+
+    def test_repeated_query_uses_embedding_cache(self):
+        """🔴 Red: 同じ質問の埋め込みがキャッシュされることのテスト"""
+        with patch('server.OpenAIEmbeddings'):
+            rag_server = RAGServer()
+            rag_server.embeddings.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+            rag_server.vector_store = Mock()
+            rag_server.vector_store.similarity_search_by_vector.return_value = []
+            
+            async def retrieve_twice():
+                await rag_server.retrieve_documents("What is sector rotation?")
+                await rag_server.retrieve_documents("what is  sector rotation?")
+            
+            asyncio.run(retrieve_twice())
+            
+            rag_server.embeddings.aembed_query.assert_awaited_once()
+            assert rag_server.embedding_cache.stats()["hits"] == 1
+
+
+    def test_answer_cache_skips_llm(self):
+        """🔴 Red: 類似質問では回答キャッシュが使われLLMが呼ばれないことのテスト"""
+        with patch('server.OpenAIEmbeddings'), \
+             patch('server.ChatOpenAI') as mock_llm:
+            
+            rag_server = RAGServer()
+            rag_server.embeddings.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+            rag_server.vector_store = Mock()
+            rag_server.vector_store.similarity_search_by_vector.return_value = [
+                Mock(page_content="テスト文書", metadata={"source": "test.md"})
+            ]
+            mock_llm.return_value.ainvoke = AsyncMock(return_value=Mock(content="テスト回答"))
+            
+            async def run_queries():
+                first = await rag_server.process_query("セクターローテーションとは")
+                events = [e async for e in rag_server.process_query_streaming("セクターローテーションとは？")]
+                return first, events
+            
+            first, events = asyncio.run(run_queries())
+            
+            mock_llm.return_value.ainvoke.assert_awaited_once()
+            payloads = [json.loads(e[len("data: "):]) for e in events]
+            assert payloads.pop(0)["type"] == "heartbeat"
+            assert payloads[0]["cached"] is True
+            assert payloads[0]["sources"] == ["test.md"]
+            assert "".join(p["content"] for p in payloads if p["type"] == "token") == first["answer"]
+            assert payloads[-1]["type"] == "complete"
+            assert rag_server.answer_cache.stats()["hits"] == 1
+
+
+    def test_keyword_query_skips_embedding(self):
+        """🔴 Red: キーワードが一致する質問では埋め込みAPIを呼ばずBM25で検索するテスト"""
+        from langchain_community.vectorstores import FAISS
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        from lexical_index import BM25Index
+        
+        texts = ["CPPI戦略はフロアを守る運用手法", "セクターローテーションは景気循環に応じて業種を入れ替える"]
+        with patch('server.OpenAIEmbeddings'), \
+             patch('server.ChatOpenAI') as mock_llm:
+            
+            rag_server = RAGServer()
+            rag_server.embeddings.aembed_query = AsyncMock(return_value=DeterministicFakeEmbedding(size=8).embed_query("q"))
+            rag_server.vector_store = FAISS.from_texts(texts, DeterministicFakeEmbedding(size=8))
+            rag_server.lexical_index = BM25Index.build(texts)
+            mock_llm.return_value.ainvoke = AsyncMock(return_value=Mock(content="回答"))
+            
+            asyncio.run(rag_server.process_query("CPPI"))
+            rag_server.embeddings.aembed_query.assert_not_awaited()
+            prompt = mock_llm.return_value.ainvoke.await_args.args[0]
+            assert texts[0] in prompt
+            
+            # 自然文の質問は埋め込み検索とBM25を融合
+            asyncio.run(rag_server.process_query("景気に合わせて投資先を変える方法は？"))
+            rag_server.embeddings.aembed_query.assert_awaited_once()
+            assert rag_server.hybrid.stats()["fused"] == 1
+    
+    
+    def test_rerank_overfetches_and_trims(self):
+        """🔴 Red: 再ランキング有効時は候補を多めに取得しRETRIEVAL_K件に絞るテスト"""
+        with patch('server.OpenAIEmbeddings'), \
+             patch.object(Config, 'RERANK_ENABLED', True), \
+             patch.object(Config, 'RERANK_CANDIDATES', 3), \
+             patch.object(Config, 'RETRIEVAL_K', 1):
+            
+            rag_server = RAGServer()
+            rag_server.embeddings.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+            rag_server.vector_store = Mock()
+            rag_server.vector_store.similarity_search_by_vector.return_value = [
+                Mock(page_content="unrelated", metadata={}),
+                Mock(page_content="CPPI floor", metadata={}),
+                Mock(page_content="other", metadata={})
+            ]
+            
+            docs = asyncio.run(rag_server.retrieve_documents("CPPI floor"))
+            
+            assert rag_server.vector_store.similarity_search_by_vector.call_args.args[1] == 3
+            assert [d.page_content for d in docs] == ["CPPI floor"]
+    
+    
+    def test_process_batch(self):
+        """🔴 Red: バッチ処理で埋め込み・FAISS検索が1回ずつになり、LLM同時実行数が制限されるテスト"""
+        from langchain_community.vectorstores import FAISS
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        
+        fake = DeterministicFakeEmbedding(size=8)
+        texts = [f"文書{i}" for i in range(10)]
+        questions = [f"質問{i}" for i in range(6)]
+        with patch('server.OpenAIEmbeddings'), \
+             patch('server.ChatOpenAI') as mock_llm, \
+             patch.object(Config, 'BATCH_LLM_CONCURRENCY', 2):
+            
+            rag_server = RAGServer()
+            rag_server.embeddings.aembed_documents = AsyncMock(side_effect=lambda qs: fake.embed_documents(qs))
+            rag_server.vector_store = FAISS.from_texts(texts, fake)
+            rag_server.lexical_index = None
+            
+            in_flight, peak = 0, 0
+            async def slow_llm(prompt):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                return Mock(content="回答")
+            mock_llm.return_value.ainvoke = slow_llm
+            
+            async def run():
+                return [item async for item in rag_server.process_batch(questions)]
+            
+            with patch.object(rag_server.vector_store.index, 'search', wraps=rag_server.vector_store.index.search) as mock_search:
+                results = asyncio.run(run())
+                assert mock_search.call_count == 1
+            
+            rag_server.embeddings.aembed_documents.assert_awaited_once()
+            assert sorted(r["index"] for r in results) == list(range(6))
+            assert all(r["answer"] == "回答" for r in results)
+            assert peak == 2
+    
+    
+    def test_streaming_sends_heartbeat_before_retrieval(self):
+        """🔴 Red: 検索完了前に最初のイベントを返し、TTFB/TTFTを計測することのテスト"""
+        async def slow_embedding(query):
+            await asyncio.sleep(0.2)
+            return [0.1, 0.2]
+        
+        async def fake_stream(prompt):
+            for token in ["回", "答"]:
+                yield Mock(content=token)
+        
+        with patch('server.OpenAIEmbeddings'), \
+             patch('server.ChatOpenAI') as mock_llm:
+            
+            rag_server = RAGServer()
+            rag_server.embeddings.aembed_query = slow_embedding
+            rag_server.vector_store = Mock()
+            rag_server.vector_store.similarity_search_by_vector.return_value = [
+                Mock(page_content="テスト文書", metadata={"source": "test.md"})
+            ]
+            mock_llm.return_value.astream = fake_stream
+            
+            async def consume():
+                received = []
+                started = time.perf_counter()
+                async for event in rag_server.process_query_streaming("質問"):
+                    received.append((time.perf_counter() - started, json.loads(event[len("data: "):])))
+                return received
+            
+            received = asyncio.run(consume())
+            
+            assert [p["type"] for _, p in received] == ["heartbeat", "start", "token", "token", "complete"]
+            # 埋め込み（0.2秒）を待たずに最初のイベントが届く
+            assert received[0][0] < 0.1
+            assert received[1][1]["sources"] == ["test.md"]
+            stats = rag_server.get_metrics()["streaming"]
+            assert stats["streams"] == 1
+            assert stats["ttfb_ms"]["p50"] < 100 <= stats["ttft_ms"]["p50"]
+    
+    
+    def test_client_disconnect_cancels_llm_stream(self):
+        """🔴 Red: クライアント切断時にLLMのストリームを即座に止め、中断を数えることのテスト"""
+        state = {"tokens": 0, "closed": False, "disconnected": False}
+        
+        async def endless_stream(prompt):
+            try:
+                while True:
+                    await asyncio.sleep(0.005)
+                    state["tokens"] += 1
+                    yield Mock(content="語")
+            finally:
+                state["closed"] = True
+        
+        async def is_disconnected():
+            return state["disconnected"]
+        
+        with patch('server.OpenAIEmbeddings'), \
+             patch('server.ChatOpenAI') as mock_llm, \
+             patch.object(Config, 'STREAM_DISCONNECT_CHECK_MS', 20):
+            
+            rag_server = RAGServer()
+            rag_server.embeddings.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+            rag_server.vector_store = Mock()
+            rag_server.vector_store.similarity_search_by_vector.return_value = [
+                Mock(page_content="テスト文書", metadata={"source": "test.md"})
+            ]
+            mock_llm.return_value.astream = endless_stream
+            
+            async def consume():
+                events = []
+                async for event in rag_server.process_query_streaming("質問", is_disconnected=is_disconnected):
+                    events.append(json.loads(event[len("data: "):]))
+                    if events[-1]["type"] == "token":
+                        state["disconnected"] = True
+                await asyncio.sleep(0.05)
+                return events
+            
+            events = asyncio.run(asyncio.wait_for(consume(), 2))
+            
+            assert events[-1]["type"] == "token"  # completeもerrorも送らない
+            assert state["closed"]
+            tokens_at_close = state["tokens"]
+            assert tokens_at_close < 50
+            stats = rag_server.get_metrics()["streaming"]
+            assert stats["aborted"] == 1
+            # 切断された回答はキャッシュしない
+            assert rag_server.answer_cache.stats()["size"] == 0
+    
+    
+    def test_llm_connection_prewarm_only_when_idle(self):
+        """🔴 Red: 接続プールがアイドル切れの時だけLLM APIへの接続を事前確立することのテスト"""
+        import httpx
+        
+        with patch('server.OpenAIEmbeddings'), \
+             patch('server.ChatOpenAI') as mock_llm:
+            
+            rag_server = RAGServer()
+            mock_llm.return_value.root_async_client.base_url = httpx.URL("https://llm.example/v1/")
+            rag_server.setup_llm_clients()
+            rag_server.http_async_client.head = AsyncMock()
+            
+            async def prewarm_twice():
+                first = rag_server.prewarm_llm_connection()
+                await first
+                return first, rag_server.prewarm_llm_connection()
+            
+            first, second = asyncio.run(prewarm_twice())
+            
+            assert first is not None and second is None
+            rag_server.http_async_client.head.assert_awaited_once()
+            assert rag_server.stream_metrics.stats()["connections_prewarmed"] == 1
+    
+    
+    def test_prompt_templates_are_precompiled(self):
+        """🔴 Red: 言語別プロンプトテンプレートが読み込み時に1度だけ作られることのテスト"""
+        with patch('server.OpenAIEmbeddings'):
+            rag_server = RAGServer()
+            rag_server.load_prompt_template()
+            
+            japanese = rag_server.get_dynamic_prompt_template("リスク管理とは？")
+            assert japanese is rag_server.get_dynamic_prompt_template("分散投資とは？")
+            assert "日本語で答えて" in japanese.template
+            assert "in English" in rag_server.get_dynamic_prompt_template("What is diversification?").template
+    
+    
+    def test_concurrent_queries_share_one_embedding_request(self):
+        """🔴 Red: 同時に届いた質問の埋め込みが1回のAPIリクエストにまとめられるテスト"""
+        with patch('server.OpenAIEmbeddings'), \
+             patch.object(Config, 'QUERY_EMBEDDING_BATCH_WINDOW_MS', 20):
+            
+            rag_server = RAGServer()
+            rag_server.embeddings.aembed_query = AsyncMock(return_value=[0.0, 0.0])
+            rag_server.embeddings.aembed_documents = AsyncMock(
+                side_effect=lambda qs: [[float(len(q)), 1.0] for q in qs]
+            )
+            
+            async def run():
+                return await asyncio.gather(*[rag_server.embed_query(q) for q in ["a", "bb", "a", "ccc"]])
+            
+            vectors = asyncio.run(run())
+            
+            assert vectors == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0], [3.0, 1.0]]
+            # 重複を除いた3件を1回で埋め込む
+            rag_server.embeddings.aembed_documents.assert_awaited_once_with(["a", "bb", "ccc"])
+            rag_server.embeddings.aembed_query.assert_not_awaited()
+            assert rag_server.embedding_batcher.stats()["avg_batch_size"] == 4
+            # 以降はキャッシュから返る
+            assert asyncio.run(rag_server.embed_query("bb")) == [2.0, 1.0]
+    
+    
+    def test_concurrent_searches_are_micro_batched(self):
+        """🔴 Red: 同時に届いた検索が1回のFAISS検索にまとめられるテスト"""
+        from langchain_community.vectorstores import FAISS
+        from langchain_core.embeddings import DeterministicFakeEmbedding
+        
+        fake = DeterministicFakeEmbedding(size=8)
+        with patch('server.OpenAIEmbeddings'), \
+             patch.object(Config, 'SEARCH_BATCH_WINDOW_MS', 20):
+            
+            rag_server = RAGServer()
+            rag_server.vector_store = FAISS.from_texts([f"文書{i}" for i in range(10)], fake)
+            rag_server.lexical_index = None
+            
+            async def run():
+                return await asyncio.gather(*[
+                    rag_server.retrieve_documents(f"文書{i}", fake.embed_query(f"文書{i}"))
+                    for i in range(5)
+                ])
+            
+            with patch.object(rag_server.vector_store.index, 'search', wraps=rag_server.vector_store.index.search) as mock_search:
+                results = asyncio.run(run())
+                assert mock_search.call_count == 1
+            
+            assert [docs[0].page_content for docs in results] == [f"文書{i}" for i in range(5)]
+            assert rag_server.search_batcher.stats()["max_batch_size"] == 5
+    
+    
+    def test_hot_reload_swaps_store(self):
+        """🔴 Red: ホットリロードで実行中のリクエストは旧インデックスで完了することのテスト"""
+        from answer_cache import CachedAnswer
+        
+        with patch('server.OpenAIEmbeddings'):
+            rag_server = RAGServer()
+            rag_server.embeddings.aembed_query = AsyncMock(return_value=[0.1, 0.2])
+            
+            def slow_old_search(embedding, k):
+                time.sleep(0.2)
+                return [Mock(page_content="old", metadata={"source": "old.md"})]
+            
+            old_store = Mock()
+            old_store.similarity_search_by_vector.side_effect = slow_old_search
+            new_store = Mock()
+            new_store.similarity_search_by_vector.return_value = [
+                Mock(page_content="new", metadata={"source": "new.md"})
+            ]
+            rag_server.vector_store = old_store
+            rag_server.vector_store_version = "v1"
+            rag_server.answer_cache.store([0.1, 0.2], rag_server.answer_cache_namespace(),
+                                          CachedAnswer(answer="古い回答", sources=[]))
+            
+            async def scenario():
+                with patch.object(rag_server, '_read_vector_store', return_value=(new_store, "v2")):
+                    in_flight = asyncio.create_task(rag_server.retrieve_documents("質問"))
+                    await asyncio.sleep(0.05)
+                    result = await rag_server.reload_vector_store()
+                    after = await rag_server.retrieve_documents("質問")
+                    return await in_flight, after, result
+            
+            in_flight_docs, after_docs, result = asyncio.run(scenario())
+            
+            assert in_flight_docs[0].page_content == "old"
+            assert after_docs[0].page_content == "new"
+            assert result["previous_version"] == "v1"
+            assert result["version"] == "v2"
+            assert rag_server.answer_cache.stats()["size"] == 0
+
+    
+    def test_prompt_hot_reload(self, tmp_path):
+        """🔴 Red: プロンプト設定の再読み込みで差し替わり、不正な編集では旧設定が残ることのテスト"""
+        path = tmp_path / "prompt.yaml"
+        path.write_text("system_prompt: Version one\n", encoding="utf-8")
+        
+        with patch('server.OpenAIEmbeddings'), \
+             patch.object(Config, 'PROMPTS_PATH', str(tmp_path)), \
+             patch.object(Config, 'PROMPT_FILE', 'prompt.yaml'):
+            
+            rag_server = RAGServer()
+            rag_server.load_prompt_template()
+            first = rag_server.prompt_version
+            
+            path.write_text("system_prompt: Version two\n", encoding="utf-8")
+            result = asyncio.run(rag_server.reload_prompt_config())
+            
+            assert result == {"previous_version": first, "version": rag_server.prompt_version}
+            assert rag_server.prompt_version != first
+            assert "Version two" in rag_server.get_dynamic_prompt_template("What is CPPI?").template
+            
+            path.write_text("system_prompt: [not, a, string]\n", encoding="utf-8")
+            with pytest.raises(ValueError):
+                asyncio.run(rag_server.reload_prompt_config())
+            assert rag_server.prompt_config["system_prompt"] == "Version two"
 
 class TestFastAPIEndpoints:
     
@@ -128,11 +639,11 @@ class TestFastAPIEndpoints:
         app.dependency_overrides[verify_token] = mock_verify_token
         
         # RAGサーバーの応答をモック
-        mock_rag_server.process_query.return_value = {
+        mock_rag_server.process_query = AsyncMock(return_value={
             "answer": "テスト回答",
             "sources": ["test.md"],
             "timestamp": "2025-01-04T10:00:00"
-        }
+        })
         
         try:
             # テストリクエスト
@@ -149,6 +660,55 @@ class TestFastAPIEndpoints:
             # オーバーライドをクリア
             app.dependency_overrides.clear()
     
+    @patch('server.rag_server')
+    def test_reload_endpoint(self, mock_rag_server):
+        """🔴 Red: ベクトルストア再読み込みエンドポイントのテスト"""
+        from server import app, verify_token
+        
+        app.dependency_overrides[verify_token] = lambda: {"sub": "test_user"}
+        mock_rag_server.reload_vector_store = AsyncMock(return_value={
+            "previous_version": "v1",
+            "version": "v2",
+            "seconds": 0.1
+        })
+        
+        try:
+            response = self.client.post("/admin/reload", headers={"Authorization": "Bearer valid_token"})
+            
+            assert response.status_code == 200
+            data = response.json()
+            assert data["status"] == "reloaded"
+            assert data["version"] == "v2"
+        finally:
+            app.dependency_overrides.clear()
+    
+    @patch('server.rag_server')
+    def test_query_batch_endpoint(self, mock_rag_server):
+        """🔴 Red: バッチエンドポイントがNDJSONで結果を返すテスト"""
+        from server import app, verify_token
+        
+        app.dependency_overrides[verify_token] = lambda: {"sub": "test_user"}
+        
+        async def fake_batch(queries):
+            for i in reversed(range(len(queries))):
+                yield {"index": i, "query": queries[i], "answer": f"回答{i}", "sources": []}
+        mock_rag_server.process_batch = fake_batch
+        
+        try:
+            payload = [{"query": "質問A"}, {"query": "質問B"}]
+            response = self.client.post("/query/batch", json=payload, headers={"Authorization": "Bearer valid_token"})
+            
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            assert [line["index"] for line in lines] == [1, 0]
+            assert lines[1]["answer"] == "回答0"
+            
+            response = self.client.post("/query/batch", json=[], headers={"Authorization": "Bearer valid_token"})
+            assert response.status_code == 400
+        finally:
+            app.dependency_overrides.clear()
+    
     def test_query_endpoint_unauthorized(self):
         """🔴 Red: 認証失敗のテスト"""
         headers = {"Authorization": "Bearer invalid_token"}
@@ -0,0 +1,190 @@
+import json
+import time
+import asyncio
+import pytest
+from unittest.mock import patch
+from streaming import SSEEncoder, StreamMetrics, ClientDisconnected, StreamStalled, dumps, relay_frames, relay_tokens
+
+
+def parse(frame):
+    assert frame.startswith("data: ") and frame.endswith("\n\n")
+    return json.loads(frame[len("data: "):])
+
+
+class TestSSEEncoder:
+
+    def test_tokens_are_coalesced(self):
+        """🔴 Red: 最初のトークンは即時送信し、以降はまとめて送ることのテスト"""
+        encoder = SSEEncoder(flush_interval_ms=10000, flush_chars=4)
+        frames = [encoder.token(t) for t in ["リ", "ス", "ク", "管", "理", "と"]]
+
+        assert parse(frames[0])["content"] == "リ"
+        assert frames[1:3] == [None, None]
+        # 4文字に達した時点で送信
+        assert parse(frames[4])["content"] == "スク管理"
+        assert parse(encoder.flush())["content"] == "と"
+        assert encoder.flush() is None
+        assert (encoder.tokens, encoder.frames) == (6, 3)
+
+    def test_zero_interval_sends_every_token(self):
+        """🔴 Red: 送信間隔0ではトークン毎に送ることのテスト"""
+        encoder = SSEEncoder(flush_interval_ms=0)
+        assert all(encoder.token(t) is not None for t in ["a", "b", "c"])
+
+    def test_events_carry_monotonic_offsets(self):
+        """🔴 Red: 各イベントに開始からのミリ秒オフセットが付くことのテスト"""
+        encoder = SSEEncoder()
+        first = parse(encoder.event("heartbeat", timestamp="2025-01-01T00:00:00"))
+        last = parse(encoder.event("complete"))
+
+        assert first["type"] == "heartbeat" and first["timestamp"]
+        assert "timestamp" not in last
+        assert 0 <= first["t"] <= last["t"]
+
+    def test_json_fallback_without_orjson(self):
+        """🔴 Red: orjsonが無い場合も同じJSONになることのテスト"""
+        payload = {"type": "token", "content": "回答\n\"引用\""}
+        with patch('streaming.orjson', None):
+            fallback = dumps(payload)
+        assert json.loads(fallback) == payload
+        assert "回答" in fallback
+
+    def test_metrics_count_frames(self):
+        """🔴 Red: 送信したトークン数とフレーム数が集計されることのテスト"""
+        metrics = StreamMetrics()
+        encoder = SSEEncoder(flush_interval_ms=10000)
+        for token in ["a", "b", "c"]:
+            encoder.token(token)
+        encoder.flush()
+        metrics.record_encoding(encoder)
+
+        stats = metrics.stats()
+        assert (stats["tokens"], stats["frames"]) == (3, 2)
+
+
+class TestRelayTokens:
+
+    def test_buffered_token_is_sent_during_pause(self):
+        """🔴 Red: LLMが止まってもバッファ済みトークンがフラッシュ間隔内に送られることのテスト"""
+        async def pausing_stream():
+            yield "a"
+            await asyncio.sleep(0.005)
+            yield "b"
+            await asyncio.sleep(0.5)
+            yield "c"
+
+        async def run():
+            started = time.perf_counter()
+            encoder = SSEEncoder(flush_interval_ms=20, flush_chars=1000)
+            sent = []
+
+            async def put(frame):
+                sent.append((time.perf_counter() - started, parse(frame)["content"]))
+
+            await relay_tokens(pausing_stream(), encoder, put)
+            return sent
+
+        sent = asyncio.run(run())
+        assert [content for _, content in sent] == ["a", "b", "c"]
+        # "b" goes out when its interval is up, not when "c" arrives 500ms later
+        assert sent[1][0] < 0.2
+
+    def test_cancel_closes_source(self):
+        """🔴 Red: キャンセル時に読み出し中のストリームが閉じられることのテスト"""
+        state = {"closed": False}
+
+        async def endless_stream():
+            try:
+                yield "a"
+                await asyncio.sleep(10)
+            finally:
+                state["closed"] = True
+
+        async def run():
+            async def put(frame):
+                pass
+
+            task = asyncio.ensure_future(relay_tokens(endless_stream(), SSEEncoder(), put))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(asyncio.wait_for(run(), 1))
+        assert state["closed"]
+
+
+class TestRelayFrames:
+
+    def test_relays_frames_and_errors(self):
+        """🔴 Red: 別タスクで作られたフレームが順に届き、エラーも伝わることのテスト"""
+        async def produce(put):
+            for i in range(5):
+                await put(f"frame{i}")
+            raise RuntimeError("upstream failed")
+
+        async def consume():
+            frames = []
+            with pytest.raises(RuntimeError):
+                async for frame in relay_frames(produce, max_frames=2):
+                    frames.append(frame)
+            return frames
+
+        assert asyncio.run(consume()) == [f"frame{i}" for i in range(5)]
+
+    def test_disconnect_cancels_producer(self):
+        """🔴 Red: クライアント切断を検知したら生成側を即座に止めることのテスト"""
+        state = {"cancelled": False, "disconnected": False}
+
+        async def produce(put):
+            try:
+                while True:
+                    await put("token")
+                    await asyncio.sleep(0.01)
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+
+        async def is_disconnected():
+            return state["disconnected"]
+
+        async def consume():
+            received = 0
+            with pytest.raises(ClientDisconnected):
+                async for _ in relay_frames(produce, is_disconnected=is_disconnected, check_interval=0.02):
+                    received += 1
+                    if received == 3:
+                        state["disconnected"] = True
+            await asyncio.sleep(0)
+            return received
+
+        assert asyncio.run(asyncio.wait_for(consume(), 1)) >= 3
+        assert state["cancelled"]
+
+    def test_stalled_reader_aborts_producer(self):
+        """🔴 Red: バッファが満杯のまま読まれない場合に生成側が中断されることのテスト"""
+        async def produce(put):
+            for i in range(10):
+                await put(f"frame{i}")
+
+        async def consume():
+            frames = relay_frames(produce, max_frames=2, send_timeout=0.05)
+            first = await frames.__anext__()
+            # 読み手が止まっている間にバッファが溢れる
+            await asyncio.sleep(0.2)
+            with pytest.raises(StreamStalled):
+                async for _ in frames:
+                    pass
+            return first
+
+        assert asyncio.run(consume()) == "frame0"
+
+    def test_aborted_streams_estimate_tokens_saved(self):
+        """🔴 Red: 中断したストリームの節約トークン数を平均回答長から推定するテスト"""
+        metrics = StreamMetrics()
+        assert metrics.record_aborted(5) == 0  # 比較できる完了済みストリームがまだ無い
+        metrics.record_completed(100)
+        assert metrics.record_aborted(30) == 70
+        assert metrics.record_aborted(None) == 0  # キャッシュ再生はLLMを使わない
+        stats = metrics.stats()
+        assert (stats["aborted"], stats["tokens_saved"]) == (3, 70)